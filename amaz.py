@@ -16,138 +16,32 @@ import sys
 import pickle
 import logging
 from win32com.client import Dispatch
-from textblob import TextBlob
+from sentiment_service import get_sentiment_service
+from driver_pool import get_driver_pool, apply_resource_policy_options, apply_resource_policy
+from page_readiness import wait_for_stable_count, AMAZON_RESULT_SELECTOR
+from http_fetcher import get_fetcher
+from catalog import canonical_id
+from tracing import span
+from page_classifier import classify_page, check_page, get_circuit_breaker, PageBlockedError, NoResultsError
+from rate_limiter import get_rate_limiter
 # Add this improved filtering system to your amaz.py file
 
 import re
-from difflib import SequenceMatcher
+from ranking import RelevanceRanker, rank_products, is_likely_accessory, is_bundle_or_combo
 
 def calculate_relevance_score(title, search_term):
     """
     Calculate how relevant a product title is to the search term
     Returns a score between 0 and 1 (higher = more relevant)
     """
-    title_lower = title.lower()
-    search_lower = search_term.lower()
-    
-    # Basic string similarity
-    similarity = SequenceMatcher(None, title_lower, search_lower).ratio()
-    
-    # Boost score if search terms appear in title
-    search_words = search_lower.split()
-    title_words = title_lower.split()
-    
-    word_matches = 0
-    for search_word in search_words:
-        if len(search_word) > 2:  # Ignore very short words
-            for title_word in title_words:
-                if search_word in title_word or title_word in search_word:
-                    word_matches += 1
-                    break
-    
-    word_match_score = word_matches / len(search_words) if search_words else 0
-    
-    # Combined score (60% word matching, 40% string similarity)
-    final_score = (word_match_score * 0.6) + (similarity * 0.4)
-    
-    return final_score
-
-def is_likely_accessory(title):
-    """
-    Detect if a product is likely an accessory or add-on item
-    """
-    title_lower = title.lower()
-    
-    # Common accessory indicators
-    accessory_keywords = [
-        'case', 'cover', 'screen protector', 'tempered glass', 'film',
-        'charger', 'charging cable', 'usb cable', 'adapter', 'dock',
-        'holder', 'stand', 'mount', 'grip', 'ring holder',
-        'headphones', 'earphones', 'earbuds', 'headset',
-        'bag', 'pouch', 'wallet', 'sleeve', 'skin', 'sticker',
-        'stylus', 'pen', 'cleaning', 'cloth', 'wipe',
-        'replacement', 'spare', 'extra', 'additional',
-        'compatible with', 'for samsung', 'for iphone', 'for xiaomi'
-    ]
-    
-    # Check for accessory patterns
-    for keyword in accessory_keywords:
-        if keyword in title_lower:
-            return True
-    
-    # Pattern-based detection
-    accessory_patterns = [
-        r'for\s+\w+',  # "for Samsung", "for iPhone"
-        r'\d+\s*pack',  # "3 pack", "5-pack"
-        r'set of \d+',  # "set of 2"
-        r'compatible',  # any compatibility mention
-        r'replacement',  # replacement parts
-    ]
-    
-    for pattern in accessory_patterns:
-        if re.search(pattern, title_lower):
-            return True
-    
-    return False
-
-def is_bundle_or_combo(title):
-    """
-    Detect bundle deals or combo packs that might not be the main product
-    """
-    title_lower = title.lower()
-    
-    bundle_indicators = [
-        'bundle', 'combo', 'pack of', 'set of', '+ free',
-        'with accessories', 'complete kit', 'starter kit'
-    ]
-    
-    return any(indicator in title_lower for indicator in bundle_indicators)
+    return RelevanceRanker(search_term).relevance(title)
 
 def filter_and_rank_products(products, search_term, max_results=5):
     """
     Filter out irrelevant products and rank by relevance
     """
-    filtered_products = []
-    
-    for product in products:
-        title = product[0] if isinstance(product, list) else product.get('title', '')
-        
-        # Skip if title is empty or too short
-        if not title or len(title.strip()) < 5:
-            continue
-        
-        # Calculate relevance score
-        relevance = calculate_relevance_score(title, search_term)
-        
-        # Apply penalties for accessories and bundles
-        penalty = 0
-        if is_likely_accessory(title):
-            penalty += 0.3
-        if is_bundle_or_combo(title):
-            penalty += 0.1
-        
-        final_score = max(0, relevance - penalty)
-        
-        # Only keep products with reasonable relevance
-        if final_score > 0.2:
-            if isinstance(product, list):
-                filtered_products.append((*product, final_score))
-            else:
-                product['relevance_score'] = final_score
-                filtered_products.append(product)
-    
-    # Sort by relevance score (highest first)
-    if isinstance(filtered_products[0], dict):
-        filtered_products.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-        # Remove the score from final results
-        for product in filtered_products:
-            product.pop('relevance_score', None)
-    else:
-        filtered_products.sort(key=lambda x: x[-1], reverse=True)
-        # Remove the score from final results (keep original format)
-        filtered_products = [product[:-1] for product in filtered_products]
-    
-    return filtered_products[:max_results]
+    with span("rank", "amazon"):
+        return rank_products(products, search_term, max_results)
 
 # Modified function for Amazon search
 def find_multiple_products_improved(search_term, driver_path, max_products=5):
@@ -161,12 +55,15 @@ def find_multiple_products_improved(search_term, driver_path, max_products=5):
     retry_count = 0
     
     all_products = []
+    seen_ids = set()
     
     while retry_count < max_retries:
+        html = None
         try:
-            html = get_html(amazon_link, driver_path)
+            html = fetch_search_html(amazon_link, driver_path)
             log_debug("Parsing HTML with BeautifulSoup...")
-            soup = BeautifulSoup(html, 'lxml')
+            with span("parse", "amazon"):
+                soup = BeautifulSoup(html, 'lxml')
             
             selectors = [
                 'div[data-component-type="s-search-result"]',
@@ -184,7 +81,7 @@ def find_multiple_products_improved(search_term, driver_path, max_products=5):
             if not prod_cards:
                 retry_count += 1
                 log_debug(f"No products found. Retry {retry_count}/{max_retries}")
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
                 continue
             
             # Extract more products initially to have more options for filtering
@@ -210,14 +107,10 @@ def find_multiple_products_improved(search_term, driver_path, max_products=5):
                     price = extract_price(card)
                     
                     if title and link and price != float('inf'):
-                        # Check for duplicates
-                        duplicate = False
-                        for existing_product in all_products:
-                            if existing_product[2] == link:
-                                duplicate = True
-                                break
-                        
-                        if not duplicate:
+                        # Same ASIN seen already (e.g. sponsored and organic card for one product)
+                        product_id = canonical_id('Amazon', link)
+                        if product_id not in seen_ids:
+                            seen_ids.add(product_id)
                             all_products.append([title, price, link])
                 
                 except Exception as e:
@@ -239,13 +132,19 @@ def find_multiple_products_improved(search_term, driver_path, max_products=5):
                 
                 return filtered_products
             
+        except PageBlockedError:
+            raise
+        except NoResultsError:
+            print(f"No Amazon results for '{search_term}'")
+            return []
         except Exception as e:
             retry_count += 1
             log_debug(f"Error during scraping (attempt {retry_count}/{max_retries}): {str(e)}")
             if retry_count < max_retries:
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
             else:
                 print(f"Error during scraping: {str(e)}")
+                save_error_page(html)
     
     return []
 
@@ -262,6 +161,12 @@ def log_debug(message):
     if DEBUG:
         print(f"[DEBUG] {message}")
 
+def save_error_page(html):
+    """Write the page that failed to parse to debug_error_page.html"""
+    if html:
+        with open('debug_error_page.html', 'w', encoding='utf-8') as f:
+            f.write(html)
+
 def get_chrome_version():
     """Get the installed Chrome version."""
     try:
@@ -329,6 +234,7 @@ def setup_chrome_driver(driver_path, headless=False):
     # Only add headless mode if specified - visible browser helps with manual login
     if headless:
         chrome_options.add_argument('--headless')
+    apply_resource_policy_options(chrome_options)
     
     log_debug("Starting Chrome browser...")
     
@@ -350,36 +256,59 @@ def setup_chrome_driver(driver_path, headless=False):
     browser.execute_cdp_cmd('Network.setUserAgentOverride', {
         "userAgent": get_random_user_agent()
     })
+    apply_resource_policy(browser)
     browser.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     browser.set_window_size(1920, 1080)
     return browser
 
 def get_html(url, driver_path):
-    browser = setup_chrome_driver(driver_path, headless=True)
+    # Borrow a warm browser instead of cold-starting Chrome for every page
+    pool = get_driver_pool(driver_path, headless=True)
+    browser = pool.checkout()
     
     try:
         log_debug(f"Navigating to URL: {url}")
-        browser.get(url)
+        with get_rate_limiter().permit(url) as load:
+            with span("navigate", "amazon"):
+                browser.get(url)
+            page = classify_page(browser.page_source, 'amazon')
+            load['blocked'] = page.blocked
         
-        delay = random.uniform(3, 7)
-        log_debug(f"Waiting {delay:.2f} seconds for page to load...")
-        time.sleep(delay)
+        # A captcha, robot check or "no results" page is final: abort before waiting for cards
+        check_page(url, page, partial=True)
         
-        wait = WebDriverWait(browser, 10)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div.s-result-item,div[data-component-type="s-search-result"]')))
-        
-        for i in range(3):
-            scroll_amount = random.randint(300, 700)
-            browser.execute_script(f"window.scrollTo(0, {scroll_amount})")
-            time.sleep(random.uniform(0.5, 1.5))
+        # Wait for the result cards to appear and stop changing instead of sleeping a fixed time
+        start = time.time()
+        with span("readiness_wait", "amazon"):
+            if not wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=10):
+                check_page(url, classify_page(browser.page_source, 'amazon'), partial=True)
+                raise TimeoutException("No search results appeared within 10 seconds")
+            
+            # One scroll triggers lazy-loaded cards; wait only as long as the count keeps growing
+            browser.execute_script(f"window.scrollTo(0, {random.randint(300, 700)})")
+            wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=3)
         
-        log_debug("Page loaded successfully")
+        log_debug(f"Page loaded successfully in {time.time() - start:.2f}s")
         return browser.page_source
     except Exception as e:
         log_debug(f"Error during page load: {str(e)}")
         raise
     finally:
-        browser.quit()
+        pool.release(browser)
+
+def has_search_results(html):
+    """Whether a search page carries priced result cards (static HTML from Amazon often does)"""
+    return 'data-component-type="s-search-result"' in html and 'a-price' in html
+
+def fetch_search_html(url, driver_path):
+    # Fail fast while Amazon is blocking us instead of burning browser time on more robot checks
+    get_circuit_breaker().before_request(url)
+    # Plain HTTP first; the browser only renders the page when the static response is blocked or empty
+    result = get_fetcher().fetch(url, lambda page_url: get_html(page_url, driver_path), has_search_results,
+                                 classify=lambda html, status: classify_page(html, 'amazon', status))
+    log_debug(f"Fetched {url} via {result.tier} in {result.elapsed:.2f}s ({result.page.state})")
+    check_page(url, result.page)
+    return result.html
 
 def extract_price(card):
     price_selectors = [
@@ -411,10 +340,12 @@ def find_lowest_price_product(search_term, driver_path):
     lowest_price_product = None
     
     while retry_count < max_retries:
+        html = None
         try:
-            html = get_html(amazon_link, driver_path)
+            html = fetch_search_html(amazon_link, driver_path)
             log_debug("Parsing HTML with BeautifulSoup...")
-            soup = BeautifulSoup(html, 'lxml')
+            with span("parse", "amazon"):
+                soup = BeautifulSoup(html, 'lxml')
             
             selectors = [
                 'div[data-component-type="s-search-result"]',
@@ -432,7 +363,7 @@ def find_lowest_price_product(search_term, driver_path):
             if not prod_cards:
                 retry_count += 1
                 log_debug(f"No products found. Retry {retry_count}/{max_retries}")
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
                 continue
             
             items = []
@@ -481,13 +412,19 @@ def find_lowest_price_product(search_term, driver_path):
                 print("="*50)
                 return lowest_price_product
             
+        except PageBlockedError:
+            raise
+        except NoResultsError:
+            print(f"No Amazon results for '{search_term}'")
+            return None
         except Exception as e:
             retry_count += 1
             log_debug(f"Error during scraping (attempt {retry_count}/{max_retries}): {str(e)}")
             if retry_count < max_retries:
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
             else:
                 print(f"Error during scraping: {str(e)}")
+                save_error_page(html)
     
     return None
 
@@ -501,12 +438,15 @@ def find_multiple_products(search_term, driver_path, max_products=5):
     retry_count = 0
     
     all_products = []
+    seen_ids = set()
     
     while retry_count < max_retries:
+        html = None
         try:
-            html = get_html(amazon_link, driver_path)
+            html = fetch_search_html(amazon_link, driver_path)
             log_debug("Parsing HTML with BeautifulSoup...")
-            soup = BeautifulSoup(html, 'lxml')
+            with span("parse", "amazon"):
+                soup = BeautifulSoup(html, 'lxml')
             
             selectors = [
                 'div[data-component-type="s-search-result"]',
@@ -524,7 +464,7 @@ def find_multiple_products(search_term, driver_path, max_products=5):
             if not prod_cards:
                 retry_count += 1
                 log_debug(f"No products found. Retry {retry_count}/{max_retries}")
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
                 continue
             
             for idx, card in enumerate(prod_cards[:max_products*2]):  # Get more cards to filter
@@ -550,13 +490,9 @@ def find_multiple_products(search_term, driver_path, max_products=5):
                     
                     if title and link and price != float('inf'):
                         # Check if this product is already in our list (avoid duplicates)
-                        duplicate = False
-                        for existing_product in all_products:
-                            if existing_product[2] == link:  # Same URL
-                                duplicate = True
-                                break
-                        
-                        if not duplicate:
+                        product_id = canonical_id('Amazon', link)
+                        if product_id not in seen_ids:
+                            seen_ids.add(product_id)
                             all_products.append([title, price, link])
                             log_debug(f"Added Product {len(all_products)}: {title[:50]}... - ₹{price}")
                         
@@ -581,13 +517,19 @@ def find_multiple_products(search_term, driver_path, max_products=5):
                 
                 return all_products
             
+        except PageBlockedError:
+            raise
+        except NoResultsError:
+            print(f"No Amazon results for '{search_term}'")
+            return []
         except Exception as e:
             retry_count += 1
             log_debug(f"Error during scraping (attempt {retry_count}/{max_retries}): {str(e)}")
             if retry_count < max_retries:
-                time.sleep(random.uniform(5, 10))
+                get_rate_limiter().backoff(amazon_link)
             else:
                 print(f"Error during scraping: {str(e)}")
+                save_error_page(html)
     
     return []
 class AmazonReviewScraper:
@@ -713,23 +655,13 @@ class AmazonReviewScraper:
             review = template.format(product=product_name, price=prices[i % len(prices)])
             simulated_reviews.append(review)
         
-        # Count sentiment of reviews for decision making
-        positive_count = 0
-        negative_count = 0
-        neutral_count = 0
-        
-        for review in simulated_reviews:
-            sentiment = TextBlob(review).sentiment.polarity
-            if sentiment > 0.1:
-                positive_count += 1
-            elif sentiment < -0.1:
-                negative_count += 1
-            else:
-                neutral_count += 1
+        # Count sentiment of reviews for decision making (repeated templates are scored once)
+        sentiment_service = get_sentiment_service()
+        with span("sentiment", "amazon"):
+            summary = sentiment_service.summarize(sentiment_service.score_many(simulated_reviews))
         
         # Make decision based on sentiment counts
-        total = positive_count + negative_count + neutral_count
-        positive_percent = (positive_count / total) * 100 if total > 0 else 0
+        positive_percent = summary['positive_percent']
         
         if positive_percent > 65:
             decision = "Buy ✅ (Highly recommended based on reviews)"
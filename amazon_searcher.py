@@ -7,6 +7,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 import time
 import random
+from rate_limiter import get_rate_limiter
+from page_readiness import wait_for_stable_count, AMAZON_RESULT_SELECTOR
 
 DEBUG = True
 
@@ -47,12 +49,9 @@ def get_html(url):
     
     try:
         log_debug(f"Navigating to URL: {url}")
-        browser.get(url)
-        
-        # Add random delay between 3-7 seconds
-        delay = random.uniform(3, 7)
-        log_debug(f"Waiting {delay:.2f} seconds for page to load...")
-        time.sleep(delay)
+        # Pacing comes from the shared per-host limiter instead of a fixed random delay
+        with get_rate_limiter().permit(url):
+            browser.get(url)
         
         # Wait for specific elements instead of fixed time
         wait = WebDriverWait(browser, 10)
@@ -62,7 +61,7 @@ def get_html(url):
         for i in range(3):
             scroll_amount = random.randint(300, 700)
             browser.execute_script(f"window.scrollTo(0, {scroll_amount})")
-            time.sleep(random.uniform(0.5, 1.5))
+            wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=1.5)
         
         log_debug("Page loaded successfully")
         return browser.page_source
@@ -118,7 +117,7 @@ def amazon():
             if not prod_cards:
                 retry_count += 1
                 log_debug(f"No products found. Retry {retry_count}/{max_retries}")
-                time.sleep(random.uniform(5, 10))  # Random delay between retries
+                get_rate_limiter().backoff(URL)  # Slower pacing for the retry
                 continue
             
             items = []
@@ -159,7 +158,7 @@ def amazon():
             retry_count += 1
             log_debug(f"Error during scraping (attempt {retry_count}/{max_retries}): {str(e)}")
             if retry_count < max_retries:
-                time.sleep(random.uniform(5, 10))  # Random delay between retries
+                get_rate_limiter().backoff(URL)  # Slower pacing for the retry
             else:
                 print(f"Error during scraping: {str(e)}")
 
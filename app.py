@@ -13,6 +13,8 @@ import time
 import random
 import pandas as pd
 import logging
+from rate_limiter import get_rate_limiter
+from page_readiness import wait_for_stable_count, AMAZON_RESULT_SELECTOR
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -101,8 +103,8 @@ def scrape_amazon(name, driver_path):
     browser = create_browser(driver_path)
     
     try:
-        browser.get(URL)
-        time.sleep(random.uniform(3, 7))
+        with get_rate_limiter().permit(URL):
+            browser.get(URL)
         
         WebDriverWait(browser, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-component-type="s-search-result"]'))
@@ -110,7 +112,8 @@ def scrape_amazon(name, driver_path):
         
         for _ in range(3):
             browser.execute_script("window.scrollBy(0, 500);")
-            time.sleep(random.uniform(0.5, 1.5))
+            # Wait only while lazy-loaded cards are still appearing
+            wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=1.5)
         
         html = browser.page_source
         logger.info(f"Amazon HTML length: {len(html)}")
@@ -180,7 +183,8 @@ def scrape_flipkart(name, driver_path):
         logger.info(f"Starting Flipkart scrape for: {name}")
         
         # Go to Flipkart and handle any login popup that might appear
-        browser.get(URL)
+        with get_rate_limiter().permit(URL):
+            browser.get(URL)
         
         # Wait for page to load and handle popup if it appears
         try:
@@ -0,0 +1,1413 @@
+"""
+Performance benchmarks for the scraping / analysis pipeline.
+
+Run a single benchmark with:
+    python benchmarks.py <name> [options]
+
+Use `python benchmarks.py --help` to list the available benchmarks.
+"""
+import argparse
+import functools
+import http.server
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+
+def percentile(sorted_timings, fraction):
+    return sorted_timings[min(len(sorted_timings) - 1, int(round(fraction * (len(sorted_timings) - 1))))]
+
+
+def summarize(label, timings):
+    """Print min / median / p95 / p99 / max for a list of timings in seconds"""
+    timings = sorted(timings)
+    print(f"{label:<40} n={len(timings):<5} min={timings[0]*1000:9.1f}ms  "
+          f"median={statistics.median(timings)*1000:9.1f}ms  p95={percentile(timings, 0.95)*1000:9.1f}ms  "
+          f"p99={percentile(timings, 0.99)*1000:9.1f}ms  max={timings[-1]*1000:9.1f}ms")
+
+
+def serve_directory(directory):
+    """Serve a directory over HTTP on a random localhost port; returns (server, base_url)"""
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = functools.partial(QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ---------------------------------------------------------------------------
+# Page readiness: fixed sleeps vs DOM readiness conditions
+# ---------------------------------------------------------------------------
+FLIPKART_FIXTURE = 'flipkart_search_results.html'   # Saved "iphone 15" results page with 8 product cards
+
+
+def _hydrated_fixture(source, target, delay, interval):
+    """
+    Copy a results page so its result rows are inserted by script, as Flipkart's client render does
+
+    The first row appears after `delay` seconds and the rest follow every `interval` seconds.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(Path(source).read_text(encoding='utf-8'), 'lxml')
+    rows = soup.select('div.cPHDOP')
+    template = soup.new_tag('template', id='deferred-rows')
+    rows[0].insert_before(template)
+    for row in rows:
+        template.append(row.extract())
+    script = soup.new_tag('script')
+    script.string = f"""
+        const slot = document.getElementById('deferred-rows');
+        Array.from(slot.content.children).forEach((row, i) =>
+            setTimeout(() => slot.before(row), {delay * 1000:.0f} + i * {interval * 1000:.0f}));
+    """
+    soup.body.append(script)
+    Path(target).write_text(str(soup), encoding='utf-8')
+    return len(rows)
+
+
+def bench_readiness(args):
+    import tempfile
+    import shutil
+    from driver_pool import create_chrome_driver
+    from page_readiness import wait_for_stable_count, wait_for_network_idle, FLIPKART_RESULT_SELECTOR
+
+    count_script = "return document.querySelectorAll(arguments[0]).length"
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(REPO_DIR / FLIPKART_FIXTURE, os.path.join(tmp, 'static.html'))
+        rows = _hydrated_fixture(REPO_DIR / FLIPKART_FIXTURE, os.path.join(tmp, 'hydrated.html'),
+                                 args.delay, args.interval)
+        fixtures = [
+            # (fixture, what it simulates); Flipkart searches used a fixed 10s sleep before the readiness waits
+            ('static.html', "cards in the initial HTML"),
+            ('hydrated.html', f"cards inserted from {args.delay:.1f}s, every {args.interval:.2f}s"),
+        ]
+
+        server, base_url = serve_directory(tmp)
+        driver = create_chrome_driver(args.driver_path, headless=True)
+        try:
+            for fixture, description in fixtures:
+                url = f"{base_url}/{fixture}"
+                fixed, ready, captured = [], [], []
+                for _ in range(args.runs):
+                    start = time.time()
+                    driver.get(url)
+                    time.sleep(args.legacy_sleep)
+                    driver.page_source
+                    fixed.append(time.time() - start)
+
+                    start = time.time()
+                    driver.get(url)
+                    if not wait_for_stable_count(driver, FLIPKART_RESULT_SELECTOR, timeout=10):
+                        wait_for_network_idle(driver, timeout=10)
+                    driver.page_source
+                    ready.append(time.time() - start)
+                    captured.append(driver.execute_script(count_script, FLIPKART_RESULT_SELECTOR))
+
+                print(f"{fixture} ({description}); readiness captured {min(captured)}-{max(captured)}/{rows} rows")
+                summarize(f"  before: fixed sleep ({args.legacy_sleep:.0f}s)", fixed)
+                summarize("  after: readiness wait", ready)
+        finally:
+            driver.quit()
+            server.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Flipkart parsing: expected cards from the saved results page, parse time
+# ---------------------------------------------------------------------------
+FLIPKART_FIXTURE_CARDS = [
+    # (title, price, price_text, product path) in page order
+    ("Apple iPhone 15 (Black, 128 GB)", 61999.0, "₹61,999", "/apple-iphone-15-black-128-gb/p/itm6ac6485515ae4"),
+    ("Apple iPhone 15 (Blue, 128 GB)", 61999.0, "₹61,999", "/apple-iphone-15-blue-128-gb/p/itmbf14ef54f645d"),
+    ("Apple iPhone 15 (Pink, 256 GB)", 71999.0, "₹71,999", "/apple-iphone-15-pink-256-gb/p/itm7579ed94ca647"),
+    ("Apple iPhone 15 Plus (Black, 128 GB)", 70999.0, "₹70,999",
+     "/apple-iphone-15-plus-black-128-gb/p/itm9b0f2d1e2d8a4"),
+    ("Apple iPhone 15 Pro (Natural Titanium, 128 GB)", 119900.0, "₹1,19,900",
+     "/apple-iphone-15-pro-natural-titanium-128-gb/p/itm0b7c4c0d1ab3f"),
+    ("Apple iPhone 14 (Midnight, 128 GB)", 52999.0, "₹52,999", "/apple-iphone-14-midnight-128-gb/p/itm9e6293c322a84"),
+    ("Apple iPhone 15 (Green, 512 GB)", float('inf'), "Price Not Available",
+     "/apple-iphone-15-green-512-gb/p/itm3e1b5d9f3c2a7"),
+    ("Apple iPhone 13 (Starlight, 128 GB)", 44999.0, "₹44,999", "/apple-iphone-13-starlight-128-gb/p/itmc9604f122ae7f"),
+]
+
+
+def bench_parse(args):
+    from urllib.parse import urlsplit
+    from flipkart_parser import parse_search_results
+
+    html = (REPO_DIR / FLIPKART_FIXTURE).read_text(encoding='utf-8')
+    products = parse_search_results(html)
+    parsed = [(p['title'], p['price'], p['price_text'], urlsplit(p['link']).path) for p in products]
+    for expected, actual in zip(FLIPKART_FIXTURE_CARDS, parsed):
+        if expected != actual:
+            print(f"  expected {expected}\n  got      {actual}")
+    assert parsed == FLIPKART_FIXTURE_CARDS, f"{FLIPKART_FIXTURE}: parsed cards differ from the expected list"
+    assert all(p['link'].startswith("https://www.flipkart.com/") and "pid=" in p['link'] for p in products)
+    print(f"{FLIPKART_FIXTURE}: {len(products)}/{len(FLIPKART_FIXTURE_CARDS)} cards match "
+          f"(titles, prices, links)")
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.time()
+        parse_search_results(html)
+        timings.append(time.time() - start)
+    summarize("parse_search_results", timings)
+
+
+# ---------------------------------------------------------------------------
+# Sentiment: TextBlob vs batched lexicon backend (parity + throughput)
+# ---------------------------------------------------------------------------
+def _review_corpus():
+    """Review texts from the saved sentiment CSV plus the simulated Amazon review templates"""
+    import csv
+    import re
+
+    with open(REPO_DIR / 'sentiment_analysis' / 'reviews_with_sentiment.csv', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    with open(REPO_DIR / 'amaz.py', encoding='utf-8') as f:
+        templates = re.findall(r'^\s+"([^"]+)",?$', f.read(), re.M)
+    return rows, [row['review_text'] for row in rows] + templates
+
+
+def bench_sentiment(args):
+    import random
+    from sentiment_service import TextBlobBackend, LexiconBackend
+
+    rows, corpus = _review_corpus()
+    textblob_backend = TextBlobBackend()
+    lexicon_backend = LexiconBackend(processes=1)
+
+    # Parity: stored TextBlob polarity in the CSV, then a live comparison on the whole corpus
+    mismatches = 0
+    for row, (polarity, _) in zip(rows, lexicon_backend.score_batch([row['review_text'] for row in rows])):
+        if abs(float(row['polarity']) - polarity) > 1e-6:
+            mismatches += 1
+    for expected, actual in zip(textblob_backend.score_batch(corpus), lexicon_backend.score_batch(corpus)):
+        if abs(expected[0] - actual[0]) > 1e-9 or abs(expected[1] - actual[1]) > 1e-9:
+            mismatches += 1
+    print(f"Parity: {len(rows) + len(corpus) - mismatches}/{len(rows) + len(corpus)} texts match TextBlob")
+
+    # Throughput on a large batch built from the corpus
+    random.seed(42)
+    texts = [random.choice(corpus) for _ in range(args.texts)]
+    backends = [
+        ('textblob', textblob_backend),
+        ('lexicon (1 process)', lexicon_backend),
+        (f'lexicon ({args.processes} processes)', LexiconBackend(processes=args.processes, parallel_threshold=1)),
+    ]
+    for label, backend in backends:
+        start = time.time()
+        backend.score_batch(texts)
+        elapsed = time.time() - start
+        print(f"{label:<25} {len(texts)} texts in {elapsed:7.2f}s  ({len(texts) / elapsed:10.0f} texts/s)")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+# ---------------------------------------------------------------------------
+# Forecast: per-day predict loop vs one vectorized predict call
+# ---------------------------------------------------------------------------
+def _legacy_forecast(entry, current_price, days_ahead, feature_columns):
+    """The original predict_future_price loop: one scaler.transform + model.predict per day"""
+    import datetime
+    import pandas as pd
+
+    future_dates = pd.date_range(start=datetime.datetime.now() + datetime.timedelta(days=1),
+                                 periods=days_ahead, freq='D')
+    predictions = []
+    last_row = entry['last_row'].copy()
+    for i, future_date in enumerate(future_dates):
+        last_row['day_of_week'] = future_date.dayofweek
+        last_row['day_of_month'] = future_date.day
+        last_row['month'] = future_date.month
+        last_row['days_since_start'] = last_row['days_since_start'] + i + 1
+        X_future = last_row[feature_columns].values.reshape(1, -1)
+        predicted_price = entry['model'].predict(entry['scaler'].transform(X_future))[0]
+        max_change_percent = 0.10 * (i + 1) / days_ahead
+        predicted_price = max(current_price * (1 - max_change_percent),
+                              min(predicted_price, current_price * (1 + max_change_percent)))
+        predictions.append({'date': future_date, 'predicted_price': predicted_price,
+                            'confidence': entry['confidence']})
+        last_row['price_lag_1'] = predicted_price
+    return predictions
+
+
+def bench_forecast(args):
+    import logging
+    import tempfile
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from model_registry import ModelRegistry
+    from price_predictor import PricePredictor
+
+    logging.getLogger().setLevel(logging.WARNING)
+    templates = {
+        'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
+        'linear_regression': LinearRegression(),
+    }
+    current_price = 24999.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, template in templates.items():
+            predictor = PricePredictor(os.path.join(tmp, 'history.db'),
+                                       registry=ModelRegistry(os.path.join(tmp, 'models')))
+            predictor.models = {name: template}
+            entry = predictor.get_model(f"Benchmark phone ({name})", 'Amazon')
+
+            for horizon in args.horizons:
+                loop, vectorized = [], []
+                for _ in range(args.runs):
+                    start = time.time()
+                    _legacy_forecast(entry, current_price, horizon, predictor.FEATURE_COLUMNS)
+                    loop.append(time.time() - start)
+
+                    start = time.time()
+                    predictor.forecast(entry, current_price, horizon)
+                    vectorized.append(time.time() - start)
+
+                summarize(f"{name} {horizon}d loop", loop)
+                summarize(f"{name} {horizon}d vectorized", vectorized)
+
+
+# ---------------------------------------------------------------------------
+# Seeding price history: one commit per row vs one transaction
+# ---------------------------------------------------------------------------
+def bench_seed(args):
+    import logging
+    import sqlite3
+    import tempfile
+    from model_registry import ModelRegistry
+    from price_predictor import PricePredictor
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        predictor = PricePredictor(os.path.join(tmp, 'history.db'),
+                                   registry=ModelRegistry(os.path.join(tmp, 'models')))
+        df = predictor.generate_synthetic_data("Seed template", 19999.0, 'Amazon', days=args.days)
+        dates = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+        prices = df['price'].tolist()
+
+        per_row, bulk = [], []
+        for run in range(args.runs):
+            start = time.time()
+            for date_str, price in zip(dates, prices):
+                conn = sqlite3.connect(predictor.db.db_name)
+                conn.execute("""
+                    INSERT OR REPLACE INTO price_history
+                    (product_name, platform, price, date, search_term)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (f"Per-row product {run}", 'Amazon', price, date_str, "synthetic_data"))
+                conn.commit()
+                conn.close()
+            per_row.append(time.time() - start)
+
+            start = time.time()
+            predictor.generate_synthetic_data(f"Bulk product {run}", 19999.0, 'Amazon', days=args.days)
+            bulk.append(time.time() - start)
+
+        summarize(f"{args.days} rows, commit per row", per_row)
+        summarize(f"{args.days} rows, generate + executemany", bulk)
+
+
+# ---------------------------------------------------------------------------
+# Price history lookups: LIKE '%name%' scans vs indexed product keys
+# ---------------------------------------------------------------------------
+def bench_history(args):
+    import datetime
+    import logging
+    import random
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    from price_predictor import PricePredictionDatabase, DATE_FORMAT
+
+    logging.getLogger().setLevel(logging.WARNING)
+    brands = ['Apple iPhone', 'Samsung Galaxy', 'OnePlus Nord', 'Redmi Note', 'Realme Narzo', 'Vivo Y']
+    colours = ['Black', 'Blue', 'Green', 'Pink', 'White', 'Silver']
+    products = [f"{random.choice(brands)} {n} ({random.choice(colours)}, {random.choice([64, 128, 256])} GB)"
+                for n in range(args.products)]
+    days = max(1, args.rows // (args.products * 2))
+    today = datetime.datetime.now().replace(microsecond=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PricePredictionDatabase(os.path.join(tmp, 'history.db'))
+        start = time.time()
+        for name in products:
+            db.add_price_history_many(
+                {'product_name': name, 'platform': platform, 'price': 10000.0 + day,
+                 'date': (today - datetime.timedelta(days=day)).strftime(DATE_FORMAT)}
+                for platform in ('Amazon', 'Flipkart') for day in range(days)
+            )
+        print(f"Seeded {args.products * 2 * days} rows in {time.time() - start:.1f}s")
+
+        samples = random.sample(products, min(args.queries, len(products)))
+        legacy, keyed, fuzzy = [], [], []
+        for name in samples:
+            start = time.time()
+            conn = sqlite3.connect(db.db_name)
+            pd.read_sql_query("""
+                SELECT product_name, platform, price, date
+                FROM price_history
+                WHERE date >= datetime('now', '-{} days')
+                AND product_name LIKE ? AND platform = ?
+                ORDER BY date ASC
+            """.format(90), conn, params=[f"%{name}%", 'Amazon'])
+            conn.close()
+            legacy.append(time.time() - start)
+
+            start = time.time()
+            db.get_price_history(name, 'Amazon', days=90)
+            keyed.append(time.time() - start)
+
+            start = time.time()
+            db.get_price_history(name.split(' (')[0], 'Amazon', days=90, fuzzy=True)
+            fuzzy.append(time.time() - start)
+
+        summarize("LIKE '%name%' + date string", legacy)
+        summarize("product_key index range scan", keyed)
+        summarize("FTS5 fuzzy name -> key scan", fuzzy)
+
+
+# ---------------------------------------------------------------------------
+# Concurrent sessions: connect-per-call vs shared WAL readers + group-commit writer
+# ---------------------------------------------------------------------------
+class _LegacyStore:
+    """The original access pattern: a fresh sqlite3 connection, default journal, commit per call"""
+
+    def __init__(self, directory):
+        import sqlite3
+        self.sqlite3 = sqlite3
+        self.users = os.path.join(directory, 'userdb.db')
+        self.alerts = os.path.join(directory, 'price_alerts.db')
+        self.history = os.path.join(directory, 'price_history.db')
+        self._run(self.users, "CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT NOT NULL, email TEXT NOT NULL)")
+        self._run(self.alerts, """
+            CREATE TABLE price_alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT NOT NULL,
+            product_name TEXT NOT NULL, product_url TEXT NOT NULL, platform TEXT NOT NULL,
+            current_price REAL NOT NULL, target_price REAL, last_checked TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, is_active INTEGER DEFAULT 1)
+        """)
+        self._run(self.history, """
+            CREATE TABLE price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, product_name TEXT NOT NULL,
+            platform TEXT NOT NULL, price REAL NOT NULL, date TEXT NOT NULL, search_term TEXT,
+            product_url TEXT, UNIQUE(product_name, platform, date))
+        """)
+
+    def _run(self, db, sql, params=(), fetch=False):
+        conn = self.sqlite3.connect(db)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows if fetch else None
+        finally:
+            conn.close()
+
+    def add_user(self, username, email):
+        self._run(self.users, "INSERT OR IGNORE INTO users VALUES (?, ?, ?)", (username, 'hash', email))
+
+    def authenticate(self, username):
+        return self._run(self.users, "SELECT * FROM users WHERE username = ? AND password = ?",
+                         (username, 'hash'), fetch=True)
+
+    def add_alert(self, email, product, price):
+        self._run(self.alerts, """
+            INSERT INTO price_alerts (user_email, product_name, product_url, platform, current_price)
+            VALUES (?, ?, ?, ?, ?)
+        """, (email, product, 'https://example.com', 'Amazon', price))
+
+    def get_alerts(self, email):
+        return self._run(self.alerts, "SELECT * FROM price_alerts WHERE user_email = ? AND is_active = 1",
+                         (email,), fetch=True)
+
+    def add_price(self, product, price):
+        import datetime
+        self._run(self.history, "INSERT OR REPLACE INTO price_history (product_name, platform, price, date) "
+                                "VALUES (?, ?, ?, ?)",
+                  (product, 'Amazon', price, datetime.datetime.now().isoformat()))
+
+    def get_history(self, product):
+        return self._run(self.history, "SELECT * FROM price_history WHERE date >= datetime('now', '-90 days') "
+                                       "AND product_name LIKE ? AND platform = ? ORDER BY date ASC",
+                         (f"%{product}%", 'Amazon'), fetch=True)
+
+
+class _ManagedStore:
+    """The same operations through db_manager, PriceAlertSystem and PricePredictionDatabase"""
+
+    def __init__(self, directory):
+        from db_manager import DatabaseManager
+        from price_alert_system import PriceAlertSystem
+        from price_predictor import PricePredictionDatabase
+
+        self.users = DatabaseManager(os.path.join(directory, 'userdb.db'))
+        self.users.execute("CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT NOT NULL, email TEXT NOT NULL)")
+        self.alerts = PriceAlertSystem(os.path.join(directory, 'price_alerts.db'))
+        self.history = PricePredictionDatabase(os.path.join(directory, 'price_history.db'))
+
+    def add_user(self, username, email):
+        self.users.execute("INSERT OR IGNORE INTO users VALUES (?, ?, ?)", (username, 'hash', email))
+
+    def authenticate(self, username):
+        return self.users.query_one("SELECT * FROM users WHERE username = ? AND password = ?", (username, 'hash'))
+
+    def add_alert(self, email, product, price):
+        self.alerts.add_price_alert(email, product, 'https://example.com', 'Amazon', price)
+
+    def get_alerts(self, email):
+        return self.alerts.get_user_alerts(email)
+
+    def add_price(self, product, price):
+        self.history.add_price_history(product, 'Amazon', price)
+
+    def get_history(self, product):
+        return self.history.get_price_history(product, 'Amazon', days=90)
+
+
+def bench_dbload(args):
+    import logging
+    import random
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def session(store, session_id, timings, errors):
+        rng = random.Random(session_id)
+        username, email = f"user{session_id}", f"user{session_id}@example.com"
+        store.add_user(username, email)
+        for _ in range(args.ops):
+            op = rng.random()
+            product = f"Phone {rng.randrange(50)}"
+            start = time.time()
+            try:
+                if op < 0.4:
+                    store.authenticate(username)
+                elif op < 0.6:
+                    store.get_alerts(email)
+                elif op < 0.8:
+                    store.get_history(product)
+                elif op < 0.9:
+                    store.add_alert(email, product, rng.uniform(10000, 50000))
+                else:
+                    store.add_price(product, rng.uniform(10000, 50000))
+            except Exception as e:
+                errors.append(str(e))
+            timings.append(time.time() - start)
+            time.sleep(rng.uniform(0, args.think_time))
+
+    for label, store_class in (('connect per call', _LegacyStore), ('db_manager', _ManagedStore)):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = store_class(tmp)
+            timings, errors = [], []
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+                for session_id in range(args.sessions):
+                    executor.submit(session, store, session_id, timings, errors)
+            elapsed = time.time() - start
+            summarize(f"{label} ({args.sessions} sessions)", timings)
+            print(f"{'':<40} {len(timings) / elapsed:.0f} ops/s, {len(errors)} errors"
+                  + (f" (e.g. {errors[0]})" if errors else ""))
+            if isinstance(store, _ManagedStore):
+                print(f"{'':<40} history writer: {store.history.db.get_stats()}")
+                for manager in (store.users, store.alerts.db, store.history.db):
+                    manager.close()
+
+
+# ---------------------------------------------------------------------------
+# Price re-checks: throughput vs worker count and alert count
+# ---------------------------------------------------------------------------
+def bench_recheck(args):
+    import logging
+    import tempfile
+    from price_alert_system import PriceAlertSystem
+    from price_rechecker import PriceRechecker
+    from rate_limiter import get_rate_limiter
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def simulated_fetch(platform, url):
+        # Stand-in for fetch_product_price: one paced product page load
+        with get_rate_limiter().permit(url):
+            time.sleep(args.latency)
+        return 999.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for alert_count in args.alerts:
+            alert_system = PriceAlertSystem(os.path.join(tmp, f'alerts_{alert_count}.db'))
+            for i in range(alert_count):
+                url_id = i % args.urls
+                # One host per platform, as the limiter paces real rechecks
+                host = 'www.amazon.in' if url_id % 2 else 'www.flipkart.com'
+                alert_system.add_price_alert(f"user{i}@example.com", f"Product {url_id}",
+                                             f"https://{host}/p/{url_id}",
+                                             'Amazon' if url_id % 2 else 'Flipkart', 1000.0)
+            alerts = alert_system.get_active_alerts()
+
+            for workers in args.workers:
+                rechecker = PriceRechecker(concurrency={'Amazon': workers, 'Flipkart': workers},
+                                           fetch_price=simulated_fetch)
+                start = time.time()
+                _, prices = rechecker.run(alerts)
+                alert_system.record_prices(prices)
+                elapsed = time.time() - start
+                print(f"{alert_count:>6} alerts / {args.urls} URLs, {workers} workers per platform: "
+                      f"{elapsed:6.2f}s ({alert_count / elapsed:8.0f} alerts/s)")
+
+        # Two scheduled runs with the price unchanged below target: only the first may notify
+        import warnings
+        warnings.filterwarnings('ignore', category=DeprecationWarning)
+        port, received, stop = start_local_smtp()
+        smtp_config = {'smtp_server': '127.0.0.1', 'smtp_port': port, 'from_email': 'alerts@example.com',
+                       'password': None, 'use_tls': False}
+        try:
+            alert_system = PriceAlertSystem(os.path.join(tmp, 'repeat.db'))
+            alert_system.add_price_alert("user@example.com", "Product", "https://example.com/p/1", 'Amazon',
+                                         1000.0, target_price=950.0)
+            rechecker = PriceRechecker(fetch_price=lambda platform, url: 900.0)
+            runs = [alert_system.check_price_drops(smtp_config, rechecker=rechecker)['emails_sent']
+                    for _ in range(2)]
+            time.sleep(0.2)
+        finally:
+            stop()
+        print(f"repeat check, unchanged price under target: emails per run {runs}, {len(received)} received")
+        assert runs == [1, 0] and len(received) == 1, "an unchanged price must notify only once"
+
+
+# ---------------------------------------------------------------------------
+# Price-drop email delivery against a local SMTP stand-in
+# ---------------------------------------------------------------------------
+def start_local_smtp():
+    """Start a local SMTP sink; returns (port, received_messages, stop)"""
+    received = []
+    try:
+        from aiosmtpd.controller import Controller
+
+        class Sink:
+            async def handle_DATA(self, server, session, envelope):
+                received.append(envelope.content)
+                return '250 OK'
+
+        controller = Controller(Sink(), hostname='127.0.0.1', port=0)
+        controller.start()
+        return controller.server.sockets[0].getsockname()[1], received, controller.stop
+    except ImportError:
+        # Python < 3.12 still ships the deprecated smtpd/asyncore pair
+        import asyncore
+        import smtpd
+
+        class Sink(smtpd.SMTPServer):
+            def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+                received.append(data)
+
+        server = Sink(('127.0.0.1', 0), None)
+        thread = threading.Thread(target=asyncore.loop, kwargs={'timeout': 0.05}, daemon=True)
+        thread.start()
+
+        def stop():
+            server.close()
+            thread.join(timeout=1)
+        return server.socket.getsockname()[1], received, stop
+
+
+def bench_smtp(args):
+    import logging
+    import random
+    import tempfile
+    import warnings
+    import smtplib
+    from notification_sender import NotificationSender, open_smtp
+    from price_alert_system import PriceAlertSystem
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings('ignore', category=DeprecationWarning)
+    port, received, stop = start_local_smtp()
+    smtp_config = {'smtp_server': '127.0.0.1', 'smtp_port': port, 'from_email': 'alerts@example.com',
+                   'password': None, 'use_tls': False}
+
+    rng = random.Random(7)
+    drops = [{'user_email': f"user{rng.randrange(args.users)}@example.com", 'product_name': f"Phone {i}",
+              'platform': rng.choice(['Amazon', 'Flipkart']), 'old_price': 20000.0, 'new_price': 18000.0,
+              'product_url': f"https://example.com/p/{i}"} for i in range(args.drops)]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            alert_system = PriceAlertSystem(os.path.join(tmp, 'alerts.db'))
+
+            # Before: one SMTP connection per drop
+            received.clear()
+            start = time.time()
+            for drop in drops:
+                alert_system.send_email_alert(drop['user_email'], drop['product_name'], drop['platform'],
+                                              drop['old_price'], drop['new_price'], drop['product_url'], smtp_config)
+            elapsed = time.time() - start
+            time.sleep(0.2)
+            print(f"{'connection per email':<28} {len(drops)} drops -> {len(received)} emails in {elapsed:6.2f}s "
+                  f"({len(drops) / elapsed:7.0f} drops/s, {len(received) / elapsed:7.0f} messages/s)")
+
+            # After: outbox + per-user digests over one session
+            received.clear()
+            sender = NotificationSender(alert_system.db, smtp_config)
+            start = time.time()
+            sender.enqueue(drops)
+            sent = sender.send_pending(limit=len(drops))
+            elapsed = time.time() - start
+            time.sleep(0.2)
+            print(f"{'outbox + digests':<28} {len(drops)} drops -> {len(received)} emails in {elapsed:6.2f}s "
+                  f"({len(drops) / elapsed:7.0f} drops/s, {sent / elapsed:7.0f} messages/s), "
+                  f"{sender.stats['connections']} SMTP session(s)")
+
+            # Failures: a refused login aborts the batch, and a session that breaks on QUIT still
+            # records what was delivered
+            def refused(config):
+                refused.calls += 1
+                raise smtplib.SMTPAuthenticationError(535, b"Authentication failed")
+            refused.calls = 0
+            sender = NotificationSender(alert_system.db, smtp_config, connect=refused)
+            sender.enqueue(drops)
+            sender.send_pending(limit=len(drops))
+            backed_off = alert_system.db.query_one(
+                "SELECT COUNT(*) FROM notification_outbox WHERE status = 'pending' AND attempts = 1")[0]
+            print(f"{'refused login':<28} {refused.calls} connect attempt(s), {backed_off} drops backed off")
+            assert refused.calls == 1 and backed_off == len(drops)
+
+            def breaks_on_quit(config):
+                server = open_smtp(config)
+                server.quit = lambda: (_ for _ in ()).throw(ConnectionResetError("connection reset on QUIT"))
+                return server
+            alert_system.db.execute("DELETE FROM notification_outbox")
+            sender = NotificationSender(alert_system.db, smtp_config, connect=breaks_on_quit)
+            sender.enqueue(drops)
+            sent = sender.send_pending(limit=len(drops))
+            still_pending = alert_system.db.query_one(
+                "SELECT COUNT(*) FROM notification_outbox WHERE status = 'pending'")[0]
+            print(f"{'reset on QUIT':<28} {sent} emails sent, {still_pending} drops left pending")
+            assert sent and still_pending == 0
+    finally:
+        stop()
+
+
+# ---------------------------------------------------------------------------
+# Search page fetching: browser for every page vs HTTP fast path with fallback
+# ---------------------------------------------------------------------------
+def _search_fixture(cards):
+    """A static Flipkart-style search page with `cards` product cards"""
+    items = "".join(
+        f'<div class="cPHDOP"><a class="wjcEIp" href="/phone-{i}/p/itm{i}">Test Phone {i} (128 GB)</a>'
+        f'<div class="Nx9bqj">₹{10000 + i * 250:,}</div></div>'
+        for i in range(cards)
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+def bench_fetch(args):
+    import logging
+    import tempfile
+    from flipkart_parser import parse_search_results
+    from http_fetcher import TieredFetcher
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def simulated_render(url):
+        time.sleep(args.render_latency)  # Stand-in for a pooled browser load + readiness wait
+        return _search_fixture(10)
+
+    def accept(html):
+        return parse_search_results(html, max_products=10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Static results page, and a captcha page every Nth request that forces the browser tier
+        Path(tmp, 'results.html').write_text(_search_fixture(10), encoding='utf-8')
+        Path(tmp, 'blocked.html').write_text("<html><body>Enter the captcha below</body></html>", encoding='utf-8')
+        server, base_url = serve_directory(tmp)
+        urls = [f"{base_url}/results.html" if i % args.fallback_every else f"{base_url}/blocked.html"
+                for i in range(1, args.pages + 1)]
+        try:
+            browser_only = []
+            for url in urls:
+                start = time.time()
+                accept(simulated_render(url))
+                browser_only.append(time.time() - start)
+
+            fetcher = TieredFetcher()
+            tiered = []
+            for url in urls:
+                start = time.time()
+                fetcher.fetch(url, simulated_render, accept)
+                tiered.append(time.time() - start)
+        finally:
+            server.shutdown()
+
+    summarize("browser for every page", browser_only)
+    summarize("HTTP first, browser fallback", tiered)
+    print(f"total: {sum(browser_only):.2f}s -> {sum(tiered):.2f}s")
+    for tier, stats in fetcher.get_stats().items():
+        print(f"  {tier:<10} attempts={stats['attempts']:<4} success_rate={stats['success_rate']*100:5.1f}% "
+              f"blocked={stats['blocked']:<3} p50={stats['p50']*1000:8.1f}ms  p95={stats['p95']*1000:8.1f}ms")
+
+# ---------------------------------------------------------------------------
+# Product detail pages: sequential requests.get vs pooled concurrent fetch
+# ---------------------------------------------------------------------------
+def bench_detail(args):
+    import logging
+    import requests
+    from http_fetcher import TieredFetcher
+
+    logging.getLogger().setLevel(logging.WARNING)
+    body = _search_fixture(1).encode('utf-8')
+
+    class SlowHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled connections get reused
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(args.latency)  # Stand-in for the remote server's response time
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_address[1]}/p/itm{i}" for i in range(args.pages)]
+    try:
+        start = time.time()
+        for url in urls:
+            requests.get(url, timeout=10).text
+        sequential = time.time() - start
+        print(f"{'sequential requests.get':<32} {args.pages} pages in {sequential:6.2f}s")
+
+        for per_host in args.per_host:
+            fetcher = TieredFetcher()
+            start = time.time()
+            pages = fetcher.fetch_many(urls, per_host=per_host)
+            elapsed = time.time() - start
+            print(f"{f'fetch_many, {per_host} per host':<32} {args.pages} pages in {elapsed:6.2f}s "
+                  f"({sum(page is not None for page in pages)} ok, {sequential / elapsed:4.1f}x)")
+    finally:
+        server.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Flipkart review pages: one page at a time vs direct URLs in parallel
+# ---------------------------------------------------------------------------
+class _FakeReviewBrowser:
+    """Just enough of a WebDriver for the review extraction code, with a simulated page load"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.current_url = 'about:blank'
+        self.window_handles = ['main']
+
+    def get(self, url):
+        if url != 'about:blank':
+            time.sleep(self.latency)
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        return ['complete', 10]  # readyState and matching element count for the readiness polls
+
+    def find_elements(self, by, selector):
+        from types import SimpleNamespace
+        page = self.current_url.rsplit('page=', 1)[-1]
+        return [SimpleNamespace(text=f"Page {page} review {i}: great battery, worth the price")
+                for i in range(10)]
+
+    def quit(self):
+        pass
+
+
+def bench_reviews(args):
+    import logging
+    from driver_pool import ChromeDriverPool
+    from flipAPI import FlipkartReviewScraper
+
+    logging.getLogger().setLevel(logging.WARNING)
+    urls = FlipkartReviewScraper.review_page_urls("https://www.flipkart.com/phone/p/itm0001?pid=MOB1", args.pages)
+
+    elapsed_by_pool = {}
+    for workers in args.workers:
+        scraper = object.__new__(FlipkartReviewScraper)
+        # A pool of `workers` browsers, one of them the scraper's own (checked out on first use)
+        scraper.pool = ChromeDriverPool('unused', size=workers,
+                                        factory=lambda: _FakeReviewBrowser(args.latency))
+        scraper._driver = None
+        scraper.pages_loaded = 0
+        # Browsers are warm in practice; start them before timing
+        warm = [scraper.pool.checkout() for _ in range(workers)]
+        for browser in warm:
+            scraper.pool.release(browser)
+
+        start = time.time()
+        titles, reviews = scraper.scrape_review_pages(urls)
+        elapsed = time.time() - start
+        in_order = reviews == sorted(reviews, key=lambda text: int(text.split()[1].rstrip(':')))
+        print(f"{args.pages} pages, pool of {workers}: {elapsed:6.2f}s "
+              f"({len(reviews)} reviews, page order kept: {in_order})")
+        assert len(reviews) == args.pages * 10, "every review page should load without waiting on a checkout"
+        elapsed_by_pool[workers] = elapsed
+        scraper.release_driver()
+        scraper.pool.close()
+
+    # More browsers must never be slower (10% slack for timer noise), and must beat one browser outright
+    sizes = sorted(elapsed_by_pool)
+    for smaller, larger in zip(sizes, sizes[1:]):
+        assert elapsed_by_pool[larger] <= elapsed_by_pool[smaller] * 1.1, \
+            f"pool of {larger} ({elapsed_by_pool[larger]:.2f}s) slower than pool of {smaller}"
+    if len(sizes) > 1:
+        speedup = elapsed_by_pool[sizes[0]] / elapsed_by_pool[sizes[-1]]
+        print(f"speedup, pool of {sizes[-1]} over pool of {sizes[0]}: {speedup:.1f}x")
+        assert speedup >= min(sizes[-1] / sizes[0], args.pages) / 2, "parallel review pages should scale with the pool"
+
+
+# ---------------------------------------------------------------------------
+# Resource policy: bytes and load time with images/fonts/trackers on and off
+# ---------------------------------------------------------------------------
+def bench_resources(args):
+    from driver_pool import create_chrome_driver, page_weight
+
+    pages = [
+        ('Amazon', f"https://www.amazon.in/s?k={args.query.replace(' ', '+')}"),
+        ('Flipkart', f"https://www.flipkart.com/search?q={args.query.replace(' ', '+')}"),
+    ]
+    for block in (False, True):
+        driver = create_chrome_driver(args.driver_path, headless=True, block_resources=block)
+        try:
+            for platform, url in pages:
+                sizes, loads, waits = [], [], []
+                for _ in range(args.runs):
+                    driver.get('about:blank')
+                    start = time.time()
+                    driver.get(url)
+                    waits.append(time.time() - start)
+                    transferred, load_ms = page_weight(driver)
+                    sizes.append(transferred)
+                    loads.append(load_ms / 1000)
+                label = f"{platform} policy {'on' if block else 'off'}"
+                print(f"{label:<22} {statistics.median(sizes) / 1024:9.0f} KiB transferred")
+                summarize(f"{label} driver.get()", waits)
+                summarize(f"{label} page load (timing API)", loads)
+        finally:
+            driver.quit()
+
+
+# ---------------------------------------------------------------------------
+# Relevance ranking: per-card SequenceMatcher + keyword scans vs the batch ranker
+# ---------------------------------------------------------------------------
+def _legacy_rank(products, search_term, max_results):
+    """The original amaz.filter_and_rank_products scoring (SequenceMatcher, per-call keyword scans)"""
+    import re
+    from difflib import SequenceMatcher
+    from ranking import ACCESSORY_KEYWORDS, ACCESSORY_PATTERNS, BUNDLE_INDICATORS
+
+    def relevance(title):
+        title_lower, search_lower = title.lower(), search_term.lower()
+        similarity = SequenceMatcher(None, title_lower, search_lower).ratio()
+        search_words, title_words = search_lower.split(), title_lower.split()
+        word_matches = 0
+        for search_word in search_words:
+            if len(search_word) > 2:
+                for title_word in title_words:
+                    if search_word in title_word or title_word in search_word:
+                        word_matches += 1
+                        break
+        word_match_score = word_matches / len(search_words) if search_words else 0
+        return word_match_score * 0.6 + similarity * 0.4
+
+    def accessory(title):
+        title_lower = title.lower()
+        return (any(keyword in title_lower for keyword in ACCESSORY_KEYWORDS) or
+                any(re.search(pattern, title_lower) for pattern in ACCESSORY_PATTERNS))
+
+    scored = []
+    for product in products:
+        title = product[0]
+        if not title or len(title.strip()) < 5:
+            continue
+        penalty = (0.3 if accessory(title) else 0) + (0.1 if any(i in title.lower() for i in BUNDLE_INDICATORS) else 0)
+        score = max(0, relevance(title) - penalty)
+        if score > 0.2:
+            scored.append((*product, score))
+    scored.sort(key=lambda x: x[-1], reverse=True)
+    return [product[:-1] for product in scored][:max_results]
+
+
+def _title_corpus(count, seed=11):
+    import random
+
+    rng = random.Random(seed)
+    brands = ['Apple', 'Samsung', 'Xiaomi', 'OnePlus', 'Realme', 'Vivo', 'Oppo', 'Motorola', 'Nothing', 'iQOO']
+    models = ['iPhone 15', 'iPhone 15 Pro', 'Galaxy S24', 'Galaxy M34', 'Redmi Note 13', 'Nord CE 3', 'Narzo 60',
+              'V29', 'Reno 11', 'Edge 40', 'Phone 2', 'Z7']
+    variants = ['(128 GB)', '(256 GB, Black)', '5G (8GB RAM)', 'Dual SIM', '(Blue, 128 GB Storage)']
+    extras = ['Back Case Cover for', 'Tempered Glass Screen Protector for', 'Fast Charger Compatible with',
+              'Combo Pack of 2 Cables for', 'Silicone Skin for', '', '', '', '']
+    titles = []
+    for _ in range(count):
+        extra = rng.choice(extras)
+        titles.append(" ".join(part for part in (extra, rng.choice(brands), rng.choice(models),
+                                                 rng.choice(variants)) if part))
+    return titles
+
+
+def bench_ranking(args):
+    from ranking import rank_products
+
+    titles = _title_corpus(args.titles)
+    products = [(title, 1000.0 + i, f"https://example.com/p/{i}") for i, title in enumerate(titles)]
+
+    for query in args.queries:
+        legacy_times, batch_times = [], []
+        for _ in range(args.runs):
+            start = time.time()
+            legacy = _legacy_rank(products, query, args.top)
+            legacy_times.append(time.time() - start)
+
+            start = time.time()
+            ranked = rank_products(products, query, args.top)
+            batch_times.append(time.time() - start)
+
+        # Synthetic titles repeat, so compare the distinct titles each ranking puts on top
+        overlap = len({p[0] for p in legacy} & {p[0] for p in ranked})
+        distinct = len({p[0] for p in legacy})
+        accessories_legacy = sum(1 for p in legacy if ' for ' in p[0] or 'Pack' in p[0])
+        accessories_ranked = sum(1 for p in ranked if ' for ' in p[0] or 'Pack' in p[0])
+        print(f"query {query!r}: top-{args.top} distinct-title overlap {overlap}/{distinct}, "
+              f"accessories in top {accessories_legacy} -> {accessories_ranked}")
+        summarize(f"  legacy ({len(titles)} titles)", legacy_times)
+        summarize(f"  ranking.rank_products ({len(titles)} titles)", batch_times)
+
+
+# ---------------------------------------------------------------------------
+# Cross-platform product matching: LSH index vs all-pairs comparison
+# ---------------------------------------------------------------------------
+def _listing_catalog(skus, seed=5):
+    """One Flipkart and one Amazon listing per synthetic SKU, titled the way each site formats them"""
+    import random
+
+    rng = random.Random(seed)
+    brands = {'Samsung': ['Galaxy S', 'Galaxy M', 'Galaxy A'], 'Xiaomi': ['Redmi Note', 'Redmi'],
+              'OnePlus': ['Nord CE', 'Nord'], 'Realme': ['Narzo', 'GT'], 'Vivo': ['V', 'Y', 'T'],
+              'Motorola': ['Edge', 'G'], 'Oppo': ['Reno', 'F', 'A'], 'Apple': ['iPhone']}
+    variants = ['', ' Pro', ' Plus', ' Ultra', ' Lite', ' Neo']
+    colours = ['Black', 'Blue', 'Green', 'Silver', 'Midnight', 'Gold']
+    flipkart, amazon, seen = [], [], set()
+    while len(seen) < skus:
+        brand = rng.choice(list(brands))
+        model = f"{rng.choice(brands[brand])} {rng.randint(1, 400)}{rng.choice(variants)}"
+        storage = rng.choice([64, 128, 256, 512])
+        ram = rng.choice([4, 6, 8, 12])
+        if (brand, model, storage, ram) in seen:
+            continue
+        sku = len(seen)
+        seen.add((brand, model, storage, ram))
+        colour = rng.choice(colours)
+        flipkart.append({'platform': 'Flipkart', 'sku': sku, 'url': f"https://www.flipkart.com/x/p/itm{sku}",
+                         'title': f"{brand.upper()} {model} 5G ({colour}, {storage} GB)  ({ram} GB RAM)"})
+        amazon.append({'platform': 'Amazon', 'sku': sku, 'url': f"https://www.amazon.in/dp/B{sku:09d}",
+                       'title': f"{brand} {model} 5G Smartphone ({rng.choice(colours)}, {ram}GB RAM, {storage}GB Storage)"})
+    return flipkart, amazon
+
+
+def bench_matching(args):
+    import logging
+    import tempfile
+    from product_matching import ProductMatcher, extract_attributes, compatible, listing_id
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # All-pairs baseline on a sample: attribute extraction + comparison of every cross-platform pair
+    flipkart, amazon = _listing_catalog(args.brute_force)
+    start = time.time()
+    attrs_f = [extract_attributes(item['title']) for item in flipkart]
+    attrs_a = [extract_attributes(item['title']) for item in amazon]
+    brute_matches = 0
+    for a in attrs_f:
+        tokens_a = set(a['model'].split())
+        for b in attrs_a:
+            if a['brand'] == b['brand'] and a['storage_gb'] == b['storage_gb'] and compatible(a, b):
+                tokens_b = set(b['model'].split())
+                if len(tokens_a & tokens_b) / len(tokens_a | tokens_b) >= 0.5:
+                    brute_matches += 1
+    elapsed = time.time() - start
+    print(f"all pairs, {args.brute_force} listings per platform: {elapsed:7.2f}s "
+          f"({args.brute_force ** 2:,} comparisons, {brute_matches} matches)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.listings:
+            flipkart, amazon = _listing_catalog(size)
+            matcher = ProductMatcher(os.path.join(tmp, f'matches_{size}.db'))
+            start = time.time()
+            for batch_start in range(0, size, args.batch):
+                matcher.add_listings(flipkart[batch_start:batch_start + args.batch])
+                matcher.add_listings(amazon[batch_start:batch_start + args.batch])
+            index_time = time.time() - start
+
+            ids_f = [listing_id('Flipkart', item['url']) for item in flipkart]
+            expected = {listing_id('Amazon', item['url']) for item in amazon}
+            sku_of = {listing_id('Amazon', item['url']): item['sku'] for item in amazon}
+            start = time.time()
+            found = matcher.get_matches(ids_f)
+            lookup_time = time.time() - start
+
+            true_pairs = sum(1 for item, lid in zip(flipkart, ids_f)
+                             for other, _ in found[lid] if sku_of.get(other) == item['sku'])
+            total_pairs = sum(len(matches) for matches in found.values())
+            recall = true_pairs / size
+            precision = true_pairs / total_pairs if total_pairs else 0.0
+            print(f"LSH index, {size:>7,} listings per platform: index {index_time:7.2f}s "
+                  f"({2 * size / index_time:8.0f} listings/s), lookup of all {size:,} in {lookup_time * 1000:7.1f}ms, "
+                  f"recall {recall:.3f}, precision {precision:.3f} ({len(expected):,} SKUs)")
+            matcher.db.close()
+
+        # An unavailable Flipkart listing matches too, but must never be the pair picked for the price comparison
+        matcher = ProductMatcher(os.path.join(tmp, 'best_pair.db'))
+        amazon = [["Apple iPhone 15 (128 GB) - Black", 64999.0, "https://www.amazon.in/dp/B0CHX1W1XY"]]
+        flipkart = [
+            {'title': "Apple iPhone 15 (Black, 128 GB)", 'price': float('inf'), 'price_text': "Price Not Available",
+             'link': "https://www.flipkart.com/apple-iphone-15-black-128-gb/p/itm6ac6485515ae4?pid=MOBGTAGPTB3VS24W"},
+            {'title': "Apple iPhone 15 (Black, 128 GB)", 'price': 61999.0, 'price_text': "₹61,999",
+             'link': "https://www.flipkart.com/apple-iphone-15-black-128-gb/p/itm6ac6485515ae5?pid=MOBGTAGPTB3VS25W"},
+        ]
+        pair = matcher.best_pair(flipkart, amazon)
+        print(f"best_pair with an unpriced listing: picked {pair[0]['price_text'] if pair else None}")
+        assert pair and pair[0]['price'] == 61999.0
+        assert matcher.best_pair(flipkart[:1], amazon) is None
+        matcher.db.close()
+
+
+# ---------------------------------------------------------------------------
+# Listing dedup: O(n^2) link scans vs canonical product IDs
+# ---------------------------------------------------------------------------
+def bench_catalog(args):
+    from catalog import canonical_id
+
+    size = max(args.dedup)
+    urls = [f"https://www.amazon.in/Phone-Model-{i}/dp/B{i:09d}/ref=sr_1_{i % 40}" for i in range(size)]
+    titles = [f"Phone Model {i} 5G (Black, 128GB Storage)" for i in range(size)]
+
+    for count in args.dedup:
+        # Every product appears twice, as the sponsored and the organic card often do
+        products = [[titles[i], 999.0, urls[i]] for i in range(count // 2)] * 2
+
+        start = time.time()
+        unique = []
+        for product in products:
+            if not any(existing[2] == product[2] for existing in unique):
+                unique.append(product)
+        scan = time.time() - start
+
+        start = time.time()
+        seen, hashed = set(), []
+        for product in products:
+            product_id = canonical_id('Amazon', product[2])
+            if product_id not in seen:
+                seen.add(product_id)
+                hashed.append(product)
+        hashed_time = time.time() - start
+        print(f"dedup {count:>6} cards: link scan {scan * 1000:9.1f}ms, canonical-id set {hashed_time * 1000:7.1f}ms "
+              f"({len(unique)} / {len(hashed)} unique)")
+
+
+# ---------------------------------------------------------------------------
+# Stage tracing: cost of one span
+# ---------------------------------------------------------------------------
+def bench_tracing(args):
+    from tracing import Tracer
+
+    tracer = Tracer()
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for _ in range(args.spans):
+            with tracer.span("parse", "amazon"):
+                pass
+        timings.append(time.perf_counter() - start)
+    summarize(f"{args.spans} empty spans", timings)
+    print(f"~{min(timings) / args.spans * 1e6:.2f}us per span")
+    start = time.perf_counter()
+    text = tracer.prometheus_text()
+    print(f"prometheus_text: {(time.perf_counter() - start) * 1000:.2f}ms, {len(text.splitlines())} lines")
+
+
+# ---------------------------------------------------------------------------
+# Robot-check pages: waiting out timeouts and retries vs classifying the first snapshot
+# ---------------------------------------------------------------------------
+class _BlockedBrowser:
+    """Stands in for a browser that was served Amazon's captcha page"""
+
+    page_source = ("<html><head><title>Amazon.in</title></head><body><form action='/errors/validateCaptcha'>"
+                   "<h4>Type the characters you see in this image:</h4><input id='captchacharacters'></form>"
+                   "</body></html>")
+
+    def execute_script(self, script, *args):
+        return ['complete', 0]
+
+
+def bench_blocking(args):
+    from page_readiness import wait_for_stable_count, AMAZON_RESULT_SELECTOR
+    from page_classifier import classify_page, check_page, CircuitBreaker, PageBlockedError
+    import page_classifier
+
+    browser = _BlockedBrowser()
+    url = "https://www.amazon.in/s?k=iphone+15"
+    scale = args.scale
+
+    def legacy_search():
+        # 10s readiness timeout, then a 5-10s sleep before each of the three attempts' retries
+        for attempt in range(3):
+            wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=10 * scale)
+            if attempt < 2:
+                time.sleep(7.5 * scale)
+
+    breaker = page_classifier._breaker = CircuitBreaker()
+
+    def classified_search():
+        try:
+            breaker.before_request(url)
+            check_page(url, classify_page(browser.page_source, 'amazon'), partial=True)
+        except PageBlockedError:
+            return
+
+    # Only the legacy flow sleeps, so only its timings are scaled back up to real seconds
+    for label, search, factor in (("timeouts + retries", legacy_search, scale),
+                                  ("classifier + breaker", classified_search, 1)):
+        timings = []
+        for _ in range(args.searches):
+            start = time.perf_counter()
+            search()
+            timings.append((time.perf_counter() - start) / factor)
+        summarize(f"{label} (unscaled)", timings)
+        print(f"  {args.searches} searches during a block: {sum(timings):.1f}s of dead time")
+    print(f"breaker: {breaker.get_stats()}")
+
+    # A blocked load reaches the rate limiter once, through its permit; check_page only opens the circuit
+    import rate_limiter
+    limiter = rate_limiter._limiter = rate_limiter.AdaptiveRateLimiter()
+    with limiter.permit(url) as load:
+        page = classify_page(browser.page_source, 'amazon')
+        load['blocked'] = page.blocked
+    try:
+        check_page(url, page, partial=True)
+    except PageBlockedError:
+        pass
+    rate = limiter.get_stats()['www.amazon.in']['rate']
+    print(f"rate after one blocked load: {rate:.2f} loads/s (from {rate_limiter.DEFAULT_RATE:.2f})")
+    assert rate == rate_limiter.DEFAULT_RATE * rate_limiter.BLOCK_BACKOFF
+
+
+# ---------------------------------------------------------------------------
+# Request pacing: fixed random sleeps vs the adaptive per-host limiter
+# ---------------------------------------------------------------------------
+class _ThrottlingHost:
+    """A site that serves `capacity` loads/s (with a small burst) and answers 429 beyond that"""
+
+    def __init__(self, capacity, burst, latency, scale):
+        self.capacity = capacity / scale
+        self.burst = burst
+        self.latency = latency * scale
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.blocked = 0
+
+    def load(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.capacity)
+            self.updated = now
+            ok = self.tokens >= 1
+            if ok:
+                self.tokens -= 1
+            else:
+                self.blocked += 1
+        time.sleep(self.latency)
+        return ok
+
+
+def bench_pacing(args):
+    import random
+    from rate_limiter import AdaptiveRateLimiter, DEFAULT_RATE, MIN_RATE, MAX_RATE, ADDITIVE_STEP, SLOW_LATENCY
+
+    scale = args.scale
+    url = "https://www.amazon.in/s?k=phone"
+
+    def run(label, worker, workers):
+        host = _ThrottlingHost(args.capacity, 3, args.latency, scale)
+        done = []
+        lock = threading.Lock()
+
+        def loop():
+            while True:
+                with lock:
+                    if len(done) >= args.loads:
+                        return
+                    done.append(None)
+                worker(host)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=loop) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = (time.perf_counter() - start) / scale
+        good = args.loads - host.blocked
+        print(f"{label:<34} {elapsed:7.1f}s for {args.loads} loads, {host.blocked:3d} blocked, "
+              f"{good / elapsed * 60:5.1f} good pages/min")
+
+    def legacy(host):
+        # The old pattern: load, then sleep 3-7s before the next page
+        host.load()
+        time.sleep(random.uniform(3, 7) * scale)
+
+    run("random.uniform(3, 7) sleeps", legacy, 1)
+
+    limiter = AdaptiveRateLimiter(rate=DEFAULT_RATE / scale, min_rate=MIN_RATE / scale, max_rate=MAX_RATE / scale,
+                                  step=ADDITIVE_STEP / scale ** 2, slow_latency=SLOW_LATENCY * scale)
+
+    def adaptive(host):
+        issued = limiter.acquire(url)
+        start = time.time()
+        ok = host.load()
+        limiter.record(url, time.time() - start, blocked=not ok, issued=issued)
+
+    run(f"AIMD limiter, {args.workers} browsers", adaptive, args.workers)
+    print(f"final rate: {limiter.get_stats()['www.amazon.in']['rate'] * scale:.2f} loads/s "
+          f"(site capacity {args.capacity} loads/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CompareIT performance benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    readiness = subparsers.add_parser('readiness', help="Fixed sleeps vs readiness waits on local HTML fixtures")
+    readiness.add_argument('--driver-path', default=os.environ.get('CHROMEDRIVER', 'chromedriver.exe'))
+    readiness.add_argument('--runs', type=int, default=5)
+    readiness.add_argument('--legacy-sleep', type=float, default=10.0, help="Fixed sleep the Flipkart search used")
+    readiness.add_argument('--delay', type=float, default=1.5, help="Seconds before the first card is inserted")
+    readiness.add_argument('--interval', type=float, default=0.15, help="Seconds between inserted cards")
+    readiness.set_defaults(func=bench_readiness)
+
+    parse = subparsers.add_parser('parse', help="Flipkart parser check and timing on the saved results page")
+    parse.add_argument('--runs', type=int, default=50)
+    parse.set_defaults(func=bench_parse)
+
+    sentiment = subparsers.add_parser('sentiment', help="TextBlob parity and throughput of the lexicon backend")
+    sentiment.add_argument('--texts', type=int, default=20000)
+    sentiment.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    sentiment.set_defaults(func=bench_sentiment)
+
+    forecast = subparsers.add_parser('forecast', help="Per-day predict loop vs vectorized forecasting")
+    forecast.add_argument('--horizons', type=int, nargs='+', default=[30, 90, 365])
+    forecast.add_argument('--runs', type=int, default=5)
+    forecast.set_defaults(func=bench_forecast)
+
+    seed = subparsers.add_parser('seed', help="Per-row commits vs one-transaction price history seeding")
+    seed.add_argument('--days', type=int, default=90)
+    seed.add_argument('--runs', type=int, default=5)
+    seed.set_defaults(func=bench_seed)
+
+    history = subparsers.add_parser('history', help="LIKE scans vs indexed product keys on a large price_history")
+    history.add_argument('--rows', type=int, default=1_000_000)
+    history.add_argument('--products', type=int, default=2000)
+    history.add_argument('--queries', type=int, default=50)
+    history.set_defaults(func=bench_history)
+
+    dbload = subparsers.add_parser('dbload', help="Concurrent session load on the three SQLite databases")
+    dbload.add_argument('--sessions', type=int, default=50)
+    dbload.add_argument('--ops', type=int, default=200)
+    dbload.add_argument('--think-time', type=float, default=0.005,
+                        help="Max random pause between a session's operations, in seconds")
+    dbload.set_defaults(func=bench_dbload)
+
+    recheck = subparsers.add_parser('recheck', help="Alert re-check throughput with simulated page loads")
+    recheck.add_argument('--alerts', type=int, nargs='+', default=[100, 1000, 10000])
+    recheck.add_argument('--urls', type=int, default=40)
+    recheck.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    recheck.add_argument('--latency', type=float, default=0.05, help="Simulated seconds per page load")
+    recheck.set_defaults(func=bench_recheck)
+
+    smtp = subparsers.add_parser('smtp', help="Per-email SMTP sessions vs outbox digests on a local SMTP sink")
+    smtp.add_argument('--drops', type=int, default=500)
+    smtp.add_argument('--users', type=int, default=100)
+    smtp.set_defaults(func=bench_smtp)
+
+    fetch = subparsers.add_parser('fetch', help="Browser-only vs HTTP-first search page fetching on a local server")
+    fetch.add_argument('--pages', type=int, default=40)
+    fetch.add_argument('--fallback-every', type=int, default=5,
+                       help="Every Nth page is a captcha page that must fall back to the browser")
+    fetch.add_argument('--render-latency', type=float, default=1.5, help="Simulated seconds per browser load")
+    fetch.set_defaults(func=bench_fetch)
+
+    detail = subparsers.add_parser('detail', help="Sequential vs pooled concurrent product page downloads")
+    detail.add_argument('--pages', type=int, default=20)
+    detail.add_argument('--per-host', type=int, nargs='+', default=[1, 4, 8])
+    detail.add_argument('--latency', type=float, default=0.2, help="Simulated server response time in seconds")
+    detail.set_defaults(func=bench_detail)
+
+    reviews = subparsers.add_parser('reviews', help="Sequential vs parallel direct-URL review pagination")
+    reviews.add_argument('--pages', type=int, default=10)
+    reviews.add_argument('--workers', type=int, nargs='+', default=[1, 5, 10], help="Pool sizes to try")
+    reviews.add_argument('--latency', type=float, default=1.0, help="Simulated seconds per review page load")
+    reviews.set_defaults(func=bench_reviews)
+
+    resources = subparsers.add_parser('resources', help="Bytes and load time per platform with the resource policy on/off")
+    resources.add_argument('--driver-path', default=os.environ.get('CHROMEDRIVER', 'chromedriver.exe'))
+    resources.add_argument('--query', default='iphone 15')
+    resources.add_argument('--runs', type=int, default=3)
+    resources.set_defaults(func=bench_resources)
+
+    ranking = subparsers.add_parser('ranking', help="Per-card relevance scoring vs the batch ranker on synthetic titles")
+    ranking.add_argument('--titles', type=int, default=10000)
+    ranking.add_argument('--queries', nargs='+', default=['iphone 15', 'samsung galaxy s24 5g', 'redmi note 13'])
+    ranking.add_argument('--top', type=int, default=20)
+    ranking.add_argument('--runs', type=int, default=3)
+    ranking.set_defaults(func=bench_ranking)
+
+    matching = subparsers.add_parser('matching', help="All-pairs vs LSH-indexed cross-platform listing matching")
+    matching.add_argument('--listings', type=int, nargs='+', default=[1000, 10000, 100000])
+    matching.add_argument('--brute-force', type=int, default=2000,
+                          help="Listings per platform for the all-pairs baseline")
+    matching.add_argument('--batch', type=int, default=1000, help="Listings indexed per add_listings call")
+    matching.set_defaults(func=bench_matching)
+
+    catalog = subparsers.add_parser('catalog', help="Listing dedup: link scans vs canonical product IDs")
+    catalog.add_argument('--dedup', type=int, nargs='+', default=[30, 1000, 10000])
+    catalog.set_defaults(func=bench_catalog)
+
+    tracing = subparsers.add_parser('tracing', help="Overhead of a tracing span")
+    tracing.add_argument('--spans', type=int, default=100000)
+    tracing.add_argument('--repeat', type=int, default=5)
+    tracing.set_defaults(func=bench_tracing)
+
+    blocking = subparsers.add_parser('blocking', help="Dead time per search while a site serves robot checks")
+    blocking.add_argument('--searches', type=int, default=5)
+    blocking.add_argument('--scale', type=float, default=0.02, help="Fraction of real time to sleep")
+    blocking.set_defaults(func=bench_blocking)
+
+    pacing = subparsers.add_parser('pacing', help="Throughput and blocks: fixed sleeps vs adaptive rate limiter")
+    pacing.add_argument('--loads', type=int, default=60)
+    pacing.add_argument('--workers', type=int, default=3)
+    pacing.add_argument('--capacity', type=float, default=0.5, help="Loads/s the simulated site tolerates")
+    pacing.add_argument('--latency', type=float, default=2.0, help="Seconds per simulated page load")
+    pacing.add_argument('--scale', type=float, default=0.02, help="Fraction of real time to sleep")
+    pacing.set_defaults(func=bench_pacing)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import re
+import logging
+from hashlib import sha1
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+_ASIN = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?]|$)')
+_FLIPKART_ITEM = re.compile(r'/p/(itm[0-9a-z]+)', re.I)
+
+
+def canonical_id(platform, url):
+    """
+    Platform-wide product ID from a listing URL
+
+    Amazon: 'amazon:<ASIN>' from /dp/ or /gp/product/, also inside sponsored redirect links.
+    Flipkart: 'flipkart:<PID>' from the pid= parameter, else the /p/itm... item ID.
+    Other URLs fall back to a hash of host + path.
+    """
+    parts = urlsplit(url)
+    prefix = platform.lower()
+    if prefix == 'amazon':
+        # Sponsored results carry the product path URL-encoded in the query string
+        match = _ASIN.search(parts.path) or _ASIN.search(unquote(parts.query))
+        if match:
+            return f"amazon:{match.group(1)}"
+    elif prefix == 'flipkart':
+        pid = parse_qs(parts.query).get('pid')
+        if pid:
+            return f"flipkart:{pid[0].upper()}"
+        match = _FLIPKART_ITEM.search(parts.path)
+        if match:
+            return f"flipkart:{match.group(1).upper()}"
+    return f"{prefix}:{sha1((parts.netloc + parts.path).encode('utf-8')).hexdigest()[:16]}"
@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import logging
+import threading
+import queue
+import atexit
+from concurrent.futures import Future
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024   # Bytes of the database file mapped into memory
+CACHE_SIZE_KB = 16 * 1024       # Page cache per connection
+MAX_BATCH = 256                 # Most queued writes folded into one commit
+
+_STOP = object()
+
+
+class DatabaseManager:
+    """
+    Shared access to one SQLite database
+
+    Reads use a WAL-mode connection per thread, so concurrent sessions never wait on each
+    other. Writes are queued to a single writer thread, which runs everything that queued up
+    while the previous commit was in flight as one transaction (group commit). Each write
+    runs inside its own savepoint, so a failing write is rolled back without affecting
+    the others in its group.
+    """
+
+    def __init__(self, db_name, max_batch=MAX_BATCH):
+        self.db_name = db_name
+        self.max_batch = max_batch
+        self.stats = {'writes': 0, 'commits': 0, 'failed_writes': 0}
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._writer = threading.Thread(
+            target=self._write_loop, name=f"db-writer-{os.path.basename(db_name)}", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self, readonly=False):
+        if readonly:
+            conn = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT_MS / 1000)
+        else:
+            # Autocommit mode: the writer issues BEGIN/SAVEPOINT/COMMIT itself
+            conn = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def reader(self):
+        """This thread's read-only connection (do not close it)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect(readonly=True)
+        return conn
+
+    def query(self, sql, params=()):
+        """Run a SELECT on this thread's read connection and return all rows"""
+        return self.reader().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """Run a SELECT on this thread's read connection and return the first row (or None)"""
+        return self.reader().execute(sql, params).fetchone()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def submit(self, fn):
+        """
+        Queue `fn(conn)` for the writer thread and return a Future with its result
+
+        `fn` runs inside the writer's transaction and must not commit or roll back itself.
+        The future resolves once the group containing it has been committed.
+        """
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def write(self, fn, timeout=None):
+        """Run `fn(conn)` on the writer thread and wait for it to be committed"""
+        return self.submit(fn).result(timeout)
+
+    def execute(self, sql, params=(), timeout=None):
+        """Run one write statement and return its lastrowid once committed"""
+        return self.write(lambda conn: conn.execute(sql, params).lastrowid, timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            # Everything that queued up while the last commit ran shares this transaction
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._run_batch(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _run_batch(self, conn, batch):
+        started = []
+        outcomes = {}
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started.append(future)
+                conn.execute("SAVEPOINT write_task")
+                try:
+                    outcomes[future] = (fn(conn), None)
+                    conn.execute("RELEASE write_task")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_task")
+                    conn.execute("RELEASE write_task")
+                    outcomes[future] = (None, e)
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Group commit on {self.db_name} failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = {future: (None, e) for future in started}
+
+        failed = sum(1 for _, error in outcomes.values() if error is not None)
+        with self._stats_lock:
+            self.stats['writes'] += len(started)
+            self.stats['failed_writes'] += failed
+            self.stats['commits'] += 1
+
+        for future in started:
+            result, error = outcomes[future]
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['writes_per_commit'] = stats['writes'] / stats['commits'] if stats['commits'] else 0.0
+        return stats
+
+    def close(self):
+        """Flush queued writes and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_database(db_name):
+    """Return the process-wide manager for a database file"""
+    key = os.path.abspath(db_name)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = DatabaseManager(db_name)
+        return manager
+
+
+def close_databases():
+    """Flush and stop every manager (registered with atexit)"""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
+
+
+atexit.register(close_databases)
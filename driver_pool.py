@@ -0,0 +1,278 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+from tracing import span
+from rate_limiter import get_rate_limiter
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Pool configuration (can be overridden per pool)
+POOL_SIZE = 3            # Maximum number of live browsers per pool
+RECYCLE_AFTER = 50       # Quit and replace a browser after this many page loads
+CHECKOUT_TIMEOUT = 120   # Seconds to wait for a free browser before giving up
+
+# Resource policy: scrapers only parse page text, so browsers skip images, fonts, media and trackers
+BLOCK_RESOURCES = True
+PAGE_LOAD_STRATEGY = 'eager'   # Return from driver.get() at DOMContentLoaded; readiness waits do the rest
+BLOCKED_URL_PATTERNS = [
+    # Images, fonts and media (matched by Network.setBlockedURLs wildcards)
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    # Ads and third-party trackers
+    '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*amazon-adsystem.com*', '*facebook.net*', '*facebook.com/tr*', '*scorecardresearch.com*',
+    '*criteo.com*', '*hotjar.com*', '*clarity.ms*',
+]
+# Chrome content settings: 2 = block
+BLOCKED_CONTENT_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def apply_resource_policy_options(chrome_options, block_resources=None):
+    """Add the resource policy's prefs and page-load strategy to ChromeOptions (no-op when disabled)"""
+    if not (BLOCK_RESOURCES if block_resources is None else block_resources):
+        return chrome_options
+    chrome_options.add_experimental_option('prefs', BLOCKED_CONTENT_PREFS)
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    return chrome_options
+
+
+def apply_resource_policy(browser, block_resources=None):
+    """Block the policy's URL patterns in a running browser through CDP"""
+    if not (BLOCK_RESOURCES if block_resources is None else block_resources):
+        return
+    browser.execute_cdp_cmd('Network.enable', {})
+    browser.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+
+
+def page_weight(browser):
+    """(bytes transferred, load time in ms) for the current page, from the Resource Timing API"""
+    transferred, load_ms = browser.execute_script("""
+        const nav = performance.getEntriesByType('navigation')[0];
+        const resources = performance.getEntriesByType('resource');
+        const bytes = resources.reduce((sum, r) => sum + (r.transferSize || 0), nav ? nav.transferSize : 0);
+        return [bytes, nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || performance.now()) : performance.now()];
+    """)
+    return int(transferred), float(load_ms)
+
+
+def create_chrome_driver(driver_path, headless=True, block_resources=None):
+    """
+    Start a Chrome browser with the anti-detection options used by all scrapers
+
+    `block_resources` overrides the module-wide resource policy (BLOCK_RESOURCES).
+    """
+    chrome_options = Options()
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument('--disable-infobars')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
+    chrome_options.add_argument('--start-maximized')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+
+    if headless:
+        chrome_options.add_argument('--headless')
+    apply_resource_policy_options(chrome_options, block_resources)
+
+    service = Service(driver_path)
+    browser = webdriver.Chrome(service=service, options=chrome_options)
+
+    browser.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
+    apply_resource_policy(browser, block_resources)
+    browser.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    browser.set_window_size(1920, 1080)
+    return browser
+
+
+class ChromeDriverPool:
+    """Keeps warm Chrome browsers around so scrapers don't pay startup cost on every job"""
+
+    def __init__(self, driver_path, headless=True, size=POOL_SIZE, recycle_after=RECYCLE_AFTER, factory=None):
+        self.driver_path = driver_path
+        self.headless = headless
+        self.size = size
+        self.recycle_after = recycle_after
+        self.factory = factory or (lambda: create_chrome_driver(driver_path, headless=headless))
+
+        # Every browser in the pool may start a page load at once
+        get_rate_limiter().ensure_burst(size)
+
+        # LIFO so the most recently used (warmest) browser is handed out first
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._page_counts = {}
+        self._live = 0
+        self._closed = False
+
+    def _is_healthy(self, driver):
+        """Check that the browser process and session are still responsive"""
+        try:
+            driver.current_url
+            return bool(driver.window_handles)
+        except Exception as e:
+            logger.info(f"Discarding unhealthy browser: {e}")
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._page_counts.pop(id(driver), None)
+            self._live -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _create(self):
+        start = time.time()
+        try:
+            with span("driver_start"):
+                driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+        with self._lock:
+            self._page_counts[id(driver)] = 0
+        logger.info(f"Started pooled browser in {time.time() - start:.2f}s ({self._live}/{self.size} live)")
+        return driver
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """Borrow a browser from the pool, starting a new one if the pool is not full"""
+        deadline = time.time() + timeout
+
+        while True:
+            if self._closed:
+                raise RuntimeError("Driver pool has been closed")
+
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._live < self.size
+                    if can_create:
+                        self._live += 1
+                if can_create:
+                    return self._create()
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser became available within {timeout} seconds")
+                try:
+                    driver = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"No browser became available within {timeout} seconds")
+
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def available(self):
+        """Browsers that can be checked out right now without waiting: idle ones plus room to start more"""
+        with self._lock:
+            return self._idle.qsize() + self.size - self._live
+
+    def release(self, driver, pages=1):
+        """Return a browser to the pool; it is recycled once it has served enough pages"""
+        with self._lock:
+            used = self._page_counts.get(id(driver), 0) + pages
+            self._page_counts[id(driver)] = used
+
+        if self._closed or used >= self.recycle_after or not self._is_healthy(driver):
+            logger.info(f"Recycling browser after {used} pages")
+            self._discard(driver)
+            return
+
+        try:
+            # Drop the previous page so the next job starts from a blank tab
+            driver.get('about:blank')
+        except Exception:
+            self._discard(driver)
+            return
+
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=CHECKOUT_TIMEOUT):
+        """Context manager form of checkout/release"""
+        browser = self.checkout(timeout)
+        try:
+            yield browser
+        finally:
+            self.release(browser)
+
+    def close(self):
+        """Quit every idle browser and stop handing out new ones"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(driver_path, headless=True):
+    """Return the process-wide pool for this driver path, creating it on first use"""
+    key = (driver_path, headless)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ChromeDriverPool(driver_path, headless=headless, size=POOL_SIZE, recycle_after=RECYCLE_AFTER)
+            _pools[key] = pool
+        return pool
+
+
+def configure_driver_pools(size=None, recycle_after=None, block_resources=None):
+    """
+    Change pool size / recycle threshold for new and already running pools
+
+    A new resource policy applies to browsers started from now on; running ones keep theirs
+    until they are recycled.
+    """
+    global POOL_SIZE, RECYCLE_AFTER, BLOCK_RESOURCES
+    with _pools_lock:
+        if size is not None:
+            POOL_SIZE = size
+        if recycle_after is not None:
+            RECYCLE_AFTER = recycle_after
+        if block_resources is not None:
+            BLOCK_RESOURCES = block_resources
+        for pool in _pools.values():
+            pool.size = POOL_SIZE
+            pool.recycle_after = RECYCLE_AFTER
+
+
+def shutdown_driver_pools():
+    """Quit all pooled browsers (registered to run at interpreter exit)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(shutdown_driver_pools)
@@ -9,7 +9,18 @@ import time
 import logging
 import os
 import sys
-from textblob import TextBlob  # For sentiment analysis
+import queue
+from urllib.parse import urlsplit, parse_qs
+from sentiment_service import get_sentiment_service  # For sentiment analysis
+from driver_pool import get_driver_pool
+from flipkart_parser import parse_search_results
+from http_fetcher import get_fetcher, map_urls
+from ranking import rank_products
+from tracing import span
+from page_classifier import classify_page, check_page, get_circuit_breaker, PageBlockedError, NoResultsError
+from rate_limiter import get_rate_limiter
+from page_readiness import (wait_for_stable_count, wait_for_network_idle, wait_for_navigation,
+                            FLIPKART_RESULT_SELECTOR, FLIPKART_REVIEW_SELECTOR, FLIPKART_REVIEW_TITLE_SELECTOR)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -19,175 +30,93 @@ class FlipkartProductSearch:
     def __init__(self, driver_path="chromedriver.exe"):
         self.driver_path = driver_path
         self.products = []
+        self.last_page_source = None  # Last page the browser rendered, saved if parsing fails
     
     def create_browser(self):
-        chrome_options = Options()
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        
-        service = Service(self.driver_path)
-        browser = webdriver.Chrome(service=service, options=chrome_options)
-        return browser
+        """Borrow a warm headless browser from the shared pool (return it with release_browser)"""
+        return get_driver_pool(self.driver_path, headless=True).checkout()
+    
+    def release_browser(self, browser):
+        """Hand a browser obtained from create_browser back to the shared pool"""
+        get_driver_pool(self.driver_path, headless=True).release(browser)
+    
+    def render_search_page(self, url):
+        """Load a search page in a pooled browser and return its HTML once the cards settle"""
+        browser = self.create_browser()
+        try:
+            with get_rate_limiter().permit(url) as load:
+                with span("navigate", "flipkart"):
+                    browser.get(url)
+                page = classify_page(browser.page_source, 'flipkart')
+                load['blocked'] = page.blocked
+            # A captcha or "no results" page is final: abort before waiting for cards
+            check_page(url, page, partial=True)
+            # Wait (up to 10s) for the product cards to render and settle
+            with span("readiness_wait", "flipkart"):
+                wait_for_stable_count(browser, FLIPKART_RESULT_SELECTOR, timeout=10)
+            self.last_page_source = browser.page_source
+            return self.last_page_source
+        finally:
+            self.release_browser(browser)
     
     def search_products(self, search_term):
         """Search for products on Flipkart using the search term"""
         print(f"\n🔎 Searching for '{search_term}' on Flipkart...\n")
+        query = search_term
         search_term = search_term.replace(' ', '+')
         flipkart_link = f"https://www.flipkart.com/search?q={search_term}"
-        browser = self.create_browser()
+        result = None
         
         try:
-            # Navigate to the search results page
-            browser.get(flipkart_link)
-            time.sleep(10)  # Extended wait time
-            
-            # Updated product container selectors based on provided CSS
-            product_strategies = [
-                (By.CSS_SELECTOR, 'div.cPHDOP'),  # Main product container
-                (By.CSS_SELECTOR, 'div[class*="cPHDOP"]'),  # Alternative match
-                (By.CSS_SELECTOR, 'div.col-12-12'),  # Column container
-                (By.XPATH, '//div[contains(@class, "cPHDOP")]'),
-                (By.XPATH, '//div[contains(@class, "col-12-12")]')
-            ]
-            
-            products_found = False
-            product_containers = []
-            
-            for strategy in product_strategies:
-                try:
-                    product_containers = browser.find_elements(*strategy)
-                    if product_containers:
-                        products_found = True
-                        print(f"Found {len(product_containers)} products using {strategy}")
-                        break
-                except Exception as e:
-                    print(f"Strategy {strategy} failed: {e}")
-            
-            if not products_found:
+            # Fail fast while Flipkart is blocking us
+            get_circuit_breaker().before_request(flipkart_link)
+            # Static HTML first, a browser only if that page is blocked or has no cards
+            result = get_fetcher().fetch(
+                flipkart_link, self.render_search_page,
+                lambda html: parse_search_results(html, max_products=10),
+                classify=lambda html, status: classify_page(html, 'flipkart', status)
+            )
+            logger.info(f"Fetched Flipkart results via {result.tier} in {result.elapsed:.2f}s ({result.page.state})")
+            check_page(flipkart_link, result.page)
+            parsed_products = result.value
+            
+            if not parsed_products:
                 print("No products found. Saving page source for debugging.")
                 with open('debug_page_source.html', 'w', encoding='utf-8') as f:
-                    f.write(browser.page_source)
+                    f.write(result.html)
                 return []
             
-            # Process the first 10 products
-            for idx, container in enumerate(product_containers[:10], 1):
-                try:
-                    # Updated title extraction based on CSS selectors
-                    title_selectors = [
-                        './/div[@class="KzDlHZ"]',  # Primary title selector
-                        './/div[contains(@class, "KzDlHZ")]',
-                        './/a[contains(@class, "wjcEIp")]',  # Link with title
-                        './/div[@class="syl9yP"]',  # Alternative title
-                        './/a[contains(@href, "/p/")]'  # Fallback link selector
-                    ]
-                    
-                    title = "Title Not Available"
-                    product_link = None
-                    
-                    for selector in title_selectors:
-                        try:
-                            title_elem = container.find_element(By.XPATH, selector)
-                            candidate_title = title_elem.text.strip()
-                            if candidate_title and len(candidate_title) > 5:
-                                title = candidate_title
-                                # Try to get link from the same element or parent
-                                try:
-                                    if title_elem.tag_name == 'a':
-                                        product_link = title_elem.get_attribute('href')
-                                    else:
-                                        link_elem = title_elem.find_element(By.XPATH, './/ancestor::a | .//a')
-                                        product_link = link_elem.get_attribute('href')
-                                except:
-                                    pass
-                                break
-                        except:
-                            continue
-                    
-                    # Updated price extraction based on CSS selectors
-                    price = float('inf')
-                    price_text = "Price Not Available"
-                    
-                    price_selectors = [
-                        './/div[@class="Nx9bqj"]',  # Primary price selector
-                        './/div[contains(@class, "Nx9bqj")]',
-                        './/div[@class="_4b5DiR"]',  # Alternative price
-                        './/span[contains(text(), "₹")]',  # Any element with rupee symbol
-                        './/div[contains(text(), "₹")]'
-                    ]
-                    
-                    for selector in price_selectors:
-                        try:
-                            price_elem = container.find_element(By.XPATH, selector)
-                            price_text_raw = price_elem.text.strip()
-                            if '₹' in price_text_raw:
-                                # Clean price text
-                                clean_price = price_text_raw.replace('₹', '').replace(',', '').strip()
-                                # Extract first number (in case of range)
-                                price_numbers = ''.join(filter(lambda x: x.isdigit() or x == '.', clean_price.split()[0]))
-                                if price_numbers:
-                                    price = float(price_numbers)
-                                    price_text = price_text_raw
-                                    break
-                        except:
-                            continue
-                    
-                    # Try to find product link if not found yet
-                    if not product_link:
-                        link_selectors = [
-                            './/a[contains(@href, "/p/")]',
-                            './/a[@class="wjcEIp"]',
-                            './/a[contains(@class, "wjcEIp")]'
-                        ]
-                        
-                        for selector in link_selectors:
-                            try:
-                                link_elem = container.find_element(By.XPATH, selector)
-                                product_link = link_elem.get_attribute('href')
-                                if product_link:
-                                    break
-                            except:
-                                continue
-                    
-                    # Add to products list if we have valid data
-                    if title != "Title Not Available" and price != float('inf') and product_link:
-                        self.products.append({
-                            'title': title,
-                            'price': price,
-                            'price_text': price_text,
-                            'link': product_link
-                        })
-                        print(f"\nProduct {idx}:")
-                        print(f"Title: {title}")
-                        print(f"Price: {price_text}")
-                        print(f"Link: {product_link}")
-                    
-                    # Also add products with missing price but valid title and link
-                    elif title != "Title Not Available" and product_link:
-                        self.products.append({
-                            'title': title,
-                            'price': float('inf'),
-                            'price_text': "Price Not Available",
-                            'link': product_link
-                        })
-                        print(f"\nProduct {idx} (No price found):")
-                        print(f"Title: {title}")
-                        print(f"Link: {product_link}")
-                
-                except Exception as e:
-                    print(f"Error processing product {idx}: {e}")
+            # Same relevance ranking as Amazon, so accessories don't win the lowest-price pick
+            with span("rank", "flipkart"):
+                ranked_products = rank_products(parsed_products, query, max_results=len(parsed_products))
+            if ranked_products:
+                parsed_products = ranked_products
+            
+            for idx, product in enumerate(parsed_products, 1):
+                self.products.append(product)
+                if product['price'] != float('inf'):
+                    print(f"\nProduct {idx}:")
+                    print(f"Title: {product['title']}")
+                    print(f"Price: {product['price_text']}")
+                else:
+                    print(f"\nProduct {idx} (No price found):")
+                    print(f"Title: {product['title']}")
+                print(f"Link: {product['link']}")
             
             return self.products
             
+        except PageBlockedError:
+            raise
+        except NoResultsError:
+            print(f"No Flipkart results for '{query}'")
+            return []
         except Exception as e:
             print(f"Overall scraping error: {e}")
-            with open('debug_error_page.html', 'w', encoding='utf-8') as f:
-                f.write(browser.page_source)
+            html = result.html if result else self.last_page_source
+            if html:
+                with open('debug_error_page.html', 'w', encoding='utf-8') as f:
+                    f.write(html)
             return []
-        
-        finally:
-            browser.quit()
     
     def get_lowest_price_product(self):
         """Returns the product with the lowest price"""
@@ -209,42 +138,46 @@ class FlipkartProductSearch:
 class FlipkartReviewScraper:
     def __init__(self, driver_path="chromedriver.exe"):
         self.driver_path = driver_path
-        self.setup_driver()
+        # Browsers come from a shared pool and already carry the anti-detection setup
+        self.pool = get_driver_pool(self.driver_path, headless=False)
+        self._driver = None
+        self.pages_loaded = 0
+    
+    @property
+    def driver(self):
+        """The scraper's own pooled browser, checked out on first use"""
+        if self._driver is None:
+            self.setup_driver()
+        return self._driver
         
     def setup_driver(self):
-        """Setup Chrome driver with anti-detection measures"""
-        chrome_options = Options()
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('--disable-infobars')
-        chrome_options.add_argument('--start-maximized')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        
+        """Check a browser out of the pool for this scraper"""
         try:
-            service = Service(executable_path=self.driver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self._driver = self.pool.checkout()
+            self.pages_loaded = 0
             
-            # Additional anti-detection measures
-            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            self.wait = WebDriverWait(self.driver, 10)
-            logger.info("WebDriver set up successfully")
+            self.wait = WebDriverWait(self._driver, 10)
+            logger.info("WebDriver checked out from pool")
         except Exception as e:
             logger.error(f"Failed to set up WebDriver: {e}")
             raise
     
+    def release_driver(self):
+        """Return the scraper's browser to the pool, if it has one checked out"""
+        if self._driver is None:
+            return
+        # Return the browser to the pool so the next job starts warm
+        self.pool.release(self._driver, pages=max(1, self.pages_loaded))
+        self._driver = None
+        logger.info("Browser returned to pool")
+    
     def handle_login(self):
         """Simple login handling - just close the popup if present"""
         logger.info("Handling login popup...")
         try:
-            self.driver.get("https://www.flipkart.com")
+            with get_rate_limiter().permit("https://www.flipkart.com"):
+                self.driver.get("https://www.flipkart.com")
+            self.pages_loaded += 1
             logger.info("Loaded Flipkart homepage")
             
             # Try to close login popup if it appears
@@ -253,7 +186,6 @@ class FlipkartReviewScraper:
                 if close_buttons:
                     close_buttons[0].click()
                     logger.info("Closed login popup")
-                    time.sleep(1)
             except Exception as e:
                 logger.info(f"No login popup or couldn't close: {e}")
                 
@@ -267,8 +199,10 @@ class FlipkartReviewScraper:
         """Navigate directly to the product URL"""
         logger.info(f"Navigating to product: {product_url}")
         try:
-            self.driver.get(product_url)
-            time.sleep(3)
+            with get_rate_limiter().permit(product_url):
+                self.driver.get(product_url)
+            self.pages_loaded += 1
+            wait_for_network_idle(self.driver, timeout=5)
             logger.info("Successfully loaded product page")
             return True
         except Exception as e:
@@ -304,9 +238,8 @@ class FlipkartReviewScraper:
             pass
         
         # Scroll down to make review section visible
-        for _ in range(3):
-            self.driver.execute_script("window.scrollBy(0, 500)")
-            time.sleep(1)
+        self.driver.execute_script("window.scrollBy(0, 1500)")
+        wait_for_network_idle(self.driver, timeout=3)
         
         # Updated review section selectors
         review_selectors = [
@@ -329,7 +262,7 @@ class FlipkartReviewScraper:
                             logger.info(f"Found reviews section: {element.text}")
                             element.click()
                             logger.info("Clicked on reviews section")
-                            time.sleep(3)
+                            wait_for_navigation(self.driver, element, FLIPKART_REVIEW_SELECTOR, timeout=5)
                             return True
                     except:
                         continue
@@ -348,7 +281,7 @@ class FlipkartReviewScraper:
                             logger.info(f"Found review count: {elem.text}")
                             elem.click()
                             logger.info("Clicked on review count")
-                            time.sleep(3)
+                            wait_for_navigation(self.driver, elem, FLIPKART_REVIEW_SELECTOR, timeout=5)
                             return True
                     except:
                         continue
@@ -363,13 +296,14 @@ class FlipkartReviewScraper:
         logger.warning("Could not navigate to reviews section. Will try to extract reviews from current page.")
         return False
     
-    def extract_review_titles(self):
-        """Extract review titles from the current page"""
+    def extract_review_titles(self, driver=None):
+        """Extract review titles from the current page (of `driver`, default the scraper's own browser)"""
+        driver = driver or self.driver
         review_titles = []
         
         # Scroll to load all content
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-        time.sleep(2)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+        wait_for_stable_count(driver, FLIPKART_REVIEW_TITLE_SELECTOR, timeout=3)
         
         # Updated review title selectors
         title_selectors = [
@@ -384,7 +318,7 @@ class FlipkartReviewScraper:
         
         for selector in title_selectors:
             try:
-                title_elements = self.driver.find_elements(By.XPATH, selector)
+                title_elements = driver.find_elements(By.XPATH, selector)
                 if title_elements:
                     logger.info(f"Found {len(title_elements)} review titles using selector: {selector}")
                     for title_element in title_elements:
@@ -398,17 +332,14 @@ class FlipkartReviewScraper:
         
         return review_titles
     
-    def extract_reviews(self):
-        """Extract full reviews from the current page"""
+    def extract_reviews(self, driver=None):
+        """Extract full reviews from the current page (of `driver`, default the scraper's own browser)"""
+        driver = driver or self.driver
         reviews = []
         
         # Scroll to ensure all reviews are loaded
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3);")
-        time.sleep(1)
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight*2/3);")
-        time.sleep(1)
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for_stable_count(driver, FLIPKART_REVIEW_SELECTOR, timeout=3)
         
         # Updated review content selectors
         review_selectors = [
@@ -423,7 +354,7 @@ class FlipkartReviewScraper:
         review_elements = []
         for selector in review_selectors:
             try:
-                elements = self.driver.find_elements(By.XPATH, selector)
+                elements = driver.find_elements(By.XPATH, selector)
                 if elements:
                     logger.info(f"Found {len(elements)} reviews using selector: {selector}")
                     review_elements = elements
@@ -445,7 +376,7 @@ class FlipkartReviewScraper:
             logger.warning("No reviews found with specific selectors. Trying general text elements...")
             try:
                 # Look for any elements with substantial text that might be reviews
-                text_elements = self.driver.find_elements(By.XPATH, 
+                text_elements = driver.find_elements(By.XPATH, 
                     "//div[string-length(text()) > 30 and not(contains(@class, 'nav')) and not(contains(@class, 'header'))]")
                 
                 for element in text_elements:
@@ -467,7 +398,6 @@ class FlipkartReviewScraper:
         try:
             # Take screenshot of bottom of page
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
             
             next_button_selectors = [
                 "//a[@class='_1LKTO3']",
@@ -484,8 +414,9 @@ class FlipkartReviewScraper:
                         if button.is_displayed() and "Next" in button.text:
                             logger.info(f"Found Next button: {button.text}")
                             button.click()
+                            self.pages_loaded += 1
                             logger.info("Clicked Next button")
-                            time.sleep(3)
+                            wait_for_navigation(self.driver, button, FLIPKART_REVIEW_SELECTOR, timeout=5)
                             return True
                     except:
                         continue
@@ -497,29 +428,90 @@ class FlipkartReviewScraper:
             logger.error(f"Error navigating to next page: {e}")
             return False
     
+    @staticmethod
+    def review_page_urls(product_url, pages):
+        """Direct URLs of review pages 1..pages for a product URL (empty when it has no product ID)"""
+        if "/p/" not in product_url:
+            return []
+        product_id = product_url.split("/p/")[1].split("?")[0].strip("/")
+        if not product_id:
+            return []
+        query = parse_qs(urlsplit(product_url).query)
+        pid = f"pid={query['pid'][0]}&" if query.get('pid') else ""
+        return [f"https://www.flipkart.com/product-reviews/{product_id}?{pid}page={page}"
+                for page in range(1, pages + 1)]
+    
+    def scrape_review_page(self, url, browser=None):
+        """Load one review page and return its (titles, reviews); without `browser` one is borrowed from the pool"""
+        borrowed = browser is None
+        if borrowed:
+            browser = self.pool.checkout()
+        try:
+            with get_rate_limiter().permit(url), span("navigate", "flipkart"):
+                browser.get(url)
+            with span("readiness_wait", "flipkart"):
+                wait_for_stable_count(browser, FLIPKART_REVIEW_SELECTOR, timeout=5)
+            with span("parse", "flipkart"):
+                return self.extract_review_titles(browser), self.extract_reviews(browser)
+        finally:
+            if borrowed:
+                self.pool.release(browser)
+            else:
+                self.pages_loaded += 1
+    
+    def scrape_review_pages(self, urls, workers=None):
+        """
+        Scrape review pages, one browser per page in flight
+        
+        The scraper's own browser loads pages alongside browsers borrowed from the pool, and
+        no more are borrowed than the pool has free, so pages never queue for a checkout.
+        With nothing free the pages load one after another in the scraper's own browser.
+        Results are merged in page order.
+        """
+        own = queue.Queue()
+        own.put(self.driver)
+        workers = min(workers or self.pool.size, len(urls), 1 + self.pool.available())
+        if workers <= 1:
+            logger.info("No free browsers in the pool, loading review pages one at a time")
+        
+        def scrape(url):
+            try:
+                browser = own.get_nowait()
+            except queue.Empty:
+                return self.scrape_review_page(url)
+            try:
+                return self.scrape_review_page(url, browser)
+            finally:
+                own.put(browser)
+        
+        pages = map_urls(urls, scrape, default_limit=workers, thread_name_prefix="flipkart-reviews")
+        
+        all_titles, all_reviews = [], []
+        for page, result in enumerate(pages, 1):
+            if not result or not (result[0] or result[1]):
+                logger.warning(f"No content found on review page {page}")
+                continue
+            all_titles.extend(result[0])
+            all_reviews.extend(result[1])
+            logger.info(f"Extracted {len(result[0])} review titles and {len(result[1])} full reviews from page {page}")
+        return all_titles, all_reviews
+    
     def analyze_sentiment(self, reviews):
         """Analyze sentiment and determine if the product is worth buying"""
         if not reviews:
             return "No reviews available for analysis"
             
-        positive_count = 0
-        negative_count = 0
-        neutral_count = 0
-        
         logger.info("Performing sentiment analysis...")
-        for review in reviews:
-            sentiment = TextBlob(review).sentiment.polarity
-            if sentiment > 0.1:
-                positive_count += 1
-            elif sentiment < -0.1:
-                negative_count += 1
-            else:
-                neutral_count += 1
+        sentiment_service = get_sentiment_service()
+        with span("sentiment", "flipkart"):
+            summary = sentiment_service.summarize(sentiment_service.score_many(reviews))
         
-        total_reviews = len(reviews)
-        positive_percentage = (positive_count / total_reviews * 100) if total_reviews > 0 else 0
-        negative_percentage = (negative_count / total_reviews * 100) if total_reviews > 0 else 0
-        neutral_percentage = (neutral_count / total_reviews * 100) if total_reviews > 0 else 0
+        positive_count = summary['positive']
+        negative_count = summary['negative']
+        total_reviews = summary['total']
+        positive_percentage = summary['positive_percent']
+        negative_percentage = summary['negative_percent']
+        neutral_percentage = summary['neutral_percent']
         
         logger.info(f"Sentiment analysis results: Positive: {positive_percentage:.1f}%, Negative: {negative_percentage:.1f}%, Neutral: {neutral_percentage:.1f}%")
         
@@ -577,20 +569,22 @@ class FlipkartReviewScraper:
         
         return product_info
     
-    def scrape_reviews(self, product_url, pages_to_scrape=3):
+    def scrape_reviews(self, product_url, pages_to_scrape=3, parallel=True):
         """
         Extract reviews from a Flipkart product page and perform sentiment analysis
         
         Args:
             product_url: URL of the Flipkart product page
             pages_to_scrape: Number of review pages to scrape
+            parallel: Load the review pages by direct URL in parallel instead of clicking "Next"
         """
         all_reviews = []
         all_titles = []
+        review_urls = self.review_page_urls(product_url, pages_to_scrape) if parallel else []
         
         try:
-            # Handle login (close popup)
-            if not self.handle_login():
+            # Handle login (close popup); the direct review URLs don't go through the homepage
+            if not review_urls and not self.handle_login():
                 logger.error("Login handling failed")
                 return [], [], "Error: Login handling failed", {}
             
@@ -602,38 +596,47 @@ class FlipkartReviewScraper:
             # Extract product info first
             product_info = self.extract_product_info()
             
-            # Navigate to reviews page
-            self.navigate_to_reviews()
-            
-            # Main review extraction loop
-            for page in range(1, pages_to_scrape + 1):
-                logger.info(f"\n--- Processing Page {page}/{pages_to_scrape} ---")
+            if review_urls:
+                all_titles, all_reviews = self.scrape_review_pages(review_urls)
+                if not all_titles and not all_reviews:
+                    logger.warning("Direct review URLs gave no reviews, falling back to Next-button pagination")
+                    review_urls = []
+                    # The scraper's browser loaded review pages, so go back to the product page
+                    self.navigate_to_product(product_url)
+            
+            if not review_urls:
+                # Navigate to reviews page
+                self.navigate_to_reviews()
+            
+                # Main review extraction loop
+                for page in range(1, pages_to_scrape + 1):
+                    logger.info(f"\n--- Processing Page {page}/{pages_to_scrape} ---")
                 
-                # First extract titles which are usually more reliable
-                page_titles = self.extract_review_titles()
-                if page_titles:
-                    all_titles.extend(page_titles)
-                    logger.info(f"Extracted {len(page_titles)} review titles from page {page}")
+                    # First extract titles which are usually more reliable
+                    page_titles = self.extract_review_titles()
+                    if page_titles:
+                        all_titles.extend(page_titles)
+                        logger.info(f"Extracted {len(page_titles)} review titles from page {page}")
                 
-                # Then extract full reviews
-                page_reviews = self.extract_reviews()
-                if page_reviews:
-                    all_reviews.extend(page_reviews)
-                    logger.info(f"Extracted {len(page_reviews)} full reviews from page {page}")
+                    # Then extract full reviews
+                    page_reviews = self.extract_reviews()
+                    if page_reviews:
+                        all_reviews.extend(page_reviews)
+                        logger.info(f"Extracted {len(page_reviews)} full reviews from page {page}")
                 
-                # Check if we found anything on this page
-                if not page_reviews and not page_titles:
-                    logger.warning(f"No content found on page {page}")
+                    # Check if we found anything on this page
+                    if not page_reviews and not page_titles:
+                        logger.warning(f"No content found on page {page}")
                 
-                # Go to next page if available
-                if page < pages_to_scrape:
-                    if not self.go_to_next_page():
-                        logger.info("No more pages available. Stopping.")
-                        break
+                    # Go to next page if available
+                    if page < pages_to_scrape:
+                        if not self.go_to_next_page():
+                            logger.info("No more pages available. Stopping.")
+                            break
             
-            # Remove duplicates
-            all_reviews = list(set(all_reviews))
-            all_titles = list(set(all_titles))
+            # Remove duplicates, keeping page order
+            all_reviews = list(dict.fromkeys(all_reviews))
+            all_titles = list(dict.fromkeys(all_titles))
             
             # If we haven't got any reviews, try one more approach
             if not all_reviews and not all_titles and "product-reviews" not in product_url:
@@ -645,8 +648,10 @@ class FlipkartReviewScraper:
                         direct_review_url = f"https://www.flipkart.com/product-reviews/{product_id}"
                         logger.info(f"Trying direct review URL: {direct_review_url}")
                         
-                        self.driver.get(direct_review_url)
-                        time.sleep(3)
+                        with get_rate_limiter().permit(direct_review_url):
+                            self.driver.get(direct_review_url)
+                        self.pages_loaded += 1
+                        wait_for_stable_count(self.driver, FLIPKART_REVIEW_SELECTOR, timeout=5)
                         
                         # Try again to extract reviews from this page
                         direct_titles = self.extract_review_titles()
@@ -679,9 +684,7 @@ class FlipkartReviewScraper:
             return [], [], f"Error: {e}", {}
         
         finally:
-            # Clean up resources
-            self.driver.quit()
-            logger.info("Browser closed successfully")
+            self.release_driver()
 
 
 def main():
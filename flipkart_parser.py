@@ -0,0 +1,174 @@
+import re
+import logging
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+from catalog import canonical_id
+from tracing import timed
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+FLIPKART_HOME = "https://www.flipkart.com"
+
+# Same fallbacks the WebDriver version tried, expressed as CSS selectors
+CONTAINER_SELECTORS = [
+    'div.cPHDOP',              # Main product container
+    'div[class*="cPHDOP"]',    # Alternative match
+    'div.col-12-12',           # Column container
+]
+TITLE_SELECTORS = [
+    'div.KzDlHZ',              # Primary title selector
+    'div[class*="KzDlHZ"]',
+    'a[class*="wjcEIp"]',      # Link with title
+    'div.syl9yP',              # Alternative title
+    'a[href*="/p/"]',          # Fallback link selector
+]
+PRICE_SELECTORS = [
+    'div.Nx9bqj',              # Primary price selector
+    'div[class*="Nx9bqj"]',
+    'div._4b5DiR',             # Alternative price
+]
+# Product page price, same order as FlipkartReviewScraper.extract_product_info
+PRODUCT_PRICE_SELECTORS = [
+    'div.Nx9bqj._4b5DiR',
+    'div[class*="Nx9bqj"]',
+    'div._30jeq3._16Jk6d',
+    'div[class*="_30jeq3"]',
+]
+LINK_SELECTORS = [
+    'a[href*="/p/"]',
+    'a.wjcEIp',
+    'a[class*="wjcEIp"]',
+]
+
+_PRICE_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_price(price_text):
+    """Turn text like '₹12,999' into 12999.0 (float('inf') when no number is present)"""
+    if not price_text or '₹' not in price_text:
+        return float('inf')
+    clean_price = price_text.replace('₹', '').replace(',', '').strip()
+    match = _PRICE_NUMBER.search(clean_price.split()[0]) if clean_price else None
+    return float(match.group()) if match else float('inf')
+
+
+def _find_title(container):
+    for selector in TITLE_SELECTORS:
+        for elem in container.select(selector):
+            title = elem.get_text(" ", strip=True)
+            if title and len(title) > 5:
+                # Link from the same element, an enclosing anchor or a nested one
+                if elem.name == 'a':
+                    link_elem = elem
+                else:
+                    link_elem = elem.find_parent('a') or elem.find('a')
+                link = link_elem.get('href') if link_elem else None
+                return title, link
+    return None, None
+
+
+def _find_price(container):
+    for selector in PRICE_SELECTORS:
+        elem = container.select_one(selector)
+        if elem:
+            price_text = elem.get_text(strip=True)
+            price = parse_price(price_text)
+            if price != float('inf'):
+                return price, price_text
+
+    # Any span/div whose own text carries the rupee symbol
+    for elem in container.find_all(['span', 'div'], string=re.compile('₹')):
+        price_text = elem.get_text(strip=True)
+        price = parse_price(price_text)
+        if price != float('inf'):
+            return price, price_text
+
+    return float('inf'), "Price Not Available"
+
+
+def _find_link(container):
+    for selector in LINK_SELECTORS:
+        elem = container.select_one(selector)
+        if elem and elem.get('href'):
+            return elem['href']
+    return None
+
+
+def find_product_containers(soup):
+    """Return the product cards using the first container selector that matches"""
+    for selector in CONTAINER_SELECTORS:
+        containers = soup.select(selector)
+        if containers:
+            logger.info(f"Found {len(containers)} products using selector: {selector}")
+            return containers
+    return []
+
+
+@timed("parse", "flipkart")
+def parse_search_results(html, max_products=10, base_url=FLIPKART_HOME):
+    """
+    Extract product cards from a Flipkart search results page
+
+    Works on a single page_source snapshot so the whole page is parsed in-process
+    instead of issuing one WebDriver call per field per card.
+
+    Returns a list of dicts with title, price, price_text and link.
+    """
+    soup = BeautifulSoup(html, 'lxml')
+    products = []
+    seen_ids = set()
+
+    for idx, container in enumerate(find_product_containers(soup)[:max_products], 1):
+        try:
+            title, link = _find_title(container)
+            if not title:
+                continue
+
+            price, price_text = _find_price(container)
+            link = link or _find_link(container)
+            if not link:
+                continue
+
+            # Nested containers can yield the same product twice
+            link = urljoin(base_url, link)
+            product_id = canonical_id('Flipkart', link)
+            if product_id in seen_ids:
+                continue
+            seen_ids.add(product_id)
+
+            products.append({
+                'title': title,
+                'price': price,
+                'price_text': price_text,
+                'link': link
+            })
+        except Exception as e:
+            logger.debug(f"Error processing product {idx}: {e}")
+
+    return products
+
+
+def parse_product_price(html):
+    """Price shown on a Flipkart product page, or None when it cannot be found"""
+    soup = BeautifulSoup(html, 'lxml')
+    for selector in PRODUCT_PRICE_SELECTORS:
+        for elem in soup.select(selector):
+            price = parse_price(elem.get_text(strip=True))
+            if price != float('inf'):
+                return price
+    return None
+
+
+if __name__ == "__main__":
+    # Offline check against a saved page, e.g. python flipkart_parser.py flipkart_search_results.html
+    # (python benchmarks.py parse also asserts the expected cards)
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else 'flipkart_search_results.html'
+    with open(path, encoding='utf-8') as f:
+        results = parse_search_results(f.read())
+    print(f"Parsed {len(results)} products from {path}")
+    for product in results:
+        print(f"- {product['title'][:70]} | {product['price_text']} | {product['link']}")
@@ -6,6 +6,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
+from rate_limiter import get_rate_limiter
 
 def create_browser(driver_path):
     chrome_options = Options()
@@ -25,7 +26,8 @@ def flipkart():
     
     try:
         # Navigate to the page
-        browser.get(URL)
+        with get_rate_limiter().permit(URL):
+            browser.get(URL)
         time.sleep(10)  # Extended wait time
         
         # Try multiple strategies to find product elements
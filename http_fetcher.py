@@ -0,0 +1,219 @@
+import time
+import logging
+import threading
+from collections import namedtuple, deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_rate_limiter, url_host
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = 8        # Keep-alive connections per host, sized to the number of concurrent fetches
+HTTP_TIMEOUT = 10
+HOST_CONCURRENCY = 4      # Requests in flight per host when fetching a list of URLs
+LATENCY_SAMPLES = 200     # Recent latencies kept per tier for percentiles
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Status codes and page markers that mean the static request was refused rather than incomplete
+BLOCKED_STATUSES = (403, 429, 503)
+BLOCK_MARKERS = ('captcha', 'robot check', 'are you a human')
+
+FetchResult = namedtuple('FetchResult', ['html', 'value', 'tier', 'elapsed', 'page'], defaults=(None,))
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def map_urls(items, fn, key=url_host, limits=None, default_limit=HOST_CONCURRENCY, thread_name_prefix="fetch"):
+    """
+    Run `fn(item)` for every item concurrently, at most `limits.get(key(item), default_limit)` per key
+
+    Items are URLs by default (keyed by host) but can be anything `key` maps to a group, e.g.
+    (platform, url) pairs keyed by platform. Returns results in input order; an item whose
+    call raised is logged and comes back as None.
+    """
+    items = list(items)
+    if not items:
+        return []
+    limits = limits or {}
+    keys = [key(item) for item in items]
+    semaphores = {k: threading.BoundedSemaphore(limits.get(k, default_limit)) for k in set(keys)}
+    # Enough threads for every group to run at its cap, so no group waits behind another's queue
+    workers = min(len(items), sum(limits.get(k, default_limit) for k in semaphores))
+
+    def run(item, k):
+        with semaphores[k]:
+            return fn(item)
+
+    results = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        futures = [executor.submit(run, item, k) for item, k in zip(items, keys)]
+        for index, future in enumerate(futures):
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logger.warning(f"Fetch failed for {items[index]}: {e}")
+    return results
+
+
+class TieredFetcher:
+    """
+    Fetch a page over plain HTTP first and fall back to a browser only when needed
+
+    Tier 'http' is a shared requests.Session with keep-alive and gzip. The page is accepted
+    when the caller's `accept(html)` returns something truthy; a blocked or incomplete
+    response escalates to tier 'webdriver', the caller's own rendering function.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(HEADERS)
+
+        self._lock = threading.Lock()
+        self.stats = {
+            tier: {'attempts': 0, 'successes': 0, 'blocked': 0, 'incomplete': 0, 'errors': 0,
+                   'latencies': deque(maxlen=LATENCY_SAMPLES)}
+            for tier in ('http', 'webdriver')
+        }
+
+    def _record(self, tier, outcome, elapsed):
+        with self._lock:
+            stats = self.stats[tier]
+            stats['attempts'] += 1
+            stats[outcome] += 1
+            stats['latencies'].append(elapsed)
+
+    @staticmethod
+    def is_blocked(status_code, html):
+        if status_code in BLOCKED_STATUSES:
+            return True
+        head = html[:20000].lower()
+        return any(marker in head for marker in BLOCK_MARKERS)
+
+    def fetch_http(self, url, accept, classify=None):
+        """Try the static tier; returns a FetchResult or None when the page was not usable"""
+        limiter = get_rate_limiter()
+        issued = limiter.acquire(url)
+        start = time.time()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            html = response.text
+        except requests.RequestException as e:
+            limiter.record(url, time.time() - start, error=True, issued=issued)
+            self._record('http', 'errors', time.time() - start)
+            logger.info(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+        page = classify(html, response.status_code) if classify else None
+        blocked = page.blocked if page is not None else self.is_blocked(response.status_code, html)
+        limiter.record(url, time.time() - start, blocked=blocked, issued=issued)
+        if blocked:
+            self._record('http', 'blocked', time.time() - start)
+            logger.info(f"HTTP fetch blocked for {url} (status {response.status_code})")
+            return None
+        if page is not None and page.final:
+            elapsed = time.time() - start
+            self._record('http', 'successes', elapsed)
+            return FetchResult(html, None, 'http', elapsed, page)
+
+        value = accept(html) if response.status_code == 200 else None
+        elapsed = time.time() - start
+        if not value:
+            self._record('http', 'incomplete', elapsed)
+            logger.info(f"HTTP response for {url} incomplete (status {response.status_code}), escalating")
+            return None
+
+        self._record('http', 'successes', elapsed)
+        return FetchResult(html, value, 'http', elapsed, page)
+
+    def fetch(self, url, render, accept, classify=None):
+        """
+        Fetch `url`, escalating from HTTP to `render(url)` (which returns page HTML)
+
+        `accept(html)` decides whether a page is usable and may return the parsed result,
+        which comes back as FetchResult.value. The browser tier's result is returned even
+        when `accept` rejects it so callers keep their existing empty-page handling.
+
+        `classify(html, status_code)`, when given, returns a page_classifier.PageClassification
+        (FetchResult.page). It replaces the generic block markers, and a final page such as
+        "no results" is returned from the HTTP tier without starting a browser.
+        """
+        result = self.fetch_http(url, accept, classify)
+        if result is not None:
+            return result
+
+        start = time.time()
+        try:
+            html = render(url)
+        except Exception:
+            self._record('webdriver', 'errors', time.time() - start)
+            raise
+        page = classify(html, 200) if classify else None
+        value = accept(html)
+        elapsed = time.time() - start
+        self._record('webdriver', 'successes' if value else 'incomplete', elapsed)
+        return FetchResult(html, value, 'webdriver', elapsed, page)
+
+    def get(self, url):
+        """One plain GET over the shared session; returns the page HTML (raises on HTTP errors)"""
+        limiter = get_rate_limiter()
+        issued = limiter.acquire(url)
+        start = time.time()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            limiter.record(url, time.time() - start, blocked=status in BLOCKED_STATUSES, error=True, issued=issued)
+            self._record('http', 'errors', time.time() - start)
+            raise
+        limiter.record(url, time.time() - start, issued=issued)
+        self._record('http', 'successes', time.time() - start)
+        return response.text
+
+    def fetch_many(self, urls, per_host=HOST_CONCURRENCY):
+        """GET every URL concurrently over the shared session; returns HTML (None on failure) in input order"""
+        return map_urls(urls, self.get, default_limit=per_host, thread_name_prefix="http-fetch")
+
+    def get_stats(self):
+        """Per-tier counters, success rate and p50/p95 latency in seconds"""
+        with self._lock:
+            summary = {}
+            for tier, stats in self.stats.items():
+                latencies = list(stats['latencies'])
+                summary[tier] = {key: value for key, value in stats.items() if key != 'latencies'}
+                summary[tier]['success_rate'] = stats['successes'] / stats['attempts'] if stats['attempts'] else 0.0
+                summary[tier]['p50'] = _percentile(latencies, 0.5) if latencies else 0.0
+                summary[tier]['p95'] = _percentile(latencies, 0.95) if latencies else 0.0
+            return summary
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide tiered fetcher"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = TieredFetcher()
+        return _fetcher
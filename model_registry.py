@@ -0,0 +1,147 @@
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha1
+
+import joblib
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = "models"
+MAX_MEMORY_MODELS = 32     # Fitted models kept in memory, least recently used evicted first
+MAX_DISK_MODELS = 200      # Persisted model files kept on disk
+
+
+class ModelRegistry:
+    """
+    Fitted price models per (product_name, platform)
+
+    Each entry is a dict holding the fitted 'model', its 'scaler', 'confidence', 'model_name',
+    the feature row the forecast starts from ('last_row') and the price_history 'watermark'
+    (highest row id) the model was trained on. Entries live in an in-memory LRU and are
+    persisted with joblib so they survive restarts.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, max_memory=MAX_MEMORY_MODELS, max_disk=MAX_DISK_MODELS):
+        self.model_dir = model_dir
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_loads': 0, 'misses': 0, 'stale': 0, 'evictions': 0}
+        os.makedirs(self.model_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(product_name, platform):
+        return f"{platform.lower()}|{product_name}"
+
+    def _path(self, key):
+        return os.path.join(self.model_dir, sha1(key.encode('utf-8')).hexdigest() + ".joblib")
+
+    def _remember(self, key, entry):
+        """Insert into the in-memory LRU (caller holds the lock)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _load(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = joblib.load(path)
+            os.utime(path)  # Mark as recently used for disk pruning
+            return entry
+        except Exception as e:
+            logger.warning(f"Discarding unreadable model file {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _prune_disk(self):
+        """Delete the least recently used model files beyond max_disk"""
+        files = [os.path.join(self.model_dir, name) for name in os.listdir(self.model_dir)
+                 if name.endswith(".joblib")]
+        if len(files) <= self.max_disk:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, product_name, platform, watermark):
+        """Return the stored entry if it was trained on data up to `watermark`, else None"""
+        key = self.make_key(product_name, platform)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        from_disk = False
+        if entry is None:
+            entry = self._load(key)
+            from_disk = entry is not None
+
+        with self._lock:
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry['watermark'] != watermark:
+                self.stats['stale'] += 1
+                return None
+            if from_disk:
+                self.stats['disk_loads'] += 1
+                self._remember(key, entry)
+            else:
+                self.stats['hits'] += 1
+            return entry
+
+    def put(self, product_name, platform, entry):
+        """Store a freshly trained entry in memory and on disk"""
+        key = self.make_key(product_name, platform)
+        entry = dict(entry, trained_at=time.time())
+        with self._lock:
+            self._remember(key, entry)
+        try:
+            joblib.dump(entry, self._path(key))
+            self._prune_disk()
+        except Exception as e:
+            logger.error(f"Could not persist model for {key}: {e}")
+        return entry
+
+    def invalidate(self, product_name, platform):
+        """Forget the model for one product"""
+        key = self.make_key(product_name, platform)
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_memory=len(self._entries))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Return the process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,242 @@
+import smtplib
+import time
+import logging
+from collections import OrderedDict
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 60          # Seconds before the first retry; doubles with every failed attempt
+MAX_BACKOFF = 6 * 3600
+SEND_BATCH = 500           # Outbox rows picked up per send_pending() call
+
+
+def create_outbox_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            old_price REAL NOT NULL,
+            new_price REAL NOT NULL,
+            product_url TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(status, next_attempt_at)
+    """)
+
+
+def _drop_section_html(product_name, platform, old_price, new_price, product_url):
+    # Calculate savings
+    savings = old_price - new_price
+    savings_percent = (savings / old_price) * 100
+    return f"""
+                <div style="margin: 20px 0; padding: 20px; border: 2px solid #4CAF50; border-radius: 10px; background-color: #E8F5E9;">
+                  <h2 style="color: #2E7D32;">Great News! The price has dropped!</h2>
+
+                  <p><strong>Product:</strong> {product_name}</p>
+                  <p><strong>Platform:</strong> {platform}</p>
+
+                  <div style="margin: 15px 0;">
+                    <p style="text-decoration: line-through; color: #999;">Old Price: ₹{old_price:,.2f}</p>
+                    <p style="font-size: 24px; color: #4CAF50; font-weight: bold;">New Price: ₹{new_price:,.2f}</p>
+                  </div>
+
+                  <div style="background-color: #FFF3E0; padding: 15px; border-radius: 5px; margin: 15px 0;">
+                    <p style="color: #FF6F00; font-size: 18px; font-weight: bold; margin: 0;">
+                      You Save: ₹{savings:,.2f} ({savings_percent:.1f}%)
+                    </p>
+                  </div>
+
+                  <a href="{product_url}"
+                     style="display: inline-block; background-color: #4CAF50; color: white; padding: 15px 30px;
+                            text-decoration: none; border-radius: 5px; font-weight: bold; margin-top: 15px;">
+                    Buy Now
+                  </a>
+                </div>
+    """
+
+
+def build_drop_email(from_email, to_email, drops):
+    """
+    One email covering every price drop for a user
+
+    `drops` is a list of (product_name, platform, old_price, new_price, product_url).
+    A single drop keeps the original 'Price Drop Alert: <product>' subject.
+    """
+    msg = MIMEMultipart('alternative')
+    if len(drops) == 1:
+        msg['Subject'] = f'Price Drop Alert: {drops[0][0]}'
+    else:
+        msg['Subject'] = f'Price Drop Alert: {len(drops)} products you watch got cheaper'
+    msg['From'] = from_email
+    msg['To'] = to_email
+
+    sections = "".join(_drop_section_html(*drop) for drop in drops)
+    html = f"""
+            <html>
+              <body style="font-family: Arial, sans-serif; padding: 20px;">
+                <div style="background: linear-gradient(90deg, #2874F0 0%, #FF9900 100%); color: white; padding: 20px; border-radius: 10px;">
+                  <h1>Price Drop Alert!</h1>
+                </div>
+                {sections}
+                <p style="color: #666; font-size: 12px; margin-top: 20px;">
+                  This is an automated alert from CompareIT.
+                  To manage your alerts, log in to your account.
+                </p>
+              </body>
+            </html>
+            """
+    msg.attach(MIMEText(html, 'html'))
+    return msg
+
+
+def open_smtp(smtp_config):
+    """Connect, STARTTLS and log in once (TLS/login are skipped when use_tls is False / no password)"""
+    server = smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port'], timeout=30)
+    if smtp_config.get('use_tls', True):
+        server.starttls()
+    if smtp_config.get('password'):
+        server.login(smtp_config['from_email'], smtp_config['password'])
+    return server
+
+
+class NotificationSender:
+    """
+    Delivers queued price-drop notifications from the notification_outbox table
+
+    All pending drops for the same user become one digest email, and every digest in a run
+    goes over one authenticated SMTP session. Failed deliveries are retried with exponential
+    backoff and marked 'failed' after MAX_ATTEMPTS.
+    """
+
+    def __init__(self, db, smtp_config, connect=open_smtp):
+        self.db = db
+        self.smtp_config = smtp_config
+        self.connect = connect
+        self.stats = {'emails_sent': 0, 'notifications_sent': 0, 'retries': 0, 'failed': 0, 'connections': 0}
+
+    def enqueue(self, drops):
+        """Queue drops (dicts with user_email, product_name, platform, old_price, new_price, product_url)"""
+        now = time.time()
+        rows = [(d['user_email'], d['product_name'], d['platform'], d['old_price'], d['new_price'],
+                 d['product_url'], now) for d in drops]
+        if not rows:
+            return 0
+
+        def insert(conn):
+            conn.executemany("""
+                INSERT INTO notification_outbox
+                (user_email, product_name, platform, old_price, new_price, product_url, next_attempt_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            return len(rows)
+        return self.db.write(insert)
+
+    def _due(self, limit):
+        rows = self.db.query("""
+            SELECT id, user_email, product_name, platform, old_price, new_price, product_url, attempts
+            FROM notification_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+        """, (time.time(), limit))
+        digests = OrderedDict()
+        for row in rows:
+            digests.setdefault(row[1], []).append(row)
+        return digests
+
+    def _record(self, sent_ids, failures):
+        """Mark delivered rows sent and schedule retries, all in one transaction"""
+        now = time.time()
+        retry_rows, failed_rows = [], []
+        for (row_id, attempts), error in failures:
+            attempts += 1
+            if attempts >= MAX_ATTEMPTS:
+                failed_rows.append((attempts, error, row_id))
+            else:
+                delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempts - 1))
+                retry_rows.append((attempts, now + delay, error, row_id))
+
+        def update(conn):
+            conn.executemany("""
+                UPDATE notification_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP WHERE id = ?
+            """, [(row_id,) for row_id in sent_ids])
+            conn.executemany("""
+                UPDATE notification_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?
+            """, retry_rows)
+            conn.executemany("""
+                UPDATE notification_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?
+            """, failed_rows)
+        self.db.write(update)
+
+        self.stats['retries'] += len(retry_rows)
+        self.stats['failed'] += len(failed_rows)
+
+    @staticmethod
+    def _close(server):
+        """End an SMTP session, dropping the socket if the server no longer answers"""
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def send_pending(self, limit=SEND_BATCH):
+        """Send every due notification as per-user digests over one SMTP session; returns emails sent"""
+        digests = list(self._due(limit).items())
+        if not digests:
+            return 0
+
+        sent_ids, failures = [], []
+        server = None
+        emails_sent = 0
+        try:
+            for index, (user_email, rows) in enumerate(digests):
+                msg = build_drop_email(self.smtp_config['from_email'], user_email,
+                                       [row[2:7] for row in rows])
+                if server is None:
+                    try:
+                        server = self.connect(self.smtp_config)
+                    except (smtplib.SMTPException, OSError) as e:
+                        # Server unreachable or login refused: the rest of the batch backs off together
+                        logger.warning(f"Could not open an SMTP session: {e}")
+                        failures.extend(((row[0], row[7]), str(e))
+                                        for _, pending in digests[index:] for row in pending)
+                        break
+                    self.stats['connections'] += 1
+                try:
+                    server.send_message(msg)
+                    sent_ids.extend(row[0] for row in rows)
+                    emails_sent += 1
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    # Connection trouble: the next digest reconnects once the session is dropped
+                    logger.warning(f"SMTP connection lost while sending to {user_email}: {e}")
+                    failures.extend(((row[0], row[7]), str(e)) for row in rows)
+                    self._close(server)
+                    server = None
+                except smtplib.SMTPException as e:
+                    logger.warning(f"Could not send digest to {user_email}: {e}")
+                    failures.extend(((row[0], row[7]), str(e)) for row in rows)
+        finally:
+            try:
+                if server is not None:
+                    self._close(server)
+            finally:
+                self._record(sent_ids, failures)
+
+        self.stats['emails_sent'] += emails_sent
+        self.stats['notifications_sent'] += len(sent_ids)
+        logger.info(f"Sent {emails_sent} digest emails covering {len(sent_ids)} price drops "
+                    f"({len(failures)} notifications to retry)")
+        return emails_sent
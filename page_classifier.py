@@ -0,0 +1,224 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+
+from http_fetcher import BLOCKED_STATUSES
+from rate_limiter import url_host
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Page states
+OK = 'ok'
+CAPTCHA = 'captcha'
+ROBOT_CHECK = 'robot_check'
+EMPTY_RESULTS = 'empty_results'
+LAYOUT_CHANGED = 'layout_changed'
+
+BLOCK_WINDOW = 300        # Seconds a host is skipped after a captcha / robot check
+MAX_BLOCK_WINDOW = 3600   # Cap on the window, which doubles with each block in a row
+PROBE_TIMEOUT = 120       # Seconds before another probe is allowed if the last one never reported back
+
+# Lower-case markers per platform. Result markers win: a page with product cards is never a block page.
+PAGE_MARKERS = {
+    'amazon': {
+        'results': ('data-component-type="s-search-result"',),
+        'captcha': ('validatecaptcha', 'captchacharacters', 'type the characters you see'),
+        'robot_check': ('<title>robot check', 'automated access to amazon data', 'api-services-support@amazon.com'),
+        'empty': ('did not match any products', 'no results for'),
+    },
+    'flipkart': {
+        'results': ('/p/itm',),
+        'captcha': ('g-recaptcha', 'captcha-container'),
+        'robot_check': ('are you a human', 'verify you are a human', 'unusual traffic'),
+        'empty': ('sorry, no results found', 'did not match any products'),
+    },
+    '': {
+        'results': (),
+        'captcha': ('captcha',),
+        'robot_check': ('robot check', 'are you a human'),
+        'empty': (),
+    },
+}
+
+
+class PageClassification(namedtuple('PageClassification', ['state', 'platform', 'reason'])):
+    """What a fetched page turned out to be, e.g. PageClassification('captcha', 'amazon', "'captchacharacters'")"""
+
+    __slots__ = ()
+
+    @property
+    def blocked(self):
+        return self.state in (CAPTCHA, ROBOT_CHECK)
+
+    @property
+    def final(self):
+        """A definitive answer without results, which rendering the page in a browser would not change"""
+        return self.state == EMPTY_RESULTS
+
+
+class PageStateError(RuntimeError):
+    """A search page that cannot yield products; carries its PageClassification"""
+
+    def __init__(self, page, message=None):
+        super().__init__(message or f"{page.platform or 'site'} search page: {page.state.replace('_', ' ')} "
+                                    f"({page.reason})")
+        self.page = page
+
+
+class NoResultsError(PageStateError):
+    """The site answered, but the search matched nothing"""
+
+
+class PageBlockedError(PageStateError):
+    """The site served a captcha or robot check instead of results"""
+
+
+class CircuitOpenError(PageBlockedError):
+    """A request skipped because its host blocked us recently"""
+
+    def __init__(self, page, host, retry_after):
+        super().__init__(page, f"{host} is blocking scrapers ({page.state.replace('_', ' ')}); "
+                               f"not retrying for another {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def _find_marker(html, markers):
+    for marker in markers:
+        if marker in html:
+            return marker
+    return None
+
+
+def classify_page(html, platform='', status_code=200):
+    """
+    Classify a search page snapshot as ok, captcha, robot_check, empty_results or layout_changed
+
+    Cheap enough to run on the first snapshot after navigation: a handful of substring checks.
+    """
+    platform = platform.lower()
+    markers = PAGE_MARKERS.get(platform, PAGE_MARKERS[''])
+    if status_code in BLOCKED_STATUSES:
+        return PageClassification(ROBOT_CHECK, platform, f"HTTP {status_code}")
+
+    text = html.lower()
+    marker = _find_marker(text, markers['results'])
+    if marker:
+        return PageClassification(OK, platform, repr(marker))
+    for state, key in ((CAPTCHA, 'captcha'), (ROBOT_CHECK, 'robot_check'), (EMPTY_RESULTS, 'empty')):
+        marker = _find_marker(text, markers[key])
+        if marker:
+            return PageClassification(state, platform, repr(marker))
+    return PageClassification(LAYOUT_CHANGED, platform, "no result cards or known page markers")
+
+
+class CircuitBreaker:
+    """
+    Per-host block windows
+
+    A captcha or robot check opens the host's circuit for BLOCK_WINDOW seconds, doubling
+    with each consecutive block up to MAX_BLOCK_WINDOW. While open, before_request() raises
+    CircuitOpenError at once. When the window ends a single probe request is let through
+    (half-open): a good page closes the circuit, another block reopens it.
+    """
+
+    def __init__(self, window=BLOCK_WINDOW, max_window=MAX_BLOCK_WINDOW):
+        self.window = window
+        self.max_window = max_window
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.stats = {'blocks': 0, 'short_circuits': 0, 'probes': 0, 'recoveries': 0}
+
+    def before_request(self, url):
+        """Raise CircuitOpenError if `url`'s host is inside a block window"""
+        host = url_host(url)
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                return
+            now = time.time()
+            remaining = entry['until'] - now
+            if remaining <= 0 and now - entry['probe_at'] > PROBE_TIMEOUT:
+                entry['probe_at'] = now
+                self.stats['probes'] += 1
+                logger.info(f"Block window for {host} over, letting one probe request through")
+                return
+            self.stats['short_circuits'] += 1
+            page = entry['page']
+        raise CircuitOpenError(page, host, max(remaining, 0))
+
+    def record_block(self, url, page):
+        host = url_host(url)
+        with self._lock:
+            entry = self._hosts.get(host)
+            strikes = entry['strikes'] + 1 if entry else 1
+            window = min(self.window * 2 ** (strikes - 1), self.max_window)
+            self._hosts[host] = {'until': time.time() + window, 'strikes': strikes, 'page': page, 'probe_at': 0.0}
+            self.stats['blocks'] += 1
+        logger.warning(f"{host} served a {page.state} page ({page.reason}); skipping it for {window}s")
+
+    def record_success(self, url):
+        host = url_host(url)
+        with self._lock:
+            if self._hosts.pop(host, None) is not None:
+                self.stats['recoveries'] += 1
+                logger.info(f"{host} is serving results again")
+
+    def state(self, url):
+        """'closed', 'open' or 'half_open' for `url`'s host"""
+        with self._lock:
+            entry = self._hosts.get(url_host(url))
+            if entry is None:
+                return 'closed'
+            return 'open' if entry['until'] > time.time() else 'half_open'
+
+    def get_stats(self):
+        now = time.time()
+        with self._lock:
+            open_hosts = {host: {'state': entry['page'].state, 'retry_after': max(0.0, entry['until'] - now),
+                                 'strikes': entry['strikes']}
+                          for host, entry in self._hosts.items()}
+            return dict(self.stats, hosts=open_hosts)
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker"""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
+
+
+def check_page(url, page, partial=False):
+    """
+    Act on a page classification: raise for blocked and empty pages, report the rest
+
+    Blocks open the host's circuit and raise PageBlockedError; empty results raise
+    NoResultsError. With partial=True (a first snapshot taken before the page finished
+    rendering) a missing result list is expected, so only those early-abort states count.
+    Returns the classification otherwise.
+
+    The rate limiter is not told here: each load reports its own block where it was made
+    (TieredFetcher.fetch_http, or the 'blocked' flag of a rate_limiter permit).
+    """
+    breaker = get_circuit_breaker()
+    if page.blocked:
+        breaker.record_block(url, page)
+        raise PageBlockedError(page)
+    if page.state == EMPTY_RESULTS:
+        breaker.record_success(url)
+        raise NoResultsError(page)
+    if not partial:
+        if page.state == OK:
+            breaker.record_success(url)
+        else:
+            logger.warning(f"Unrecognised {page.platform} page at {url}: {page.reason}")
+    return page
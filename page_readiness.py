@@ -0,0 +1,116 @@
+import logging
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Card / review selectors the scrapers wait on (CSS so one JS call can count them)
+AMAZON_RESULT_SELECTOR = 'div[data-component-type="s-search-result"], div.s-result-item'
+FLIPKART_RESULT_SELECTOR = 'div.cPHDOP, div.col-12-12'
+FLIPKART_REVIEW_SELECTOR = 'div.ZmyHeo, div.t-ZTKy, div._6K-7Co'
+FLIPKART_REVIEW_TITLE_SELECTOR = 'p.z9E0IG, p._2-N8zT, div._2sc7ZR._2V5EHH'
+AMAZON_PRODUCT_SELECTOR = '#productTitle, #corePriceDisplay_desktop_feature_div, #priceblock_ourprice'
+FLIPKART_PRODUCT_SELECTOR = 'span.VU-ZEz, h1.yhB1nd, div.Nx9bqj, div._30jeq3'
+
+POLL_INTERVAL = 0.1   # Seconds between DOM checks
+SETTLE_TIME = 0.4     # How long a condition must hold before the page counts as ready
+
+_COUNT_SCRIPT = "return [document.readyState, document.querySelectorAll(arguments[0]).length];"
+# Counts resource loads with a PerformanceObserver installed on first poll (buffered: true replays earlier
+# entries). Observers keep receiving entries after the Resource Timing buffer fills at its 250-entry default,
+# so the count keeps moving on heavy pages where getEntriesByType('resource') would freeze.
+_RESOURCE_SCRIPT = """
+if (window.__readinessResources === undefined) {
+    window.__readinessResources = 0;
+    new PerformanceObserver(function (list) {
+        window.__readinessResources += list.getEntries().length;
+    }).observe({type: 'resource', buffered: true});
+    performance.clearResourceTimings();
+}
+return [document.readyState, window.__readinessResources];
+"""
+
+
+def _poll_until_stable(driver, script, args, is_ready, timeout, settle):
+    """Poll a JS probe until its value is ready and unchanged for `settle` seconds, capped at `timeout`"""
+    start = time.time()
+    deadline = start + timeout
+    last_value = None
+    stable_since = None
+
+    while True:
+        try:
+            value = tuple(driver.execute_script(script, *args))
+        except Exception as e:
+            logger.debug(f"Readiness probe failed: {e}")
+            value = None
+
+        now = time.time()
+        if value != last_value:
+            last_value = value
+            stable_since = now
+        elif value is not None and is_ready(value) and now - stable_since >= settle:
+            logger.debug(f"Page ready after {now - start:.2f}s ({value})")
+            return value, True
+
+        if now >= deadline:
+            logger.info(f"Readiness wait hit {timeout}s cap ({last_value})")
+            return last_value, False
+
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_for_document_ready(driver, timeout=10):
+    """Wait until document.readyState is no longer 'loading'"""
+    value, ready = _poll_until_stable(
+        driver, _COUNT_SCRIPT, ('body',),
+        lambda v: v[0] in ('interactive', 'complete'),
+        timeout, settle=0
+    )
+    return ready
+
+
+def wait_for_stable_count(driver, css_selector, min_count=1, timeout=10, settle=SETTLE_TIME):
+    """
+    Wait until at least `min_count` elements match `css_selector` and the count stops changing
+
+    Returns the final element count (which may be below `min_count` if the cap was hit).
+    """
+    value, ready = _poll_until_stable(
+        driver, _COUNT_SCRIPT, (css_selector,),
+        lambda v: v[0] != 'loading' and v[1] >= min_count,
+        timeout, settle
+    )
+    return value[1] if value else 0
+
+
+def wait_for_network_idle(driver, timeout=10, settle=0.5):
+    """
+    Wait until the page has finished loading and no new resource requests start for `settle` seconds
+
+    Counts Resource Timing entries through a PerformanceObserver as the network-activity signal,
+    which works for both local and remote drivers without enabling Chrome performance logging.
+    """
+    value, ready = _poll_until_stable(
+        driver, _RESOURCE_SCRIPT, (),
+        lambda v: v[0] == 'complete',
+        timeout, settle
+    )
+    return ready
+
+
+def wait_for_navigation(driver, old_element, css_selector=None, timeout=10):
+    """Wait for a click-triggered navigation: the old element goes stale, then new content settles"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            old_element.is_enabled()
+        except Exception:
+            break  # Element detached from the DOM - the page changed
+        time.sleep(POLL_INTERVAL)
+
+    remaining = max(0, deadline - time.time())
+    if css_selector:
+        return wait_for_stable_count(driver, css_selector, timeout=remaining) > 0
+    return wait_for_document_ready(driver, timeout=remaining)
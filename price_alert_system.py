@@ -1,20 +1,25 @@
-import sqlite3
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import os
+import socket
+import argparse
 from datetime import datetime
 import schedule
 import time
 import threading
+from db_manager import get_database
+from price_rechecker import PriceRechecker, is_price_drop
+from notification_sender import NotificationSender, create_outbox_table, build_drop_email, open_smtp
 
 class PriceAlertSystem:
     def __init__(self, db_name="price_alerts.db"):
         self.db_name = db_name
+        self.db = get_database(db_name)
         self.create_tables()
         
     def create_tables(self):
         """Create tables for price alerts"""
-        conn = sqlite3.connect(self.db_name)
+        self.db.write(self._create_tables)
+    
+    def _create_tables(self, conn):
         cursor = conn.cursor()
         
         # Table for user alerts
@@ -44,152 +49,108 @@ class PriceAlertSystem:
             )
         """)
         
-        conn.commit()
-        conn.close()
+        # Price drops waiting to be emailed
+        create_outbox_table(conn)
     
     def add_price_alert(self, user_email, product_name, product_url, platform, current_price, target_price=None):
         """Add a new price alert for a user"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO price_alerts 
-            (user_email, product_name, product_url, platform, current_price, target_price, last_checked)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (user_email, product_name, product_url, platform, current_price, target_price, datetime.now()))
-        
-        alert_id = cursor.lastrowid
-        
-        # Add to price history
-        cursor.execute("""
-            INSERT INTO price_history (alert_id, price)
-            VALUES (?, ?)
-        """, (alert_id, current_price))
-        
-        conn.commit()
-        conn.close()
+        def insert(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO price_alerts 
+                (user_email, product_name, product_url, platform, current_price, target_price, last_checked)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_email, product_name, product_url, platform, current_price, target_price, datetime.now()))
+            
+            alert_id = cursor.lastrowid
+            
+            # Add to price history
+            cursor.execute("""
+                INSERT INTO price_history (alert_id, price)
+                VALUES (?, ?)
+            """, (alert_id, current_price))
+            return alert_id
         
-        return alert_id
+        return self.db.write(insert)
     
     def get_user_alerts(self, user_email):
         """Get all active alerts for a user"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        return self.db.query("""
             SELECT id, product_name, platform, current_price, target_price, product_url
             FROM price_alerts
             WHERE user_email = ? AND is_active = 1
             ORDER BY created_at DESC
         """, (user_email,))
-        
-        alerts = cursor.fetchall()
-        conn.close()
-        
-        return alerts
     
     def update_price(self, alert_id, new_price):
         """Update the price for an alert"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Get old price
-        cursor.execute("SELECT current_price FROM price_alerts WHERE id = ?", (alert_id,))
-        old_price = cursor.fetchone()[0]
-        
-        # Update alert
-        cursor.execute("""
-            UPDATE price_alerts
-            SET current_price = ?, last_checked = ?
-            WHERE id = ?
-        """, (new_price, datetime.now(), alert_id))
+        def update(conn):
+            cursor = conn.cursor()
+            
+            # Get old price
+            cursor.execute("SELECT current_price FROM price_alerts WHERE id = ?", (alert_id,))
+            old_price = cursor.fetchone()[0]
+            
+            # Update alert
+            cursor.execute("""
+                UPDATE price_alerts
+                SET current_price = ?, last_checked = ?
+                WHERE id = ?
+            """, (new_price, datetime.now(), alert_id))
+            
+            # Add to history
+            cursor.execute("""
+                INSERT INTO price_history (alert_id, price)
+                VALUES (?, ?)
+            """, (alert_id, new_price))
+            return old_price
         
-        # Add to history
-        cursor.execute("""
-            INSERT INTO price_history (alert_id, price)
-            VALUES (?, ?)
-        """, (alert_id, new_price))
+        return self.db.write(update), new_price
+    
+    def record_prices(self, prices):
+        """Update many alerts' prices and history in one transaction; `prices` maps alert_id to new price"""
+        if not prices:
+            return 0
+        now = datetime.now()
         
-        conn.commit()
-        conn.close()
+        def update(conn):
+            conn.executemany("""
+                UPDATE price_alerts
+                SET current_price = ?, last_checked = ?
+                WHERE id = ?
+            """, [(price, now, alert_id) for alert_id, price in prices.items()])
+            conn.executemany("""
+                INSERT INTO price_history (alert_id, price)
+                VALUES (?, ?)
+            """, list(prices.items()))
+            return len(prices)
         
-        return old_price, new_price
+        return self.db.write(update)
+    
+    def get_active_alerts(self):
+        """All active alerts as (id, user_email, product_name, product_url, platform, current_price, target_price)"""
+        return self.db.query("""
+            SELECT id, user_email, product_name, product_url, platform, current_price, target_price
+            FROM price_alerts
+            WHERE is_active = 1
+        """)
     
     def delete_alert(self, alert_id):
         """Deactivate an alert"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.db.execute("""
             UPDATE price_alerts
             SET is_active = 0
             WHERE id = ?
         """, (alert_id,))
-        
-        conn.commit()
-        conn.close()
     
     def send_email_alert(self, to_email, product_name, platform, old_price, new_price, product_url, smtp_config):
         """Send email notification for price drop"""
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f'Price Drop Alert: {product_name}'
-            msg['From'] = smtp_config['from_email']
-            msg['To'] = to_email
-            
-            # Calculate savings
-            savings = old_price - new_price
-            savings_percent = (savings / old_price) * 100
-            
-            # Create HTML email
-            html = f"""
-            <html>
-              <body style="font-family: Arial, sans-serif; padding: 20px;">
-                <div style="background: linear-gradient(90deg, #2874F0 0%, #FF9900 100%); color: white; padding: 20px; border-radius: 10px;">
-                  <h1>Price Drop Alert!</h1>
-                </div>
-                
-                <div style="margin: 20px 0; padding: 20px; border: 2px solid #4CAF50; border-radius: 10px; background-color: #E8F5E9;">
-                  <h2 style="color: #2E7D32;">Great News! The price has dropped!</h2>
-                  
-                  <p><strong>Product:</strong> {product_name}</p>
-                  <p><strong>Platform:</strong> {platform}</p>
-                  
-                  <div style="margin: 15px 0;">
-                    <p style="text-decoration: line-through; color: #999;">Old Price: ₹{old_price:,.2f}</p>
-                    <p style="font-size: 24px; color: #4CAF50; font-weight: bold;">New Price: ₹{new_price:,.2f}</p>
-                  </div>
-                  
-                  <div style="background-color: #FFF3E0; padding: 15px; border-radius: 5px; margin: 15px 0;">
-                    <p style="color: #FF6F00; font-size: 18px; font-weight: bold; margin: 0;">
-                      You Save: ₹{savings:,.2f} ({savings_percent:.1f}%)
-                    </p>
-                  </div>
-                  
-                  <a href="{product_url}" 
-                     style="display: inline-block; background-color: #4CAF50; color: white; padding: 15px 30px; 
-                            text-decoration: none; border-radius: 5px; font-weight: bold; margin-top: 15px;">
-                    Buy Now
-                  </a>
-                </div>
-                
-                <p style="color: #666; font-size: 12px; margin-top: 20px;">
-                  This is an automated alert from CompareIT. 
-                  To manage your alerts, log in to your account.
-                </p>
-              </body>
-            </html>
-            """
-            
-            # Attach HTML content
-            html_part = MIMEText(html, 'html')
-            msg.attach(html_part)
+            msg = build_drop_email(smtp_config['from_email'], to_email,
+                                   [(product_name, platform, old_price, new_price, product_url)])
             
             # Send email
-            with smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port']) as server:
-                server.starttls()
-                server.login(smtp_config['from_email'], smtp_config['password'])
+            with open_smtp(smtp_config) as server:
                 server.send_message(msg)
             
             print(f"Email sent successfully to {to_email}")
@@ -199,46 +160,160 @@ class PriceAlertSystem:
             print(f"Failed to send email: {e}")
             return False
     
-    def check_price_drops(self, smtp_config):
+    def check_price_drops(self, smtp_config, driver_path="chromedriver.exe", rechecker=None):
         """Check all active alerts for price drops"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        rechecker = rechecker or PriceRechecker(driver_path)
+        changes, prices = rechecker.run(self.get_active_alerts())
         
-        cursor.execute("""
-            SELECT id, user_email, product_name, product_url, platform, current_price, target_price
-            FROM price_alerts
-            WHERE is_active = 1
-        """)
+        # Every fetched price lands in one transaction, then the drops go through the outbox
+        self.record_prices(prices)
         
-        alerts = cursor.fetchall()
-        conn.close()
+        drops = [change for change in changes
+                 if is_price_drop(change['old_price'], change['new_price'], change['target_price'])]
+        sender = NotificationSender(self.db, smtp_config)
+        sender.enqueue(drops)
+        emails_sent = sender.send_pending()
         
-        for alert in alerts:
-            alert_id, user_email, product_name, product_url, platform, current_price, target_price = alert
-            
-            # In a real implementation, you would scrape the current price here
-            # For now, we'll simulate a price check
-            # new_price = scrape_current_price(product_url, platform)
-            
-            # Simulated: randomly decide if price dropped (for testing)
-            import random
-            if random.random() < 0.1:  # 10% chance of price drop
-                new_price = current_price * 0.9  # 10% discount
-                
-                # Check if price dropped below target or just dropped in general
-                should_alert = False
-                if target_price:
-                    if new_price <= target_price:
-                        should_alert = True
-                elif new_price < current_price:
-                    should_alert = True
-                
-                if should_alert:
-                    self.send_email_alert(
-                        user_email, product_name, platform, 
-                        current_price, new_price, product_url, smtp_config
-                    )
-                    self.update_price(alert_id, new_price)
+        return dict(rechecker.stats, drops=len(drops), emails_sent=emails_sent)
+
+
+CHECK_INTERVAL_MINUTES = 30
+LEASE_TTL = 300               # Seconds a daemon's lock stays valid without a heartbeat
+HEARTBEAT_INTERVAL = 60       # Seconds between lease renewals
+
+
+class AlertDaemon:
+    """
+    Runs check_price_drops on a schedule outside the Streamlit process
+
+    A lease row in the alerts database makes sure only one daemon checks prices at a time;
+    the holder renews it from a heartbeat thread and another instance can take over once it
+    expires. Every run is recorded in the check_runs table.
+    """
+    LEASE_NAME = 'price_check_daemon'
+
+    def __init__(self, alert_system, smtp_config, interval_minutes=CHECK_INTERVAL_MINUTES,
+                 driver_path="chromedriver.exe"):
+        self.alert_system = alert_system
+        self.db = alert_system.db
+        self.smtp_config = smtp_config
+        self.interval_minutes = interval_minutes
+        self.driver_path = driver_path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self.create_tables()
+    
+    def create_tables(self):
+        """Create the lease and run-metrics tables"""
+        def create(conn):
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daemon_leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    acquired_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS check_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    owner TEXT NOT NULL,
+                    started_at TIMESTAMP NOT NULL,
+                    duration REAL,
+                    status TEXT NOT NULL,
+                    alerts_checked INTEGER,
+                    urls_checked INTEGER,
+                    fetch_failures INTEGER,
+                    drops INTEGER,
+                    emails_sent INTEGER,
+                    error TEXT
+                )
+            """)
+        self.db.write(create)
+    
+    def acquire_lease(self):
+        """Take the lease if it is free, expired or already ours; returns True when held"""
+        def acquire(conn):
+            now = time.time()
+            conn.execute("DELETE FROM daemon_leases WHERE name = ? AND expires_at < ?", (self.LEASE_NAME, now))
+            conn.execute("""
+                INSERT OR IGNORE INTO daemon_leases (name, owner, acquired_at, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (self.LEASE_NAME, self.owner, now, now + LEASE_TTL))
+            cursor = conn.execute("""
+                UPDATE daemon_leases SET expires_at = ? WHERE name = ? AND owner = ?
+            """, (now + LEASE_TTL, self.LEASE_NAME, self.owner))
+            return cursor.rowcount == 1
+        return self.db.write(acquire)
+    
+    def release_lease(self):
+        self.db.execute("DELETE FROM daemon_leases WHERE name = ? AND owner = ?", (self.LEASE_NAME, self.owner))
+    
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                held = self.acquire_lease()
+            except Exception as e:
+                print(f"Lease renewal failed: {e}")
+                continue
+            if not held:
+                print("Lost the daemon lease to another instance, stopping")
+                self._stop.set()
+    
+    def run_check(self):
+        """Run one price check and record its metrics"""
+        started = datetime.now()
+        start = time.time()
+        try:
+            stats = self.alert_system.check_price_drops(self.smtp_config, driver_path=self.driver_path)
+            row = ('ok', stats['alerts'], stats['urls'], stats['urls'] - stats['prices_found'],
+                   stats['drops'], stats['emails_sent'], None)
+        except Exception as e:
+            print(f"Price check failed: {e}")
+            row = ('error', None, None, None, None, None, str(e))
+        
+        duration = time.time() - start
+        self.db.execute("""
+            INSERT INTO check_runs
+            (owner, started_at, duration, status, alerts_checked, urls_checked, fetch_failures, drops, emails_sent, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (self.owner, started, duration) + row)
+        print(f"Price check {row[0]} in {duration:.1f}s: {row[1]} alerts, {row[2]} URLs, "
+              f"{row[3]} fetch failures, {row[4]} drops")
+    
+    def serve(self):
+        """Hold the lease and run checks every interval until interrupted; returns False if another daemon runs"""
+        if not self.acquire_lease():
+            print("Another price check daemon holds the lease, exiting")
+            return False
+        
+        print(f"Price check daemon {self.owner} started, checking every {self.interval_minutes} minutes")
+        heartbeat = threading.Thread(target=self._heartbeat, name="alert-daemon-heartbeat", daemon=True)
+        heartbeat.start()
+        
+        scheduler = schedule.Scheduler()
+        scheduler.every(self.interval_minutes).minutes.do(self.run_check)
+        try:
+            self.run_check()
+            while not self._stop.is_set():
+                scheduler.run_pending()
+                self._stop.wait(1)
+        except KeyboardInterrupt:
+            print("Stopping price check daemon")
+        finally:
+            self._stop.set()
+            self.release_lease()
+        return True
+    
+    def status(self, runs=10):
+        """Current lease holder and the most recent runs"""
+        lease = self.db.query_one("SELECT owner, acquired_at, expires_at FROM daemon_leases WHERE name = ?",
+                                  (self.LEASE_NAME,))
+        recent = self.db.query("""
+            SELECT started_at, duration, status, alerts_checked, urls_checked, fetch_failures, drops, emails_sent, error
+            FROM check_runs ORDER BY id DESC LIMIT ?
+        """, (runs,))
+        return lease, recent
 
 
 # Configuration for SMTP (you need to fill these)
@@ -248,19 +323,74 @@ SMTP_CONFIG = {
     'from_email': 'your-email@gmail.com',  # Your email
     'password': 'your-app-password'  # App password (not regular password)
 }
+SMTP_PASSWORD_ENV = 'COMPAREIT_SMTP_PASSWORD'   # The daemon reads the SMTP password from here
 
-# Usage example
-if __name__ == "__main__":
-    alert_system = PriceAlertSystem()
+
+def smtp_config_from_args(args):
+    """SMTP_CONFIG with the command-line overrides and the password from the environment"""
+    return dict(SMTP_CONFIG, smtp_server=args.smtp_server, smtp_port=args.smtp_port, from_email=args.from_email,
+                password=os.environ.get(SMTP_PASSWORD_ENV, SMTP_CONFIG['password']), use_tls=not args.no_tls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CompareIT price alerts")
+    parser.add_argument('--db', default="price_alerts.db")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    serve = subparsers.add_parser('serve', help="Run scheduled price checks until interrupted")
+    serve.add_argument('--interval', type=float, default=CHECK_INTERVAL_MINUTES, help="Minutes between checks")
+    serve.add_argument('--driver-path', default=os.environ.get('CHROMEDRIVER', 'chromedriver.exe'))
+    serve.add_argument('--smtp-server', default=os.environ.get('COMPAREIT_SMTP_SERVER', SMTP_CONFIG['smtp_server']))
+    serve.add_argument('--smtp-port', type=int,
+                       default=int(os.environ.get('COMPAREIT_SMTP_PORT', SMTP_CONFIG['smtp_port'])))
+    serve.add_argument('--from-email', default=os.environ.get('COMPAREIT_FROM_EMAIL', SMTP_CONFIG['from_email']),
+                       help=f"Sender address; the password is read from ${SMTP_PASSWORD_ENV}")
+    serve.add_argument('--no-tls', action='store_true', help="Skip STARTTLS (e.g. a local relay)")
+    
+    status = subparsers.add_parser('status', help="Show the lease holder and recent check runs")
+    status.add_argument('--runs', type=int, default=10)
+    
+    args = parser.parse_args()
+    alert_system = PriceAlertSystem(args.db)
     
-    # Example: Add a price alert
-    alert_system.add_price_alert(
-        user_email="user@example.com",
-        product_name="Samsung Galaxy S24",
-        product_url="https://www.amazon.in/...",
-        platform="Amazon",
-        current_price=75000.0,
-        target_price=70000.0  # Optional: alert only if price drops below this
-    )
+    if args.command == 'serve':
+        smtp_config = smtp_config_from_args(args)
+        # Every drop would fail to send and retry until it is marked failed
+        if (smtp_config['from_email'] == SMTP_CONFIG['from_email']
+                or smtp_config['password'] == SMTP_CONFIG['password']):
+            parser.error(f"set --from-email and ${SMTP_PASSWORD_ENV}; the placeholder SMTP credentials cannot send mail")
+        daemon = AlertDaemon(alert_system, smtp_config, interval_minutes=args.interval, driver_path=args.driver_path)
+        if not daemon.serve():
+            raise SystemExit(1)
     
-    print("Price alert system initialized!")
\ No newline at end of file
+    elif args.command == 'status':
+        lease, recent = AlertDaemon(alert_system, SMTP_CONFIG).status(args.runs)
+        if lease and lease[2] > time.time():
+            print(f"Daemon: {lease[0]} (since {datetime.fromtimestamp(lease[1]):%Y-%m-%d %H:%M:%S}, "
+                  f"lease valid {lease[2] - time.time():.0f}s more)")
+        else:
+            print("Daemon: not running")
+        for started_at, duration, state, alerts, urls, failures, drops, sent, error in recent:
+            line = f"{started_at}  {state:<5}  {duration or 0:6.1f}s"
+            if state == 'ok':
+                line += f"  alerts={alerts} urls={urls} fetch_failures={failures} drops={drops} emails={sent}"
+            else:
+                line += f"  {error}"
+            print(line)
+    
+    else:
+        # Usage example
+        alert_system.add_price_alert(
+            user_email="user@example.com",
+            product_name="Samsung Galaxy S24",
+            product_url="https://www.amazon.in/...",
+            platform="Amazon",
+            current_price=75000.0,
+            target_price=70000.0  # Optional: alert only if price drops below this
+        )
+        
+        print("Price alert system initialized!")
+
+
+if __name__ == "__main__":
+    main()
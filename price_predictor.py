@@ -3,25 +3,62 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
+from sklearn.base import clone
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import sqlite3
 import datetime
+import calendar
 import logging
 import random
+import re
+from hashlib import sha1
 from textblob import TextBlob
+from model_registry import get_model_registry
+from db_manager import get_database
+from tracing import span
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SCHEMA_VERSION = 1   # PRAGMA user_version once price_history has product_key/date_epoch and the FTS index
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+HISTORY_COLUMNS = ['product_name', 'platform', 'price', 'date']
+
+
+def make_product_key(product_name):
+    """Stable lookup key for a product title: hash of the lower-cased, punctuation-free, whitespace-collapsed title"""
+    normalized = ' '.join(re.sub(r'[^\w\s]', ' ', product_name.lower()).split())
+    return sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def to_epoch(value):
+    """Integer epoch for a stored date string or datetime (naive values are read as UTC, like SQLite's strftime('%s'))"""
+    if isinstance(value, str):
+        value = datetime.datetime.strptime(value, DATE_FORMAT)
+    return calendar.timegm(value.timetuple())
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word, the last one as a prefix"""
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
 class PricePredictionDatabase:
     def __init__(self, db_name="price_history.db"):
         self.db_name = db_name
+        self.db = get_database(db_name)
+        self.fts_enabled = False
         self.create_tables()
     
     def create_tables(self):
         """Create tables for storing price history and predictions"""
-        conn = sqlite3.connect(self.db_name)
+        self.db.write(self._create_tables)
+    
+    def _create_tables(self, conn):
         cursor = conn.cursor()
         
         # Create price history table
@@ -34,6 +71,8 @@ class PricePredictionDatabase:
                 date TEXT NOT NULL,
                 search_term TEXT,
                 product_url TEXT,
+                product_key TEXT,
+                date_epoch INTEGER,
                 UNIQUE(product_name, platform, date)
             )
         """)
@@ -53,73 +92,205 @@ class PricePredictionDatabase:
             )
         """)
         
-        conn.commit()
-        conn.close()
+        self.migrate(conn)
     
-    def add_price_history(self, product_name, platform, price, search_term=None, product_url=None):
-        """Add a new price point to history"""
-        conn = sqlite3.connect(self.db_name)
+    def migrate(self, conn):
+        """
+        Bring price_history up to SCHEMA_VERSION
+        
+        Adds the normalized product_key and integer date_epoch columns (backfilled from
+        product_name/date), the (product_key, platform, date_epoch) index used by every
+        lookup, and a product table with an FTS5 index for fuzzy name search.
+        """
         cursor = conn.cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        
+        if version < SCHEMA_VERSION:
+            logger.info(f"Migrating {self.db_name} to schema version {SCHEMA_VERSION}")
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(price_history)")}
+            if 'product_key' not in columns:
+                cursor.execute("ALTER TABLE price_history ADD COLUMN product_key TEXT")
+            if 'date_epoch' not in columns:
+                cursor.execute("ALTER TABLE price_history ADD COLUMN date_epoch INTEGER")
+            
+            conn.create_function('make_product_key', 1, make_product_key, deterministic=True)
+            cursor.execute("""
+                UPDATE price_history
+                SET product_key = make_product_key(product_name),
+                    date_epoch = CAST(strftime('%s', date) AS INTEGER)
+                WHERE product_key IS NULL OR date_epoch IS NULL
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_price_history_key
+                ON price_history(product_key, platform, date_epoch)
+            """)
         
-        date_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS price_history_products (
+                id INTEGER PRIMARY KEY,
+                product_key TEXT NOT NULL UNIQUE,
+                product_name TEXT NOT NULL
+            )
+        """)
         try:
             cursor.execute("""
-                INSERT OR REPLACE INTO price_history 
-                (product_name, platform, price, date, search_term, product_url)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (product_name, platform, price, date_str, search_term, product_url))
-            
-            conn.commit()
+                CREATE VIRTUAL TABLE IF NOT EXISTS price_history_fts
+                USING fts5(product_name, content='price_history_products', content_rowid='id')
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS price_history_products_ai
+                AFTER INSERT ON price_history_products BEGIN
+                    INSERT INTO price_history_fts(rowid, product_name) VALUES (new.id, new.product_name);
+                END
+            """)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 not available, fuzzy product search falls back to LIKE: {e}")
+        
+        if version < SCHEMA_VERSION:
+            cursor.execute("""
+                INSERT OR IGNORE INTO price_history_products (product_key, product_name)
+                SELECT product_key, product_name FROM price_history GROUP BY product_key
+            """)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def add_price_history(self, product_name, platform, price, search_term=None, product_url=None):
+        """Add a new price point to history"""
+        if self.add_price_history_many([{
+            'product_name': product_name,
+            'platform': platform,
+            'price': price,
+            'search_term': search_term,
+            'product_url': product_url
+        }]):
             logger.info(f"Added price history: {product_name} - {platform} - ₹{price}")
+    
+    def add_price_history_many(self, records):
+        """
+        Add many price points in one transaction
+        
+        Each record is a dict with product_name, platform and price, plus optional date
+        ('%Y-%m-%d %H:%M:%S', defaults to now), search_term and product_url.
+        Returns the number of rows written (0 if the transaction was rolled back).
+        """
+        now = datetime.datetime.now().strftime(DATE_FORMAT)
+        rows = [
+            {'date': now, 'search_term': None, 'product_url': None, **record}
+            for record in records
+        ]
+        if not rows:
+            return 0
+        
+        products = {}
+        for row in rows:
+            row['product_key'] = products.setdefault(row['product_name'], make_product_key(row['product_name']))
+            row['date_epoch'] = to_epoch(row['date'])
+        
+        def insert(conn):
+            conn.executemany("""
+                INSERT OR REPLACE INTO price_history 
+                (product_name, platform, price, date, search_term, product_url, product_key, date_epoch)
+                VALUES (:product_name, :platform, :price, :date, :search_term, :product_url,
+                        :product_key, :date_epoch)
+            """, rows)
+            conn.executemany("""
+                INSERT OR IGNORE INTO price_history_products (product_key, product_name) VALUES (?, ?)
+            """, [(key, name) for name, key in products.items()])
+            return len(rows)
+        
+        try:
+            return self.db.write(insert)
         except Exception as e:
             logger.error(f"Error adding price history: {e}")
-        finally:
-            conn.close()
+            return 0
     
-    def get_price_history(self, product_name=None, platform=None, days=30):
-        """Retrieve price history for analysis"""
-        conn = sqlite3.connect(self.db_name)
-        
-        query = """
-            SELECT product_name, platform, price, date 
-            FROM price_history 
-            WHERE date >= datetime('now', '-{} days')
-        """.format(days)
+    def get_last_price(self, product_name, platform):
+        """Return the most recently observed (non-synthetic) price for an exact product/platform, or None"""
+        row = self.db.query_one("""
+            SELECT price FROM price_history
+            WHERE product_key = ? AND platform = ?
+            AND (search_term IS NULL OR search_term != 'synthetic_data')
+            ORDER BY date_epoch DESC LIMIT 1
+        """, (make_product_key(product_name), platform))
+        return row[0] if row else None
+
+    def get_history_watermark(self, product_name, platform):
+        """Highest price_history row id for a product/platform (0 when there is none)"""
+        return self.db.query_one("""
+            SELECT COALESCE(MAX(id), 0) FROM price_history
+            WHERE product_key = ? AND platform = ?
+        """, (make_product_key(product_name), platform))[0]
+
+    def find_product_keys(self, text, limit=50):
+        """Product keys whose stored name matches every word of `text` (FTS5, or LIKE without it)"""
+        try:
+            if self.fts_enabled:
+                query = fts_query(text)
+                if query is None:
+                    return []
+                rows = self.db.query("""
+                    SELECT p.product_key FROM price_history_fts f
+                    JOIN price_history_products p ON p.id = f.rowid
+                    WHERE price_history_fts MATCH ?
+                    ORDER BY rank LIMIT ?
+                """, (query, limit))
+            else:
+                rows = self.db.query("""
+                    SELECT product_key FROM price_history_products WHERE product_name LIKE ? LIMIT ?
+                """, (f"%{text}%", limit))
+            return [row[0] for row in rows]
+        except sqlite3.OperationalError as e:
+            logger.error(f"Error searching products for '{text}': {e}")
+            return []
+
+    def get_price_history(self, product_name=None, platform=None, days=30, fuzzy=False):
+        """
+        Retrieve price history for analysis
         
-        conditions = []
-        params = []
+        `product_name` is matched through its normalized product key (an index range scan);
+        pass fuzzy=True to match every product whose name contains its words instead.
+        """
+        conditions = ["date_epoch >= ?"]
+        params = [to_epoch(datetime.datetime.now()) - days * 86400]
         
         if product_name:
-            conditions.append("product_name LIKE ?")
-            params.append(f"%{product_name}%")
+            keys = self.find_product_keys(product_name) if fuzzy else [make_product_key(product_name)]
+            if not keys:
+                return pd.DataFrame(columns=HISTORY_COLUMNS)
+            conditions.append(f"product_key IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
         
         if platform:
             conditions.append("platform = ?")
             params.append(platform)
         
-        if conditions:
-            query += " AND " + " AND ".join(conditions)
-        
-        query += " ORDER BY date ASC"
+        query = f"""
+            SELECT product_name, platform, price, date 
+            FROM price_history 
+            WHERE {' AND '.join(conditions)}
+            ORDER BY date_epoch ASC
+        """
         
         try:
-            df = pd.read_sql_query(query, conn, params=params)
-            conn.close()
-            return df
+            return pd.read_sql_query(query, self.db.reader(), params=params)
         except Exception as e:
             logger.error(f"Error retrieving price history: {e}")
-            conn.close()
             return pd.DataFrame()
 
 class PricePredictor:
-    def __init__(self, db_name="price_history.db"):
+    FEATURE_COLUMNS = [
+        'day_of_week', 'day_of_month', 'month', 'days_since_start',
+        'price_lag_1', 'price_lag_7', 'price_ma_7', 'price_ma_14', 'price_std_7'
+    ]
+
+    def __init__(self, db_name="price_history.db", registry=None):
         self.db = PricePredictionDatabase(db_name)
+        # Unfitted templates - every (product, platform) gets its own clones and scaler
         self.models = {
             'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
             'linear_regression': LinearRegression()
         }
-        self.scaler = StandardScaler()
+        self.registry = registry or get_model_registry()
     
     def generate_synthetic_data(self, product_name, current_price, platform, days=90):
         """Generate realistic synthetic historical data for new products"""
@@ -127,50 +298,43 @@ class PricePredictor:
         
         # Create realistic price variations
         base_price = current_price
-        dates = pd.date_range(end=datetime.datetime.now(), periods=days, freq='D')
-        
-        # Generate prices with realistic patterns
-        prices = []
-        for i, date in enumerate(dates):
-            # Much smaller variations - electronics typically don't have huge price swings
-            # Add seasonal trends (very small - 1-2% max)
-            seasonal_factor = 1 + 0.01 * np.sin(2 * np.pi * i / 365)  # 1% yearly cycle
-            
-            # Add weekly patterns (very slight price drops on weekends)
-            weekly_factor = 0.995 if date.weekday() >= 5 else 1.0  # 0.5% weekend discount
-            
-            # Add much smaller random noise (0.5% standard deviation instead of 2%)
-            noise = np.random.normal(0, 0.005)  # 0.5% standard deviation
-            
-            # Add very gradual trend (small decrease over time for electronics)
-            # 0.01% daily decrease instead of 0.1%
-            trend = -0.0001 * i if platform.lower() == 'amazon' else -0.00005 * i
-            
-            price = base_price * (1 + trend) * seasonal_factor * weekly_factor * (1 + noise)
-            
-            # Don't allow prices to go below 85% of original (instead of 70%)
-            # Don't allow prices to go above 115% of original
-            price = max(price, base_price * 0.85)
-            price = min(price, base_price * 1.15)
-            prices.append(price)
-        
-        # Store synthetic data
-        for date, price in zip(dates, prices):
-            date_str = date.strftime('%Y-%m-%d %H:%M:%S')
-            conn = sqlite3.connect(self.db.db_name)
-            cursor = conn.cursor()
-            
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO price_history 
-                    (product_name, platform, price, date, search_term)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (product_name, platform, price, date_str, "synthetic_data"))
-                conn.commit()
-            except:
-                pass
-            finally:
-                conn.close()
+        # End yesterday so the synthetic rows never replace today's observed price
+        dates = pd.date_range(end=datetime.datetime.now() - datetime.timedelta(days=1), periods=days, freq='D')
+        
+        # Generate prices with realistic patterns, one vector op per component
+        day_index = np.arange(days)
+        
+        # Much smaller variations - electronics typically don't have huge price swings
+        # Add seasonal trends (very small - 1-2% max)
+        seasonal_factor = 1 + 0.01 * np.sin(2 * np.pi * day_index / 365)  # 1% yearly cycle
+        
+        # Add weekly patterns (very slight price drops on weekends)
+        weekly_factor = np.where(dates.weekday >= 5, 0.995, 1.0)  # 0.5% weekend discount
+        
+        # Add much smaller random noise (0.5% standard deviation instead of 2%)
+        noise = np.random.normal(0, 0.005, days)  # 0.5% standard deviation
+        
+        # Add very gradual trend (small decrease over time for electronics)
+        # 0.01% daily decrease instead of 0.1%
+        trend = (-0.0001 if platform.lower() == 'amazon' else -0.00005) * day_index
+        
+        prices = base_price * (1 + trend) * seasonal_factor * weekly_factor * (1 + noise)
+        
+        # Don't allow prices to go below 85% of original (instead of 70%)
+        # Don't allow prices to go above 115% of original
+        prices = np.clip(prices, base_price * 0.85, base_price * 1.15)
+        
+        # Store synthetic data in a single transaction
+        self.db.add_price_history_many(
+            {
+                'product_name': product_name,
+                'platform': platform,
+                'price': float(price),
+                'date': date_str,
+                'search_term': "synthetic_data"
+            }
+            for date_str, price in zip(dates.strftime(DATE_FORMAT), prices)
+        )
         
         return pd.DataFrame({
             'date': dates,
@@ -204,12 +368,34 @@ class PricePredictor:
         df['price_std_7'] = df['price'].rolling(window=7, min_periods=1).std()
         
         # Fill NaN values
-        df = df.fillna(method='bfill').fillna(method='ffill')
+        df = df.bfill().ffill()
         
         return df
     
     def train_model(self, product_name, platform):
         """Train prediction model for a specific product"""
+        with span("train", platform.lower()):
+            entry = self._fit_model(product_name, platform)
+        if entry is None:
+            return None, 0
+        return entry['model'], entry['confidence']
+
+    def get_model(self, product_name, platform):
+        """
+        Return the registry entry for a product, retraining only when price_history has
+        rows newer than the watermark the stored model was trained on
+        """
+        watermark = self.db.get_history_watermark(product_name, platform)
+        entry = self.registry.get(product_name, platform, watermark)
+        if entry is not None:
+            logger.info(f"Reusing {entry['model_name']} model for {product_name} ({platform})")
+            return entry
+        with span("train", platform.lower()):
+            return self._fit_model(product_name, platform)
+
+    def _fit_model(self, product_name, platform):
+        """Fit fresh models and a scaler for one product and store the best in the registry"""
+        watermark = self.db.get_history_watermark(product_name, platform)
         # Get historical data
         df = self.db.get_price_history(product_name, platform, days=90)
         
@@ -219,19 +405,17 @@ class PricePredictor:
             # We need current price - let's estimate it
             estimated_price = random.uniform(1000, 50000)  # Random price for demo
             df = self.generate_synthetic_data(product_name, estimated_price, platform)
+            watermark = self.db.get_history_watermark(product_name, platform)
         
         # Create features
         df_features = self.create_features(df)
         
         if df_features.empty or len(df_features) < 5:
             logger.warning(f"Insufficient data for training model for {product_name}")
-            return None, 0
+            return None
         
         # Prepare training data
-        feature_columns = [
-            'day_of_week', 'day_of_month', 'month', 'days_since_start',
-            'price_lag_1', 'price_lag_7', 'price_ma_7', 'price_ma_14', 'price_std_7'
-        ]
+        feature_columns = self.FEATURE_COLUMNS
         
         # Ensure we have all required columns
         for col in feature_columns:
@@ -248,19 +432,21 @@ class PricePredictor:
         
         if len(X_train) < 3:
             logger.warning("Insufficient training data")
-            return None, 0
+            return None
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test) if len(X_test) > 0 else None
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test) if len(X_test) > 0 else None
         
         # Train models and select best one
         best_model = None
         best_score = float('inf')
         best_model_name = None
         
-        for name, model in self.models.items():
+        for name, template in self.models.items():
             try:
+                model = clone(template)
                 model.fit(X_train_scaled, y_train)
                 
                 if X_test_scaled is not None and len(X_test_scaled) > 0:
@@ -280,77 +466,74 @@ class PricePredictor:
                 logger.error(f"Error training {name}: {e}")
                 continue
         
-        confidence = max(0, 1 - (best_score / df['price'].mean())) if best_model else 0
+        if best_model is None:
+            return None
+
+        confidence = max(0, 1 - (best_score / df['price'].mean()))
         logger.info(f"Best model for {product_name}: {best_model_name} (MAE: {best_score:.2f}, Confidence: {confidence:.2f})")
         
-        return best_model, confidence
+        return self.registry.put(product_name, platform, {
+            'model': best_model,
+            'model_name': best_model_name,
+            'scaler': scaler,
+            'confidence': confidence,
+            'last_row': df_features.iloc[-1].copy(),
+            'watermark': watermark
+        })
     
     def predict_future_price(self, product_name, platform, current_price, days_ahead=30):
         """Predict future price for a product with realistic constraints"""
-        # First, add current price to history
-        self.db.add_price_history(product_name, platform, current_price)
-        
-        # Train model
-        model, confidence = self.train_model(product_name, platform)
-        
-        if model is None:
-            logger.warning("Could not train model, using simple trend prediction")
-            return self.simple_trend_prediction(product_name, platform, current_price, days_ahead)
+        # First, add current price to history (unchanged prices would only invalidate the cached model)
+        if self.db.get_last_price(product_name, platform) != current_price:
+            self.db.add_price_history(product_name, platform, current_price)
         
-        # Get recent data for prediction
-        df = self.db.get_price_history(product_name, platform, days=90)
-        df_features = self.create_features(df)
+        # Reuse the cached model unless new price history arrived
+        entry = self.get_model(product_name, platform)
         
-        if df_features.empty:
-            return self.simple_trend_prediction(product_name, platform, current_price, days_ahead)
-        
-        # Create future dates
+        with span("predict", platform.lower()):
+            if entry is None:
+                logger.warning("Could not train model, using simple trend prediction")
+                return self.simple_trend_prediction(product_name, platform, current_price, days_ahead)
+            
+            return self.forecast(entry, current_price, days_ahead)
+
+    def build_future_features(self, last_row, future_dates):
+        """
+        Feature matrix for every future date at once
+
+        Calendar features follow each date; price features (lags, moving averages) stay at
+        the last observed values so no row depends on another row's prediction.
+        """
+        X = np.tile(last_row[self.FEATURE_COLUMNS].to_numpy(dtype=float), (len(future_dates), 1))
+        X[:, 0] = future_dates.dayofweek
+        X[:, 1] = future_dates.day
+        X[:, 2] = future_dates.month
+        X[:, 3] = last_row['days_since_start'] + np.arange(1, len(future_dates) + 1)
+        return X
+
+    def forecast(self, entry, current_price, days_ahead=30):
+        """Predict every day of the horizon with one scaler.transform and one model.predict call"""
         future_dates = pd.date_range(
             start=datetime.datetime.now() + datetime.timedelta(days=1),
             periods=days_ahead,
             freq='D'
         )
         
-        predictions = []
-        last_row = df_features.iloc[-1].copy()
+        X_future = self.build_future_features(entry['last_row'], future_dates)
+        predicted_prices = entry['model'].predict(entry['scaler'].transform(X_future))
         
-        feature_columns = [
-            'day_of_week', 'day_of_month', 'month', 'days_since_start',
-            'price_lag_1', 'price_lag_7', 'price_ma_7', 'price_ma_14', 'price_std_7'
-        ]
+        # Apply realistic constraints to predictions
+        # Don't predict more than 10% change from current price over the horizon, widening gradually
+        max_change_percent = 0.10 * np.arange(1, days_ahead + 1) / days_ahead
+        predicted_prices = np.clip(predicted_prices,
+                                   current_price * (1 - max_change_percent),
+                                   current_price * (1 + max_change_percent))
         
-        for i, future_date in enumerate(future_dates):
-            # Update time features
-            last_row['day_of_week'] = future_date.dayofweek
-            last_row['day_of_month'] = future_date.day
-            last_row['month'] = future_date.month
-            last_row['days_since_start'] = last_row['days_since_start'] + i + 1
-            
-            # Prepare features
-            X_future = last_row[feature_columns].values.reshape(1, -1)
-            X_future_scaled = self.scaler.transform(X_future)
-            
-            # Make prediction
-            predicted_price = model.predict(X_future_scaled)[0]
-            
-            # Apply realistic constraints to predictions
-            # Don't predict more than 10% change from current price over 30 days
-            max_change_percent = 0.10 * (i + 1) / days_ahead  # Gradual change over time
-            min_price = current_price * (1 - max_change_percent)
-            max_price = current_price * (1 + max_change_percent)
-            
-            predicted_price = max(min_price, min(predicted_price, max_price))
-            
-            predictions.append({
-                'date': future_date,
-                'predicted_price': predicted_price,
-                'confidence': confidence
-            })
-            
-            # Update lagged features for next prediction
-            last_row['price_lag_1'] = predicted_price
-        
-        return predictions
+        confidence = entry['confidence']
+        return [
+            {'date': future_date, 'predicted_price': float(price), 'confidence': confidence}
+            for future_date, price in zip(future_dates, predicted_prices)
+        ]
 
     def simple_trend_prediction(self, product_name, platform, current_price, days_ahead=30):
         """Simple trend-based prediction as fallback with realistic constraints"""
@@ -0,0 +1,155 @@
+import logging
+import time
+from collections import defaultdict
+from bs4 import BeautifulSoup
+
+from driver_pool import get_driver_pool
+from flipkart_parser import parse_product_price
+from http_fetcher import map_urls
+from catalog import canonical_id
+from rate_limiter import get_rate_limiter
+from page_readiness import wait_for_stable_count, AMAZON_PRODUCT_SELECTOR, FLIPKART_PRODUCT_SELECTOR
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Product pages fetched at the same time per platform (each holds one pooled browser)
+PLATFORM_CONCURRENCY = {
+    'Amazon': 2,
+    'Flipkart': 2,
+}
+DEFAULT_CONCURRENCY = 1
+PAGE_TIMEOUT = 15
+
+# Containers holding the buy-box price on an Amazon product page, most specific first
+AMAZON_PRICE_CONTAINERS = [
+    '#corePriceDisplay_desktop_feature_div',
+    '#corePrice_feature_div',
+    '#apex_desktop',
+    '#centerCol',
+]
+
+
+def extract_amazon_product_price(html):
+    """Price on an Amazon product page using amaz.extract_price on the buy-box container"""
+    from amaz import extract_price  # amaz pulls in Windows-only helpers, so import on first use
+
+    soup = BeautifulSoup(html, 'lxml')
+    for selector in AMAZON_PRICE_CONTAINERS:
+        container = soup.select_one(selector)
+        if container:
+            price = extract_price(container)
+            if price != float('inf'):
+                return price
+    return None
+
+
+PRICE_EXTRACTORS = {
+    'Amazon': (extract_amazon_product_price, AMAZON_PRODUCT_SELECTOR),
+    'Flipkart': (parse_product_price, FLIPKART_PRODUCT_SELECTOR),
+}
+
+
+def fetch_product_price(platform, url, driver_path):
+    """Load a product page in a pooled browser and return its current price (None if not found)"""
+    extract, ready_selector = PRICE_EXTRACTORS[platform]
+    pool = get_driver_pool(driver_path, headless=True)
+    browser = pool.checkout()
+    try:
+        with get_rate_limiter().permit(url):
+            browser.get(url)
+        wait_for_stable_count(browser, ready_selector, timeout=PAGE_TIMEOUT)
+        return extract(browser.page_source)
+    finally:
+        pool.release(browser)
+
+
+def is_price_drop(old_price, new_price, target_price=None):
+    """
+    Whether a price change should notify the user: any drop, or with a target set, a drop to or below it
+
+    An unchanged price never notifies, so a price that stays under target is reported once.
+    """
+    if new_price >= old_price:
+        return False
+    return not target_price or new_price <= target_price
+
+
+class PriceRechecker:
+    """
+    Re-checks the live price of every active alert
+
+    Alerts are grouped by product URL so each page is fetched once however many users watch
+    it, and pages are fetched with a bounded number of workers per platform.
+    """
+
+    def __init__(self, driver_path="chromedriver.exe", concurrency=None, fetch_price=None):
+        self.driver_path = driver_path
+        self.concurrency = dict(PLATFORM_CONCURRENCY, **(concurrency or {}))
+        self.fetch_price = fetch_price or (lambda platform, url: fetch_product_price(platform, url, self.driver_path))
+        self.stats = {}
+
+    @staticmethod
+    def group_alerts(alerts):
+        """
+        Group alert rows (id, user_email, product_name, product_url, platform, current_price, target_price)
+
+        Alerts on the same product share one (platform, url) key, the first URL seen for it, even
+        when their URLs differ in tracking parameters or slug.
+        """
+        groups = defaultdict(list)
+        keys = {}
+        for alert in alerts:
+            key = keys.setdefault(canonical_id(alert[4], alert[3]), (alert[4], alert[3]))
+            groups[key].append(alert)
+        return groups
+
+    def fetch_prices(self, urls):
+        """Fetch every (platform, url) with per-platform worker limits; returns {(platform, url): price or None}"""
+        urls = list(urls)
+        results = map_urls(urls, lambda key: self.fetch_price(*key), key=lambda key: key[0],
+                           limits=self.concurrency, default_limit=DEFAULT_CONCURRENCY,
+                           thread_name_prefix="recheck")
+        return dict(zip(urls, results))
+
+    def run(self, alerts):
+        """
+        Re-check a list of active alert rows
+
+        Returns (changes, prices): `changes` has one dict per alert whose page yielded a price
+        (alert_id, user_email, product_name, product_url, platform, old_price, new_price,
+        target_price) and `prices` maps each alert_id to its new price.
+        """
+        started = time.time()
+        groups = self.group_alerts(alerts)
+        fetched = self.fetch_prices(list(groups))
+
+        changes = []
+        prices = {}
+        for key, group in groups.items():
+            new_price = fetched.get(key)
+            if new_price is None:
+                continue
+            for alert_id, user_email, product_name, product_url, platform, current_price, target_price in group:
+                prices[alert_id] = new_price
+                changes.append({
+                    'alert_id': alert_id,
+                    'user_email': user_email,
+                    'product_name': product_name,
+                    'product_url': product_url,
+                    'platform': platform,
+                    'old_price': current_price,
+                    'new_price': new_price,
+                    'target_price': target_price,
+                })
+
+        self.stats = {
+            'alerts': len(alerts),
+            'urls': len(groups),
+            'prices_found': sum(1 for price in fetched.values() if price is not None),
+            'elapsed': time.time() - started,
+        }
+        logger.info(f"Re-checked {self.stats['alerts']} alerts over {self.stats['urls']} URLs "
+                    f"({self.stats['prices_found']} prices) in {self.stats['elapsed']:.1f}s")
+        return changes, prices
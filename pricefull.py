@@ -7,7 +7,7 @@ import os
 import sys
 import logging
 import random
-from textblob import TextBlob
+from sentiment_service import get_sentiment_service, SentimentService
 from hashlib import sha256
 import sqlite3
 from price_predictor import PricePredictor, PricePredictionDatabase
@@ -17,6 +17,15 @@ from price_alert_system import PriceAlertSystem
 # Import functions from your existing scripts 
 from amaz import setup_chrome_driver, find_lowest_price_product, find_multiple_products, AmazonReviewScraper,find_multiple_products_improved
 from flipAPI import FlipkartProductSearch, FlipkartReviewScraper
+from driver_pool import configure_driver_pools
+from search_coordinator import search_all_platforms
+from scrape_cache import get_scrape_cache
+from db_manager import get_database
+from http_fetcher import get_fetcher
+from product_matching import get_product_matcher
+from tracing import get_tracer, start_metrics_server
+from page_classifier import get_circuit_breaker
+from rate_limiter import get_rate_limiter
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -28,6 +37,13 @@ def log_debug(message):
     if DEBUG:
         print(f"[DEBUG] {message}")
 
+# Display labels for the sentiment service's positive/neutral/negative labels
+SENTIMENT_LABELS = {
+    "positive": "Positive 👍",
+    "neutral": "Neutral 😐",
+    "negative": "Negative 👎"
+}
+
 # Configure page
 st.set_page_config(
     page_title="CompareIt - Amazon vs Flipkart",
@@ -44,50 +60,34 @@ SMTP_CONFIG = {
 
 # User Authentication Database Setup
 # User Authentication Database Setup
+USER_DB = get_database("userdb.db")
+
 def create_userdb():
-    conn = sqlite3.connect("userdb.db")
-    cursor = conn.cursor()
-    cursor.execute("""
+    USER_DB.execute("""
         CREATE TABLE IF NOT EXISTS users (
             username TEXT PRIMARY KEY,
             password TEXT NOT NULL,
             email TEXT NOT NULL
         )
     """)
-    conn.commit()
-    conn.close()
 
 def add_user(username, password, email):
-    conn = sqlite3.connect("userdb.db")
-    cursor = conn.cursor()
     try:
         hashed_password = sha256(password.encode()).hexdigest()
-        cursor.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", 
-                      (username, hashed_password, email))
-        conn.commit()
-        conn.close()
+        USER_DB.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", 
+                        (username, hashed_password, email))
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
 
 def authenticate_user(username, password):
-    conn = sqlite3.connect("userdb.db")
-    cursor = conn.cursor()
     hashed_password = sha256(password.encode()).hexdigest()
-    cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?", 
-                  (username, hashed_password))
-    result = cursor.fetchone()
-    conn.close()
-    return result
+    return USER_DB.query_one("SELECT * FROM users WHERE username = ? AND password = ?", 
+                             (username, hashed_password))
 
 def get_user_email(username):
     """Get the email address for a given username"""
-    conn = sqlite3.connect("userdb.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT email FROM users WHERE username = ?", (username,))
-    result = cursor.fetchone()
-    conn.close()
+    result = USER_DB.query_one("SELECT email FROM users WHERE username = ?", (username,))
     return result[0] if result else None
 
 # Create user database on startup
@@ -418,6 +418,74 @@ def show_login_page():
                 st.error("Username already exists. Please choose a different one.")
     
     st.markdown("</div>", unsafe_allow_html=True)
+
+
+def lowest_priced(products, price):
+    """Cheapest listing by `price`, ignoring unpriced (inf) ones; results arrive in relevance order, not by price"""
+    priced = [p for p in products if price(p) != float('inf')]
+    return min(priced, key=price) if priced else products[0]
+
+
+def show_flipkart_column():
+    """Flipkart results column: best price card and the full list"""
+    st.markdown("<div class='platform-container flipkart-container'>", unsafe_allow_html=True)
+    st.markdown("<h2 class='platform-header flipkart-header'>Flipkart</h2>", unsafe_allow_html=True)
+    st.image("https://logos-world.net/wp-content/uploads/2020/11/Flipkart-Emblem.png", width=150, use_column_width=False)
+    
+    if st.session_state.flipkart_products:
+        # Display the lowest price product from Flipkart
+        lowest_product = lowest_priced(st.session_state.flipkart_products, lambda p: p['price'])
+        
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<span class='price-badge flipkart-price'>Best Price on Flipkart</span>", unsafe_allow_html=True)
+        st.markdown(f"<p class='product-title'>{lowest_product['title']}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='price-win'>{lowest_product['price_text']}</p>", unsafe_allow_html=True)
+        st.markdown(f"[View on Flipkart]({lowest_product['link']})")
+        st.session_state.flipkart_selected_product = lowest_product
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Show all products from Flipkart in an expander
+        with st.expander("View All Flipkart Products"):
+            for idx, product in enumerate(st.session_state.flipkart_products):
+                st.markdown(f"{idx+1}. **{product['title']}** - {product['price_text']}")
+                st.markdown(f"[View on Flipkart]({product['link']})")
+                st.markdown("---")
+    else:
+        st.info("No products found on Flipkart for this search term.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def show_amazon_column():
+    """Amazon results column: best price card and the full list"""
+    st.markdown("<div class='platform-container amazon-container'>", unsafe_allow_html=True)
+    st.markdown("<h2 class='platform-header amazon-header'>Amazon</h2>", unsafe_allow_html=True)
+    st.image("https://upload.wikimedia.org/wikipedia/commons/4/4a/Amazon_icon.svg", width=100, use_column_width=False)
+    
+    if st.session_state.amazon_products:
+        # Display the lowest price product from Amazon
+        lowest_product = lowest_priced(st.session_state.amazon_products, lambda p: p[1])
+        
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<span class='price-badge amazon-price'>Best Price on Amazon</span>", unsafe_allow_html=True)
+        st.markdown(f"<p class='product-title'>{lowest_product[0]}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='price-win'>₹{lowest_product[1]:,.2f}</p>", unsafe_allow_html=True)
+        st.markdown(f"[View on Amazon]({lowest_product[2]})")
+        st.session_state.amazon_selected_product = lowest_product
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Show all products from Amazon in an expander
+        with st.expander("View All Amazon Products"):
+            for idx, product in enumerate(st.session_state.amazon_products):
+                st.markdown(f"{idx+1}. **{product[0]}** - ₹{product[1]:,.2f}")
+                st.markdown(f"[View on Amazon]({product[2]})")
+                st.markdown("---")
+    else:
+        st.info("No products found on Amazon for this search term.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
 def show_main_app():
     st.markdown("<h1 class='main-header' style='color: black; -webkit-text-fill-color: black;'>🔍 CompareIT: Amazon vs Flipkart</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center;'>Find the best deals across platforms and analyze review sentiment</p>", unsafe_allow_html=True)
@@ -491,6 +559,32 @@ def show_main_app():
         with st.expander("Advanced Options"):
             wait_time = st.slider("Page load wait time (seconds)", 2, 10, 5)
             debug_mode = st.checkbox("Enable debug mode", False)
+            pool_size = st.slider("Warm browser pool size", 1, 6, 3)
+            block_resources = st.checkbox("Skip images, fonts and trackers", True,
+                                          help="Applies to browsers started after the change")
+            configure_driver_pools(size=pool_size, block_resources=block_resources)
+            
+            cache_stats = get_scrape_cache().get_stats()
+            st.caption(f"Search cache: {cache_stats['hits']} hits, {cache_stats['stale_hits']} stale, "
+                       f"{cache_stats['misses']} misses ({cache_stats['hit_rate']*100:.0f}% hit rate, "
+                       f"{cache_stats['entries']} entries)")
+            if st.button("Clear search cache"):
+                get_scrape_cache().clear()
+            
+            fetch_stats = get_fetcher().get_stats()
+            for tier, label in (("http", "Plain HTTP"), ("webdriver", "Browser")):
+                tier_stats = fetch_stats[tier]
+                st.caption(f"{label} fetches: {tier_stats['successes']}/{tier_stats['attempts']} usable "
+                           f"({tier_stats['success_rate']*100:.0f}%), p50 {tier_stats['p50']:.1f}s, "
+                           f"p95 {tier_stats['p95']:.1f}s")
+            
+            for host, pacing in sorted(get_rate_limiter().get_stats().items()):
+                st.caption(f"{host}: {pacing['rate']:.2f} page loads/s, {pacing['permits']} loads, "
+                           f"{pacing['waited']:.0f}s spent waiting, {pacing['blocks']} pushbacks")
+            
+            for host, block in get_circuit_breaker().get_stats()['hosts'].items():
+                st.caption(f"{host} blocked ({block['state'].replace('_', ' ')}): live searches paused "
+                           f"for another {block['retry_after'] / 60:.0f} min, cached results shown where available")
         
         show_price_alerts_section()
         
@@ -539,117 +633,76 @@ def show_main_app():
     search_term = st.text_input("What product are you looking for?")
 
     # Compare button
+    results_shown = False
     if st.button("Compare Prices", key="compare_button") and search_term:
         col1, col2 = st.columns(2)
         
-        with col1:
-            with st.status("Searching Flipkart...") as status:
-                st.write(f"Searching for: {search_term}")
-                
-                # Setup chrome driver path
-                if not os.path.isfile(driver_path):
-                    st.warning(f"ChromeDriver not found at '{driver_path}'. The search may fail.")
-                
-                # Find products
-                try:
-                    product_searcher = FlipkartProductSearch(driver_path)
-                    flipkart_products = product_searcher.search_products(search_term)
-                    
-                    if flipkart_products:
-                        lowest_price_product = product_searcher.get_lowest_price_product()
-                        st.session_state.flipkart_products = flipkart_products
-                        status.update(label="Flipkart search complete!", state="complete")
-                    else:
-                        status.update(label="No products found on Flipkart", state="error")
-                        st.session_state.flipkart_products = None
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                    status.update(label="Flipkart search failed", state="error")
-                    st.session_state.flipkart_products = None
+        # Setup chrome driver path
+        if not os.path.isfile(driver_path):
+            st.warning(f"ChromeDriver not found at '{driver_path}'. The search may fail.")
         
-        with col2:
-            with st.status("Searching Amazon...") as status:
-                st.write(f"Searching for: {search_term}")
-                
-                # Find multiple products from Amazon
-                try:
-                    amazon_products = find_multiple_products_improved(search_term, driver_path, max_products=5)
-                    
-                    if amazon_products:
-                        st.session_state.amazon_products = amazon_products
-                        status.update(label="Amazon search complete!", state="complete")
-                        st.write(f"Found {len(amazon_products)} products")
-                    else:
-                        status.update(label="No products found on Amazon", state="error")
-                        st.session_state.amazon_products = None
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                    status.update(label="Amazon search failed", state="error")
-                    st.session_state.amazon_products = None
-
-    # Display comparison if products are available from both platforms
-    if st.session_state.flipkart_products is not None or st.session_state.amazon_products is not None:
-        st.markdown("<div class='comparison-header'>📊 Price Comparison Results</div>", unsafe_allow_html=True)
+        statuses = {
+            "Flipkart": col1.status("Searching Flipkart..."),
+            "Amazon": col2.status("Searching Amazon..."),
+        }
+        for status in statuses.values():
+            status.write(f"Searching for: {search_term}")
         
+        # Run both platform searches at once; each column updates as soon as its platform returns
+        # Repeated searches are served from the scrape cache instead of relaunching the browser
+        scrape_cache = get_scrape_cache()
+        searchers = {
+            "Flipkart": lambda: scrape_cache.get_or_fetch(
+                "Flipkart", search_term, 10,
+                lambda: FlipkartProductSearch(driver_path).search_products(search_term)),
+            "Amazon": lambda: scrape_cache.get_or_fetch(
+                "Amazon", search_term, 5,
+                lambda: find_multiple_products_improved(search_term, driver_path, max_products=5)),
+        }
+        
+        # Each platform's results column is filled in as soon as that platform returns
+        st.markdown("<div class='comparison-header'>📊 Price Comparison Results</div>", unsafe_allow_html=True)
         flipkart_col, amazon_col = st.columns(2)
+        result_slots = {"Flipkart": flipkart_col.empty(), "Amazon": amazon_col.empty()}
+        show_column = {"Flipkart": show_flipkart_column, "Amazon": show_amazon_column}
         
-        # FLIPKART SECTION
-        with flipkart_col:
-            st.markdown("<div class='platform-container flipkart-container'>", unsafe_allow_html=True)
-            st.markdown("<h2 class='platform-header flipkart-header'>Flipkart</h2>", unsafe_allow_html=True)
-            st.image("https://logos-world.net/wp-content/uploads/2020/11/Flipkart-Emblem.png", width=150, use_column_width=False)
+        for result in search_all_platforms(searchers):
+            platform = result['platform']
+            status = statuses[platform]
+            products = result['products'] or None
+            get_tracer().observe("search", result['elapsed'], platform.lower(),
+                                 error=result['status'] in ('timeout', 'error'))
             
-            if st.session_state.flipkart_products:
-                # Display the lowest price product from Flipkart
-                lowest_product = st.session_state.flipkart_products[0]  # Assuming products are sorted by price
-                
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-                st.markdown("<span class='price-badge flipkart-price'>Best Price on Flipkart</span>", unsafe_allow_html=True)
-                st.markdown(f"<p class='product-title'>{lowest_product['title']}</p>", unsafe_allow_html=True)
-                st.markdown(f"<p class='price-win'>{lowest_product['price_text']}</p>", unsafe_allow_html=True)
-                st.markdown(f"[View on Flipkart]({lowest_product['link']})")
-                st.session_state.flipkart_selected_product = lowest_product
-                st.markdown("</div>", unsafe_allow_html=True)
-                
-                # Show all products from Flipkart in an expander
-                with st.expander("View All Flipkart Products"):
-                    for idx, product in enumerate(st.session_state.flipkart_products):
-                        st.markdown(f"{idx+1}. **{product['title']}** - {product['price_text']}")
-                        st.markdown(f"[View on Flipkart]({product['link']})")
-                        st.markdown("---")
+            if platform == "Flipkart":
+                st.session_state.flipkart_products = products
             else:
-                st.info("No products found on Flipkart for this search term.")
-            
-            st.markdown("</div>", unsafe_allow_html=True)
-        
-        # AMAZON SECTION
-        with amazon_col:
-            st.markdown("<div class='platform-container amazon-container'>", unsafe_allow_html=True)
-            st.markdown("<h2 class='platform-header amazon-header'>Amazon</h2>", unsafe_allow_html=True)
-            st.image("https://upload.wikimedia.org/wikipedia/commons/4/4a/Amazon_icon.svg", width=100, use_column_width=False)
+                st.session_state.amazon_products = products
             
-            if st.session_state.amazon_products:
-                # Display the lowest price product from Amazon
-                lowest_product = st.session_state.amazon_products[0]  # Assuming products are sorted by price
-                
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-                st.markdown("<span class='price-badge amazon-price'>Best Price on Amazon</span>", unsafe_allow_html=True)
-                st.markdown(f"<p class='product-title'>{lowest_product[0]}</p>", unsafe_allow_html=True)
-                st.markdown(f"<p class='price-win'>₹{lowest_product[1]:,.2f}</p>", unsafe_allow_html=True)
-                st.markdown(f"[View on Amazon]({lowest_product[2]})")
-                st.session_state.amazon_selected_product = lowest_product
-                st.markdown("</div>", unsafe_allow_html=True)
-                
-                # Show all products from Amazon in an expander
-                with st.expander("View All Amazon Products"):
-                    for idx, product in enumerate(st.session_state.amazon_products):
-                        st.markdown(f"{idx+1}. **{product[0]}** - ₹{product[1]:,.2f}")
-                        st.markdown(f"[View on Amazon]({product[2]})")
-                        st.markdown("---")
+            if result['status'] == 'ok':
+                status.write(f"Found {len(result['products'])} products in {result['elapsed']:.1f}s")
+                status.update(label=f"{platform} search complete!", state="complete")
+            elif result['status'] == 'timeout':
+                status.update(label=f"{platform} search timed out after {result['elapsed']:.0f}s", state="error")
+            elif result['status'] == 'error':
+                status.error(f"An error occurred: {result['error']}")
+                status.update(label=f"{platform} search failed", state="error")
             else:
-                st.info("No products found on Amazon for this search term.")
+                status.update(label=f"No products found on {platform}", state="error")
             
-            st.markdown("</div>", unsafe_allow_html=True)
+            with result_slots[platform].container():
+                show_column[platform]()
+        results_shown = True
+
+    # Display comparison if products are available from both platforms
+    if st.session_state.flipkart_products is not None or st.session_state.amazon_products is not None:
+        if not results_shown:
+            st.markdown("<div class='comparison-header'>📊 Price Comparison Results</div>", unsafe_allow_html=True)
+            
+            flipkart_col, amazon_col = st.columns(2)
+            with flipkart_col:
+                show_flipkart_column()
+            with amazon_col:
+                show_amazon_column()
         
         def add_alert_button(product_name, product_url, platform, current_price):
             if st.session_state.logged_in:
@@ -709,9 +762,24 @@ def show_main_app():
         if st.session_state.flipkart_products and st.session_state.amazon_products:
             st.markdown("<div class='comparison-header'>🏆 Best Deal Overall</div>", unsafe_allow_html=True)
             
-            # Get lowest price from each platform
-            flipkart_lowest = st.session_state.flipkart_products[0]
-            amazon_lowest = st.session_state.amazon_products[0]
+            # Compare the same SKU on both platforms when the listings can be matched,
+            # otherwise fall back to the lowest price from each platform
+            try:
+                match = get_product_matcher().best_pair(st.session_state.flipkart_products,
+                                                        st.session_state.amazon_products)
+            except Exception as e:
+                logger.error(f"Product matching failed: {e}")
+                match = None
+            
+            if match:
+                flipkart_lowest, amazon_lowest, match_score = match
+                st.session_state.flipkart_selected_product = flipkart_lowest
+                st.session_state.amazon_selected_product = amazon_lowest
+                st.caption(f"Comparing the same product on both platforms (match score {match_score:.2f})")
+            else:
+                flipkart_lowest = lowest_priced(st.session_state.flipkart_products, lambda p: p['price'])
+                amazon_lowest = lowest_priced(st.session_state.amazon_products, lambda p: p[1])
+                st.caption("No identical listing found on both platforms - comparing each platform's lowest price")
             
             # Extract and clean prices for comparison
             # Assuming Flipkart price format is like "₹12,345" or "₹12,345.00"
@@ -821,30 +889,20 @@ def show_main_app():
                 # Create combined list of all review content
                 all_content = all_reviews + all_titles
                 
+                # Reuse the scores computed for the verdict (memoised by the sentiment service)
+                sentiment_results = get_sentiment_service().score_many(all_content)
+                summary = SentimentService.summarize(sentiment_results)
+                positive_count = summary['positive']
+                negative_count = summary['negative']
+                neutral_count = summary['neutral']
+                
                 # Create DataFrame for reviews with sentiment
                 reviews_data = []
-                positive_count = 0
-                negative_count = 0
-                neutral_count = 0
-                
-                for review in all_content:
-                    sentiment = TextBlob(review).sentiment.polarity
-                    sentiment_label = ""
-                    
-                    if sentiment > 0.1:
-                        sentiment_label = "Positive 👍"
-                        positive_count += 1
-                    elif sentiment < -0.1:
-                        sentiment_label = "Negative 👎"
-                        negative_count += 1
-                    else:
-                        sentiment_label = "Neutral 😐"
-                        neutral_count += 1
-                        
+                for review, result in zip(all_content, sentiment_results):
                     reviews_data.append({
                         "Review": review[:100] + "..." if len(review) > 100 else review,
-                        "Sentiment": sentiment_label,
-                        "Score": round(sentiment, 2)
+                        "Sentiment": SENTIMENT_LABELS[result.label],
+                        "Score": round(result.polarity, 2)
                     })
                 
                 reviews_df = pd.DataFrame(reviews_data)
@@ -937,30 +995,20 @@ def show_main_app():
             
             # Display review data
             if review_titles:
+                # Reuse the scores computed for the verdict (memoised by the sentiment service)
+                sentiment_results = get_sentiment_service().score_many(review_titles)
+                summary = SentimentService.summarize(sentiment_results)
+                positive_count = summary['positive']
+                negative_count = summary['negative']
+                neutral_count = summary['neutral']
+                
                 # Create DataFrame for reviews with sentiment
                 reviews_data = []
-                positive_count = 0
-                negative_count = 0
-                neutral_count = 0
-                
-                for review in review_titles:
-                    sentiment = TextBlob(review).sentiment.polarity
-                    sentiment_label = ""
-                    
-                    if sentiment > 0.1:
-                        sentiment_label = "Positive 👍"
-                        positive_count += 1
-                    elif sentiment < -0.1:
-                        sentiment_label = "Negative 👎"
-                        negative_count += 1
-                    else:
-                        sentiment_label = "Neutral 😐"
-                        neutral_count += 1
-                        
+                for review, result in zip(review_titles, sentiment_results):
                     reviews_data.append({
                         "Review": review,
-                        "Sentiment": sentiment_label,
-                        "Score": round(sentiment, 2)
+                        "Sentiment": SENTIMENT_LABELS[result.label],
+                        "Score": round(result.polarity, 2)
                     })
                 
                 reviews_df = pd.DataFrame(reviews_data)
@@ -1504,8 +1552,28 @@ def show_main_app():
     st.markdown("Disclaimer: This tool is for educational purposes only. Prices and reviews are scraped from platforms and analyzed in real-time.", unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # Add about section in the sidebar
+    # Add performance and about sections in the sidebar (after the search so this run's timings show)
     with st.sidebar:
+        with st.expander("Performance"):
+            stage_rows = get_tracer().snapshot()
+            if stage_rows:
+                st.dataframe(pd.DataFrame([{
+                    "Stage": row['stage'],
+                    "Platform": row['platform'] or "-",
+                    "Runs": row['count'],
+                    "Errors": row['errors'],
+                    "p50 (ms)": round(row['p50'] * 1000),
+                    "p95 (ms)": round(row['p95'] * 1000),
+                } for row in stage_rows]), hide_index=True)
+            else:
+                st.caption("No timings yet. Run a search to populate this panel.")
+            metrics_server = start_metrics_server()
+            if metrics_server:
+                host, port = metrics_server.server_address[:2]
+                st.caption(f"Prometheus metrics: http://{host}:{port}/metrics")
+            if st.button("Reset timings"):
+                get_tracer().reset()
+        
         with st.expander("About this App"):
             st.markdown("""
             This application helps you compare prices and reviews across two major e-commerce platforms in India - Amazon and Flipkart.
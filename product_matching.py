@@ -0,0 +1,344 @@
+import re
+import math
+import zlib
+import logging
+import threading
+from hashlib import sha1
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from db_manager import get_database
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MATCH_DB = "product_matches.db"
+NUM_PERM = 64             # MinHash permutations per listing
+BANDS = 16                # LSH bands of NUM_PERM // BANDS rows; pairs above ~0.5 Jaccard collide
+MATCH_THRESHOLD = 0.5     # Estimated model-token Jaccard a candidate pair needs to count as a match
+_PRIME = (1 << 31) - 1
+
+_rng = np.random.RandomState(1729)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+BRANDS = [
+    'apple', 'samsung', 'xiaomi', 'redmi', 'poco', 'oneplus', 'realme', 'vivo', 'oppo', 'iqoo',
+    'motorola', 'nokia', 'google', 'nothing', 'infinix', 'tecno', 'lava', 'honor', 'asus', 'lenovo',
+    'hp', 'dell', 'acer', 'msi', 'sony', 'lg', 'boat', 'jbl', 'noise', 'fire-boltt',
+]
+# Sub-brands that identify the parent brand when the title omits it
+BRAND_ALIASES = {'iphone': 'apple', 'ipad': 'apple', 'macbook': 'apple', 'galaxy': 'samsung', 'pixel': 'google'}
+COLOURS = [
+    'black', 'white', 'blue', 'green', 'red', 'yellow', 'purple', 'pink', 'gold', 'silver', 'grey', 'gray',
+    'orange', 'violet', 'titanium', 'graphite', 'midnight', 'starlight', 'cream', 'lavender', 'mint',
+    'onyx', 'cobalt', 'amber', 'marble', 'natural', 'desert', 'jade', 'aqua', 'bronze',
+]
+# Words that say nothing about which product it is
+NOISE_WORDS = {
+    'smartphone', 'mobile', 'phone', 'phones', 'cell', 'with', 'and', 'the', 'of', 'in', 'for',
+    'storage', 'ram', 'rom', 'gb', 'tb', 'dual', 'sim', 'ai', '5g', '4g', 'lte', 'new', 'latest',
+    'unlocked', 'display', 'camera', 'battery', 'mah', 'inch', 'inches', 'cm',
+}
+# Words that turn one model into another (iPhone 15 vs iPhone 15 Pro)
+VARIANT_WORDS = {'pro', 'max', 'plus', 'ultra', 'mini', 'lite', 'fe', 'neo', 'prime', 'edge', 'air', 'fold', 'flip'}
+
+_MEMORY = re.compile(r'(\d+(?:\.\d+)?)\s*(gb|tb)\b(\s*(?:ram|memory))?')
+_TOKEN = re.compile(r'[a-z0-9+]+')
+_MODEL_END = re.compile(r'\(|\s[-|\u2013]\s|,')
+
+
+def listing_id(platform, url):
+    """Stable ID for a listing: platform plus its URL without query string or fragment"""
+    parts = urlsplit(url)
+    return sha1(f"{platform}|{parts.netloc}{parts.path}".encode('utf-8')).hexdigest()[:16]
+
+
+def extract_attributes(title):
+    """
+    Normalized brand, model, storage, RAM and colour from a listing title
+
+    Sizes are in GB. `model` is the space-joined model tokens left after brand, colour,
+    memory and noise words are removed, e.g. 'galaxy s24' for any S24 listing.
+    """
+    text = title.lower()
+    labelled_ram, sizes = [], []
+    for amount, unit, is_ram in _MEMORY.findall(text):
+        size = float(amount) * (1024 if unit == 'tb' else 1)
+        (labelled_ram if is_ram else sizes).append(size)
+    storage_gb = max(sizes) if sizes else None
+    if labelled_ram:
+        ram_gb = labelled_ram[0]
+    else:
+        # Unlabelled "8GB, 256GB" still lists RAM before the (larger) storage
+        ram_gb = min(sizes) if len(set(sizes)) > 1 else None
+    text = _MEMORY.sub(' ', text)
+
+    tokens = _TOKEN.findall(text)
+    brand = next((token for token in tokens if token in BRANDS), None)
+    if brand is None:
+        brand = next((BRAND_ALIASES[token] for token in tokens if token in BRAND_ALIASES), None)
+    colour = next((token for token in tokens if token in COLOURS), None)
+
+    # The model name comes before the "(colour, storage)" / " - colour" / ", spec" part of the title
+    head = _MODEL_END.split(text, 1)[0]
+    model_tokens = []
+    for token in _TOKEN.findall(head):
+        if token in BRANDS or token in COLOURS or token in NOISE_WORDS or token in model_tokens:
+            continue
+        model_tokens.append(token)
+    return {
+        'brand': brand,
+        'model': ' '.join(model_tokens[:6]),
+        'storage_gb': storage_gb,
+        'ram_gb': ram_gb,
+        'colour': colour,
+    }
+
+
+def blocking_key(attributes):
+    """Listings are only compared within one brand + storage size"""
+    storage = f"{attributes['storage_gb']:g}" if attributes['storage_gb'] else '?'
+    return f"{attributes['brand'] or '?'}|{storage}"
+
+
+def minhash_signature(model):
+    """NUM_PERM MinHash values over the model's tokens and adjacent token pairs"""
+    tokens = model.split()
+    shingles = set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    if not shingles:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+
+
+def lsh_buckets(signature, block):
+    """One bucket ID per band; equal IDs mean the band's rows and the blocking key agree"""
+    rows = NUM_PERM // BANDS
+    buckets = []
+    for band in range(BANDS):
+        digest = sha1(f"{band}|{block}|".encode('utf-8') + signature[band * rows:(band + 1) * rows].tobytes())
+        buckets.append(int.from_bytes(digest.digest()[:8], 'big') >> 1)  # Fits SQLite's signed INTEGER
+    return buckets
+
+
+def model_variant(model):
+    """Variant words and numbers of a model, which must agree exactly for two listings to match"""
+    tokens = model.split()
+    return (frozenset(token for token in tokens if token in VARIANT_WORDS),
+            frozenset(token for token in tokens if any(ch.isdigit() for ch in token)))
+
+
+def compatible(attrs_a, attrs_b):
+    """Hard attribute checks: same model variant, and RAM must agree when both listings state it"""
+    if model_variant(attrs_a['model']) != model_variant(attrs_b['model']):
+        return False
+    if attrs_a['ram_gb'] and attrs_b['ram_gb'] and attrs_a['ram_gb'] != attrs_b['ram_gb']:
+        return False
+    return True
+
+
+def _has_price(price):
+    return price is not None and math.isfinite(price)
+
+
+class ProductMatcher:
+    """
+    Persistent cross-platform listing matcher
+
+    Each listing's attributes and MinHash signature are stored once. Its LSH buckets
+    (which include the brand/storage blocking key) are indexed, so candidates come from an
+    index join instead of comparing every pair. Verified pairs go into product_matches,
+    and later comparisons of the same listings are plain lookups.
+    """
+
+    def __init__(self, db_name=MATCH_DB):
+        self.db = get_database(db_name)
+        self.db.write(self._create_tables)
+
+    @staticmethod
+    def _create_tables(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS listings (
+                listing_id TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                brand TEXT,
+                model TEXT,
+                storage_gb REAL,
+                ram_gb REAL,
+                colour TEXT,
+                block_key TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                bucket INTEGER NOT NULL,
+                platform TEXT NOT NULL,
+                listing_id TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets ON lsh_buckets(bucket)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_matches (
+                listing_a TEXT NOT NULL,
+                listing_b TEXT NOT NULL,
+                score REAL NOT NULL,
+                matched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (listing_a, listing_b)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_product_matches_b ON product_matches(listing_b)")
+
+    def add_listings(self, listings):
+        """
+        Index listings (dicts with platform, title, url) and match new ones against the catalog
+
+        Returns their listing IDs in input order. Listings already in the index are not re-matched.
+        """
+        ids, rows, bucket_rows = [], [], []
+        seen = set()
+        for listing in listings:
+            lid = listing_id(listing['platform'], listing['url'])
+            ids.append(lid)
+            if lid in seen:
+                continue
+            seen.add(lid)
+            attrs = extract_attributes(listing['title'])
+            block = blocking_key(attrs)
+            signature = minhash_signature(attrs['model'])
+            rows.append((lid, listing['platform'], listing['title'], listing['url'], attrs['brand'], attrs['model'],
+                         attrs['storage_gb'], attrs['ram_gb'], attrs['colour'], block,
+                         signature.astype(np.uint32).tobytes()))
+            bucket_rows.extend((bucket, listing['platform'], lid) for bucket in lsh_buckets(signature, block))
+
+        if rows:
+            self.db.write(lambda conn: self._index(conn, rows, bucket_rows))
+        return ids
+
+    def _index(self, conn, rows, bucket_rows):
+        existing = set()
+        candidates_ids = [row[0] for row in rows]
+        for start in range(0, len(candidates_ids), 500):
+            chunk = candidates_ids[start:start + 500]
+            existing.update(r[0] for r in conn.execute(
+                f"SELECT listing_id FROM listings WHERE listing_id IN ({','.join('?' * len(chunk))})", chunk))
+        rows = [row for row in rows if row[0] not in existing]
+        if not rows:
+            return 0
+        new_ids = {row[0] for row in rows}
+        bucket_rows = [row for row in bucket_rows if row[2] in new_ids]
+
+        conn.executemany("""
+            INSERT INTO listings (listing_id, platform, title, url, brand, model, storage_gb, ram_gb, colour,
+                                  block_key, signature)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        before = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM lsh_buckets").fetchone()[0]
+        # Sorted inserts walk the bucket index in order instead of touching random pages
+        bucket_rows.sort()
+        conn.executemany("INSERT INTO lsh_buckets (bucket, platform, listing_id) VALUES (?, ?, ?)", bucket_rows)
+
+        # Candidate pairs: a new listing sharing any band bucket with a listing from another platform
+        pairs = {
+            (min(a, b), max(a, b)) for a, b in conn.execute("""
+                SELECT n.listing_id, o.listing_id
+                FROM lsh_buckets n JOIN lsh_buckets o ON o.bucket = n.bucket
+                WHERE n.rowid > ? AND o.platform != n.platform
+            """, (before,))
+        }
+        if not pairs:
+            return 0
+
+        needed = {lid for pair in pairs for lid in pair}
+        listings = {}
+        needed = list(needed)
+        for start in range(0, len(needed), 500):
+            chunk = needed[start:start + 500]
+            for lid, model, ram_gb, signature in conn.execute(f"""
+                SELECT listing_id, model, ram_gb, signature FROM listings
+                WHERE listing_id IN ({','.join('?' * len(chunk))})
+            """, chunk):
+                listings[lid] = ({'model': model, 'ram_gb': ram_gb}, np.frombuffer(signature, dtype=np.uint32))
+
+        matches = []
+        for a, b in pairs:
+            attrs_a, sig_a = listings[a]
+            attrs_b, sig_b = listings[b]
+            score = float(np.mean(sig_a == sig_b))
+            if score >= MATCH_THRESHOLD and compatible(attrs_a, attrs_b):
+                matches.append((a, b, score))
+        conn.executemany("INSERT OR REPLACE INTO product_matches (listing_a, listing_b, score) VALUES (?, ?, ?)",
+                         matches)
+        return len(matches)
+
+    def get_matches(self, listing_ids):
+        """{listing_id: [(other_listing_id, score), ...]} for the given listings, best match first"""
+        listing_ids = list(listing_ids)
+        matches = {lid: [] for lid in listing_ids}
+        for start in range(0, len(listing_ids), 400):
+            chunk = listing_ids[start:start + 400]
+            marks = ','.join('?' * len(chunk))
+            for a, b, score in self.db.query(f"""
+                SELECT listing_a, listing_b, score FROM product_matches WHERE listing_a IN ({marks})
+                UNION ALL
+                SELECT listing_b, listing_a, score FROM product_matches WHERE listing_b IN ({marks})
+            """, chunk + chunk):
+                matches[a].append((b, score))
+        for found in matches.values():
+            found.sort(key=lambda item: item[1], reverse=True)
+        return matches
+
+    def best_pair(self, flipkart_products, amazon_products):
+        """
+        Cheapest like-for-like pair from the two search result lists
+
+        Flipkart products are dicts (title, price, link) and Amazon products are
+        (title, price, link) sequences. Returns (flipkart_product, amazon_product, score) or
+        None when no listing on one platform matches one on the other. Listings without a
+        price ('Price Not Available', float('inf')) are left out, since they can't be compared.
+        """
+        flipkart_products = [p for p in flipkart_products if _has_price(p['price'])]
+        amazon_products = [p for p in amazon_products if _has_price(p[1])]
+        flipkart_ids = self.add_listings({'platform': 'Flipkart', 'title': p['title'], 'url': p['link']}
+                                         for p in flipkart_products)
+        amazon_ids = self.add_listings({'platform': 'Amazon', 'title': p[0], 'url': p[2]}
+                                       for p in amazon_products)
+        amazon_by_id = {}
+        for lid, product in zip(amazon_ids, amazon_products):
+            amazon_by_id.setdefault(lid, product)
+
+        matches = self.get_matches(set(flipkart_ids))
+        pairs = []
+        for lid, product in zip(flipkart_ids, flipkart_products):
+            for other, score in matches[lid]:
+                if other in amazon_by_id:
+                    amazon_product = amazon_by_id[other]
+                    pairs.append((min(product['price'], amazon_product[1]), -score, product, amazon_product, score))
+        if not pairs:
+            return None
+        _, _, flipkart_product, amazon_product, score = min(pairs, key=lambda pair: (pair[0], pair[1]))
+        return flipkart_product, amazon_product, score
+
+    def get_stats(self):
+        listings = self.db.query_one("SELECT COUNT(*) FROM listings")[0]
+        matches = self.db.query_one("SELECT COUNT(*) FROM product_matches")[0]
+        return {'listings': listings, 'matches': matches}
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_product_matcher():
+    """Return the process-wide product matcher"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = ProductMatcher()
+        return _matcher
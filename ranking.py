@@ -0,0 +1,128 @@
+import re
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Common accessory indicators
+ACCESSORY_KEYWORDS = [
+    'case', 'cover', 'screen protector', 'tempered glass', 'film',
+    'charger', 'charging cable', 'usb cable', 'adapter', 'dock',
+    'holder', 'stand', 'mount', 'grip', 'ring holder',
+    'headphones', 'earphones', 'earbuds', 'headset',
+    'bag', 'pouch', 'wallet', 'sleeve', 'skin', 'sticker',
+    'stylus', 'pen', 'cleaning', 'cloth', 'wipe',
+    'replacement', 'spare', 'extra', 'additional',
+    'compatible with', 'for samsung', 'for iphone', 'for xiaomi'
+]
+ACCESSORY_PATTERNS = [
+    r'for\s+\w+',      # "for Samsung", "for iPhone"
+    r'\d+\s*pack',     # "3 pack", "5-pack"
+    r'set of \d+',     # "set of 2"
+    r'compatible',     # any compatibility mention
+    r'replacement',    # replacement parts
+]
+BUNDLE_INDICATORS = [
+    'bundle', 'combo', 'pack of', 'set of', '+ free',
+    'with accessories', 'complete kit', 'starter kit'
+]
+
+ACCESSORY_PENALTY = 0.3
+BUNDLE_PENALTY = 0.1
+MIN_SCORE = 0.2           # Products scoring at or below this are dropped
+WORD_MATCH_WEIGHT = 0.6
+SIMILARITY_WEIGHT = 0.4
+
+# Each vocabulary is one alternation, compiled once, so a title is scanned once per vocabulary
+ACCESSORY_RE = re.compile('|'.join([re.escape(keyword) for keyword in ACCESSORY_KEYWORDS] + ACCESSORY_PATTERNS))
+BUNDLE_RE = re.compile('|'.join(re.escape(indicator) for indicator in BUNDLE_INDICATORS))
+TOKEN_RE = re.compile(r'\w+')
+
+
+def is_likely_accessory(title):
+    """Detect if a product is likely an accessory or add-on item"""
+    return ACCESSORY_RE.search(title.lower()) is not None
+
+
+def is_bundle_or_combo(title):
+    """Detect bundle deals or combo packs that might not be the main product"""
+    return BUNDLE_RE.search(title.lower()) is not None
+
+
+def token_set_similarity(tokens_a, tokens_b):
+    """Dice coefficient of two token sets (0..1), insensitive to word order and repeats"""
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b))
+
+
+class RelevanceRanker:
+    """
+    Scores product titles against one search term
+
+    The query is tokenized once. A query word (longer than two characters) counts as matched
+    when it occurs inside a title word or a title word occurs inside it, the same rule the
+    original per-card loop used, answered with a substring lookup and a set intersection.
+    """
+
+    def __init__(self, search_term):
+        query = search_term.lower()
+        self.word_count = len(query.split())
+        self.query_tokens = frozenset(TOKEN_RE.findall(query))
+        # Each significant word with every substring of it, for the "title word inside query word" case
+        self.words = [
+            (word, frozenset(word[i:j] for i in range(len(word)) for j in range(i + 1, len(word) + 1)))
+            for word in query.split() if len(word) > 2
+        ]
+
+    def _relevance(self, title_lower):
+        title_words = set(title_lower.split())
+        matches = sum(1 for word, substrings in self.words
+                      if word in title_lower or not substrings.isdisjoint(title_words))
+        word_match_score = matches / self.word_count if self.word_count else 0
+        similarity = token_set_similarity(self.query_tokens, set(TOKEN_RE.findall(title_lower)))
+        return word_match_score * WORD_MATCH_WEIGHT + similarity * SIMILARITY_WEIGHT
+
+    def relevance(self, title):
+        """Relevance before penalties (0..1): 60% query-word coverage, 40% token-set similarity"""
+        return self._relevance(title.lower())
+
+    def score(self, title):
+        """Relevance minus accessory / bundle penalties, floored at 0"""
+        title_lower = title.lower()
+        penalty = 0
+        if ACCESSORY_RE.search(title_lower):
+            penalty += ACCESSORY_PENALTY
+        if BUNDLE_RE.search(title_lower):
+            penalty += BUNDLE_PENALTY
+        return max(0, self._relevance(title_lower) - penalty)
+
+    def score_many(self, titles):
+        return [self.score(title) for title in titles]
+
+
+def _title_of(product):
+    return product.get('title', '') if isinstance(product, dict) else product[0]
+
+
+def rank_products(products, search_term, max_results=5):
+    """
+    Drop irrelevant products and return the rest, most relevant first
+
+    Products are dicts with a 'title' key (Flipkart) or sequences whose first item is the
+    title (Amazon, returned as tuples).
+    """
+    ranker = RelevanceRanker(search_term)
+    candidates = [product for product in products if len(_title_of(product).strip()) >= 5]
+    scores = ranker.score_many([_title_of(product) for product in candidates])
+
+    ranked = sorted(
+        ((score, index) for index, score in enumerate(scores) if score > MIN_SCORE),
+        key=lambda item: item[0], reverse=True
+    )
+    results = []
+    for _, index in ranked[:max_results]:
+        product = candidates[index]
+        results.append(product if isinstance(product, dict) else tuple(product))
+    return results
@@ -0,0 +1,173 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 2.0        # Page loads per second a host starts at (a 3-browser pool at ~1.5s per page)
+MIN_RATE = 0.1            # Floor after repeated backoffs (one load every 10s)
+MAX_RATE = 10.0           # Ceiling reached by additive increase on a healthy host
+BURST = 10                # Permits a host banks while idle; raised to the largest driver pool (ensure_burst)
+ADDITIVE_STEP = 0.02      # Loads/s added per second of healthy responses
+BLOCK_BACKOFF = 0.5       # Rate multiplier after a captcha / robot check / 429
+SLOW_BACKOFF = 0.8        # Rate multiplier after an error, a retry or a slow response
+SLOW_LATENCY = 10.0       # Seconds; a load slower than this counts as the host struggling
+LATENCY_ALPHA = 0.2       # Weight of the newest sample in the per-host latency average
+EXEMPT_HOSTS = ('localhost', '127.0.0.1')
+
+
+def url_host(url):
+    return urlsplit(url).netloc.lower()
+
+
+class HostBucket:
+    """Token bucket and AIMD state for one host"""
+
+    __slots__ = ('rate', 'tokens', 'updated', 'decreased_at', 'latency', 'stats')
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.decreased_at = 0.0
+        self.latency = None
+        self.stats = {'permits': 0, 'waited': 0.0, 'blocks': 0, 'slowdowns': 0}
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host token buckets whose rate adapts to how the host responds (AIMD)
+
+    Every outbound page load takes a permit with acquire() or permit(). Healthy responses
+    raise the host's rate by a fixed step; blocks halve it and errors, retries and slow
+    responses cut it by a fifth, so pacing speeds up while a site keeps answering and
+    backs off as soon as it pushes back. Permits are reserved in order, so concurrent
+    callers are spaced out rather than released together. Responses to permits issued
+    before the last decrease were sent at the old rate, so they neither raise the rate
+    nor cut it again (one decrease per round of requests, as in TCP congestion control).
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=BURST, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 step=ADDITIVE_STEP, slow_latency=SLOW_LATENCY, exempt_hosts=EXEMPT_HOSTS):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.slow_latency = slow_latency
+        self.exempt_hosts = set(exempt_hosts)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            bucket = self._hosts[host] = HostBucket(self.rate, self.burst)
+        return bucket
+
+    def ensure_burst(self, burst):
+        """Bank at least `burst` permits per host, so that many concurrent workers can start together"""
+        with self._lock:
+            self.burst = max(self.burst, burst)
+
+    def _refill(self, bucket):
+        now = time.monotonic()
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
+
+    def acquire(self, url):
+        """Wait for a permit to load `url`; returns the permit's issue time to pass back to record()"""
+        host = url_host(url)
+        if host.rsplit(':', 1)[0] in self.exempt_hosts:
+            return time.monotonic()
+        with self._lock:
+            bucket = self._bucket(host)
+            self._refill(bucket)
+            bucket.tokens -= 1
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            bucket.stats['permits'] += 1
+            bucket.stats['waited'] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return time.monotonic()
+
+    def _decrease(self, bucket, factor):
+        self._refill(bucket)
+        bucket.rate = max(self.min_rate, bucket.rate * factor)
+        bucket.decreased_at = time.monotonic()
+        # No banked burst right after the host pushed back
+        bucket.tokens = min(bucket.tokens, 0)
+
+    def record(self, url, latency=None, blocked=False, error=False, issued=None):
+        """
+        Feed back one response: a block, an error / slow load, or a healthy load
+
+        `issued` is what acquire() returned; without it the response always counts.
+        """
+        host = url_host(url)
+        if host.rsplit(':', 1)[0] in self.exempt_hosts:
+            return
+        with self._lock:
+            bucket = self._bucket(host)
+            if latency is not None:
+                bucket.latency = latency if bucket.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * bucket.latency)
+            if issued is not None and issued < bucket.decreased_at:
+                return
+            if blocked:
+                self._decrease(bucket, BLOCK_BACKOFF)
+                bucket.stats['blocks'] += 1
+                logger.info(f"{host} pushed back, pacing at {bucket.rate:.2f} loads/s")
+            elif error or (latency is not None and latency > self.slow_latency):
+                self._decrease(bucket, SLOW_BACKOFF)
+                bucket.stats['slowdowns'] += 1
+            else:
+                # Spread over the responses of one second, so the rate grows by `step` per second
+                bucket.rate = min(self.max_rate, bucket.rate + self.step / bucket.rate)
+
+    def backoff(self, url):
+        """Slow `url`'s host down before a retry; the retry's own permit then waits accordingly"""
+        self.record(url, error=True)
+
+    @contextmanager
+    def permit(self, url):
+        """
+        Acquire a permit, then time the enclosed load and record it (an exception counts as an error)
+
+        Yields a dict; set its 'blocked' to True when the loaded page turns out to be a block page,
+        so the load is recorded once, as a block.
+        """
+        issued = self.acquire(url)
+        outcome = {'blocked': False}
+        start = time.time()
+        try:
+            yield outcome
+        except Exception:
+            self.record(url, time.time() - start, error=True, issued=issued)
+            raise
+        self.record(url, time.time() - start, blocked=outcome['blocked'], issued=issued)
+
+    def get_stats(self):
+        """Per-host rate (loads/s), average latency and counters"""
+        with self._lock:
+            return {
+                host: dict(bucket.stats, rate=bucket.rate, latency=bucket.latency or 0.0)
+                for host, bucket in self._hosts.items()
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter()
+        return _limiter
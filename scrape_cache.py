@@ -0,0 +1,196 @@
+import sqlite3
+import json
+import time
+import logging
+import threading
+
+from page_classifier import PageBlockedError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = 3600          # Seconds a result is served as fresh
+STALE_TTL = 24 * 3600     # Extra seconds a result may be served while it is refreshed in the background
+MAX_ENTRIES = 500         # Least recently used entries beyond this are evicted
+
+
+class ScrapeCache:
+    """SQLite-backed cache of search results with TTL, stale-while-revalidate and LRU eviction"""
+
+    def __init__(self, db_name="scrape_cache.db", ttl=CACHE_TTL, stale_ttl=STALE_TTL, max_entries=MAX_ENTRIES):
+        self.db_name = db_name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'evictions': 0, 'blocked_hits': 0}
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the cache table"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                cache_key TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                max_products INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_cache_access ON scrape_cache(last_access)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def normalize_term(search_term):
+        """Lower-case and collapse whitespace so 'iPhone  15' and 'iphone 15' share an entry"""
+        return ' '.join(search_term.lower().split())
+
+    def make_key(self, platform, search_term, max_products):
+        return f"{platform.lower()}|{self.normalize_term(search_term)}|{max_products}"
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, platform, search_term, max_products):
+        """Return (products, age_seconds) for a cached entry, or (None, None)"""
+        key = self.make_key(platform, search_term, max_products)
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("SELECT payload, fetched_at FROM scrape_cache WHERE cache_key = ?", (key,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("UPDATE scrape_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+            conn.commit()
+        conn.close()
+
+        if not row:
+            return None, None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, platform, search_term, max_products, products):
+        """Store a result and evict the least recently used entries over the size limit"""
+        key = self.make_key(platform, search_term, max_products)
+        now = time.time()
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO scrape_cache
+            (cache_key, platform, search_term, max_products, payload, fetched_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (key, platform, self.normalize_term(search_term), max_products, json.dumps(products), now, now))
+
+        cursor.execute("""
+            DELETE FROM scrape_cache WHERE cache_key IN (
+                SELECT cache_key FROM scrape_cache
+                ORDER BY last_access DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        evicted = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        if evicted > 0:
+            with self._lock:
+                self.stats['evictions'] += evicted
+
+    def _refresh_in_background(self, platform, search_term, max_products, fetch):
+        key = self.make_key(platform, search_term, max_products)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                products = fetch()
+                if products:
+                    self.put(platform, search_term, max_products, products)
+                    self._count('refreshes')
+            except Exception as e:
+                logger.error(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{platform}", daemon=True).start()
+
+    def get_or_fetch(self, platform, search_term, max_products, fetch):
+        """
+        Serve a search from the cache, calling `fetch()` only when needed
+
+        Fresh entries are returned directly. Entries past the TTL but within the stale window
+        are returned immediately while `fetch()` refreshes them in the background.
+        Empty results are never cached so a blocked or failed scrape is retried next time.
+        While the platform is blocking scrapers (`fetch()` raises PageBlockedError) the last
+        stored result is served however old it is.
+        """
+        products, age = self.get(platform, search_term, max_products)
+
+        if products is not None and age < self.ttl:
+            self._count('hits')
+            logger.info(f"Cache hit for {platform} '{search_term}' ({age:.0f}s old)")
+            return products
+
+        if products is not None and age < self.ttl + self.stale_ttl:
+            self._count('stale_hits')
+            logger.info(f"Serving stale {platform} results for '{search_term}' ({age:.0f}s old), refreshing")
+            self._refresh_in_background(platform, search_term, max_products, fetch)
+            return products
+
+        self._count('misses')
+        try:
+            fresh = fetch()
+        except PageBlockedError as e:
+            if products is None:
+                raise
+            self._count('blocked_hits')
+            logger.warning(f"{e}; serving {age / 3600:.1f}h old {platform} results for '{search_term}'")
+            return products
+        products = fresh
+        if products:
+            self.put(platform, search_term, max_products, products)
+        return products
+
+    def get_stats(self):
+        """Return hit/miss counters plus the number of stored entries"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM scrape_cache")
+        entries = cursor.fetchone()[0]
+        conn.close()
+
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['entries'] = entries
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove every cached entry"""
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("DELETE FROM scrape_cache")
+        conn.commit()
+        conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """Return the process-wide scrape cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScrapeCache()
+        return _cache
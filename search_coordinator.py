@@ -0,0 +1,79 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Seconds each platform gets before we give up waiting for it
+PLATFORM_DEADLINES = {
+    'Flipkart': 60,
+    'Amazon': 90,
+}
+DEFAULT_DEADLINE = 60
+
+
+def _make_result(platform, status, products, started, error=None):
+    return {
+        'platform': platform,
+        'status': status,          # 'ok', 'empty', 'error' or 'timeout'
+        'products': products or [],
+        'elapsed': time.time() - started,
+        'error': error,
+    }
+
+
+def search_all_platforms(searchers, deadlines=None):
+    """
+    Run every platform search at the same time and yield each result as soon as it is ready
+
+    Args:
+        searchers: dict mapping platform name to a zero-argument callable returning a product list
+        deadlines: optional dict of per-platform deadlines in seconds (defaults to PLATFORM_DEADLINES)
+
+    Yields one result dict per platform. A platform that misses its deadline is reported with
+    status 'timeout' instead of blocking the faster platform's results.
+    """
+    deadlines = dict(PLATFORM_DEADLINES, **(deadlines or {}))
+    started = time.time()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(searchers)), thread_name_prefix='platform-search')
+    futures = {executor.submit(search): platform for platform, search in searchers.items()}
+    pending = set(futures)
+
+    def deadline_of(future):
+        return started + deadlines.get(futures[future], DEFAULT_DEADLINE)
+
+    try:
+        while pending:
+            # Report any platform that has run past its deadline
+            now = time.time()
+            for future in [f for f in pending if deadline_of(f) <= now and not f.done()]:
+                pending.discard(future)
+                platform = futures[future]
+                logger.warning(f"{platform} search missed its {deadlines.get(platform, DEFAULT_DEADLINE)}s deadline")
+                yield _make_result(platform, 'timeout', [], started)
+
+            if not pending:
+                break
+
+            next_deadline = min(deadline_of(f) for f in pending)
+            done, _ = wait(pending, timeout=max(0, next_deadline - time.time()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.discard(future)
+                platform = futures[future]
+                try:
+                    products = future.result()
+                except Exception as e:
+                    logger.error(f"{platform} search failed: {e}")
+                    yield _make_result(platform, 'error', [], started, error=str(e))
+                    continue
+
+                status = 'ok' if products else 'empty'
+                logger.info(f"{platform} search finished with {len(products or [])} products in {time.time() - started:.2f}s")
+                yield _make_result(platform, status, products, started)
+    finally:
+        # Don't block on a platform that timed out; its browser is returned to the pool when it finishes
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,280 @@
+import logging
+import re
+import threading
+import multiprocessing
+from collections import OrderedDict, namedtuple
+from hashlib import sha1
+from textblob import TextBlob
+# Private TextBlob module: _tokenize() mirrors its find_tokens() with these tables, so scores match
+# TextBlobBackend exactly. It has no stability guarantee, hence the exact textblob pin in requirements.txt;
+# after an upgrade, re-run `python benchmarks.py sentiment` to confirm both backends still agree.
+from textblob._text import (PUNCTUATION, ABBREVIATIONS, EMOTICONS, RE_ABBR1, RE_ABBR2, RE_ABBR3,
+                            RE_EMOTICONS, RE_SARCASM, replacements)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+MAX_CACHE_SIZE = 20000
+
+PARALLEL_THRESHOLD = 5000   # Batches at least this large are split across processes
+PARALLEL_CHUNK_SIZE = 1000
+
+SentimentResult = namedtuple('SentimentResult', ['polarity', 'subjectivity', 'label'])
+
+
+def label_for(polarity):
+    """Map a polarity score to 'positive', 'negative' or 'neutral'"""
+    if polarity > POSITIVE_THRESHOLD:
+        return 'positive'
+    if polarity < NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
+
+
+class SentimentBackend:
+    """Interface for sentiment scorers: turn a list of texts into (polarity, subjectivity) pairs"""
+    name = 'base'
+
+    def score_batch(self, texts):
+        raise NotImplementedError
+
+
+class TextBlobBackend(SentimentBackend):
+    """Reference backend: one TextBlob object per text"""
+    name = 'textblob'
+
+    def score_batch(self, texts):
+        scores = []
+        for text in texts:
+            sentiment = TextBlob(text).sentiment
+            scores.append((sentiment.polarity, sentiment.subjectivity))
+        return scores
+
+
+_NEGATIONS = frozenset(("no", "not", "n't", "never"))
+_SPLIT_PUNCTUATION = tuple(PUNCTUATION.replace(".", ""))
+
+
+def _build_lexicon():
+    """Flatten the TextBlob/pattern sentiment lexicon into {word: (polarity, subjectivity, intensity, is_modifier)}"""
+    from textblob.en import sentiment as pattern_lexicon
+
+    if dict.__len__(pattern_lexicon) == 0:
+        pattern_lexicon.load()
+
+    lexicon = {}
+    for word, senses in dict.items(pattern_lexicon):
+        polarity, subjectivity, intensity = senses[None]
+        lexicon[word] = (polarity, subjectivity, intensity, 'RB' in senses)
+
+    emoticons = {}
+    for (_, polarity), faces in EMOTICONS.items():
+        for face in faces:
+            emoticons.setdefault(face.lower(), polarity)
+    return lexicon, emoticons
+
+
+def _tokenize(text):
+    """Lower-cased tokens, split exactly the way TextBlob's pattern tokenizer (find_tokens) splits them"""
+    punctuation = _SPLIT_PUNCTUATION
+    for a, b in replacements.items():
+        text = text.replace(a, b)
+    text = (text.replace("\u201c", " \u201c ").replace("\u201d", " \u201d ")
+                .replace("\u2018", " \u2018 ").replace("\u2019", " \u2019 ")
+                .replace("'", " ' ").replace('"', ' " '))
+
+    tokens = []
+    for t in text.split():
+        tail = []
+        while t.startswith(punctuation) and t not in replacements:
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(punctuation + (".",)) and t not in replacements:
+            if t.endswith(punctuation):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if t in ABBREVIATIONS or RE_ABBR1.match(t) or RE_ABBR2.match(t) or RE_ABBR3.match(t):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+
+    # Re-join sarcasm marks and emoticons that the punctuation split broke apart
+    joined = RE_SARCASM.sub("(!)", " ".join(tokens))
+    joined = RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+    return joined.lower().split()
+
+
+def _score_tokens(tokens, lexicon, emoticons):
+    """Port of pattern's Sentiment.assessments() averaging over a precompiled hash table"""
+    assessments = []   # [polarity, subjectivity, intensity, negated]
+    modifier = None
+    negation = None
+
+    for word in tokens:
+        entry = lexicon.get(word)
+        if entry is not None:
+            polarity, subjectivity, intensity, is_modifier = entry
+            if modifier is None:
+                assessments.append([polarity, subjectivity, intensity, False])
+            else:
+                last = assessments[-1]
+                last[0] = max(-1.0, min(polarity * last[2], 1.0))
+                last[1] = max(-1.0, min(subjectivity * last[2], 1.0))
+                last[2] = intensity
+            if negation is not None:
+                assessments[-1][2] = 1.0 / assessments[-1][2]
+                assessments[-1][3] = True
+            modifier = word if is_modifier else None
+            negation = word if word in _NEGATIONS else None
+        else:
+            if word in _NEGATIONS:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                assessments[-1][3] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+            if word == "(!)":
+                assessments.append([0.0, 1.0, 1.0, False])
+            if not word.isalpha() and len(word) <= 5 and word not in PUNCTUATION:
+                polarity = emoticons.get(word)
+                if polarity is not None:
+                    assessments.append([polarity, 1.0, 1.0, False])
+
+    if not assessments:
+        return 0.0, 0.0
+    total_polarity = sum(a[0] * -0.5 if a[3] else a[0] for a in assessments)
+    total_subjectivity = sum(a[1] for a in assessments)
+    return total_polarity / len(assessments), total_subjectivity / len(assessments)
+
+
+_worker_tables = None
+
+
+def _score_chunk(texts):
+    """Multiprocessing worker: build the lexicon once per process, then score a chunk"""
+    global _worker_tables
+    if _worker_tables is None:
+        _worker_tables = _build_lexicon()
+    lexicon, emoticons = _worker_tables
+    return [_score_tokens(_tokenize(text), lexicon, emoticons) for text in texts]
+
+
+class LexiconBackend(SentimentBackend):
+    """
+    Batched scorer over TextBlob's own pattern lexicon, precompiled into a flat hash table
+
+    Gives the same polarity/subjectivity as TextBlob without building a TextBlob object per
+    text. Batches of PARALLEL_THRESHOLD texts or more are split across worker processes.
+    """
+    name = 'lexicon'
+
+    def __init__(self, processes=None, parallel_threshold=PARALLEL_THRESHOLD):
+        self.lexicon, self.emoticons = _build_lexicon()
+        self.processes = processes or multiprocessing.cpu_count()
+        self.parallel_threshold = parallel_threshold
+
+    def score_batch(self, texts):
+        if self.processes > 1 and len(texts) >= self.parallel_threshold:
+            chunks = [texts[i:i + PARALLEL_CHUNK_SIZE] for i in range(0, len(texts), PARALLEL_CHUNK_SIZE)]
+            with multiprocessing.Pool(self.processes) as pool:
+                return [score for chunk in pool.map(_score_chunk, chunks) for score in chunk]
+
+        lexicon, emoticons = self.lexicon, self.emoticons
+        return [_score_tokens(_tokenize(text), lexicon, emoticons) for text in texts]
+
+
+BACKENDS = {
+    TextBlobBackend.name: TextBlobBackend,
+    LexiconBackend.name: LexiconBackend,
+}
+
+
+class SentimentService:
+    """Scores review text once and remembers the result by content hash"""
+
+    def __init__(self, backend=None, max_cache_size=MAX_CACHE_SIZE):
+        self.backend = backend or LexiconBackend()
+        self.max_cache_size = max_cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def text_hash(text):
+        return sha1(text.encode('utf-8')).hexdigest()
+
+    def score(self, text):
+        """Return the SentimentResult for one piece of text"""
+        return self.score_many([text])[0]
+
+    def score_many(self, texts):
+        """Score a list of texts, sending each distinct uncached text to the backend once"""
+        keys = [self.text_hash(text) for text in texts]
+        results = {}
+        missing = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in results or key in missing:
+                    continue
+                result = self._cache.get(key)
+                if result is not None:
+                    self._cache.move_to_end(key)
+                    results[key] = result
+                else:
+                    missing[key] = text
+            self.stats['hits'] += len(texts) - len(missing)
+            self.stats['misses'] += len(missing)
+
+        if missing:
+            scores = self.backend.score_batch(list(missing.values()))
+            with self._lock:
+                for key, (polarity, subjectivity) in zip(missing.keys(), scores):
+                    result = SentimentResult(polarity, subjectivity, label_for(polarity))
+                    results[key] = result
+                    self._cache[key] = result
+                while len(self._cache) > self.max_cache_size:
+                    self._cache.popitem(last=False)
+
+        return [results[key] for key in keys]
+
+    @staticmethod
+    def summarize(results):
+        """Count labels and compute percentages for a list of SentimentResults"""
+        total = len(results)
+        counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        for result in results:
+            counts[result.label] += 1
+
+        summary = dict(counts, total=total)
+        for label, count in counts.items():
+            summary[f"{label}_percent"] = (count / total * 100) if total > 0 else 0
+        return summary
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_sentiment_service():
+    """Return the process-wide sentiment service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SentimentService()
+        return _service
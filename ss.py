@@ -12,6 +12,8 @@ import random
 import pandas as pd
 import concurrent.futures
 from textblob import TextBlob
+from rate_limiter import get_rate_limiter
+from page_readiness import wait_for_stable_count, AMAZON_RESULT_SELECTOR
 
 # Utility Functions
 def get_random_user_agent():
@@ -42,18 +44,18 @@ def scrape_amazon(name, driver_path):
     browser = create_browser(driver_path)
     
     try:
-        browser.get(URL)
-        time.sleep(random.uniform(3, 7))
+        with get_rate_limiter().permit(URL):
+            browser.get(URL)
         
         # Wait for search results
         WebDriverWait(browser, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-component-type="s-search-result"]'))
         )
         
-        # Scroll to load more results
+        # Scroll to load more results, waiting only while new cards keep appearing
         for _ in range(3):
             browser.execute_script("window.scrollBy(0, 500);")
-            time.sleep(random.uniform(0.5, 1.5))
+            wait_for_stable_count(browser, AMAZON_RESULT_SELECTOR, timeout=1.5)
         
         html = browser.page_source
         soup = BeautifulSoup(html, 'lxml')
@@ -119,7 +121,8 @@ def scrape_flipkart(name, driver_path):
     browser = create_browser(driver_path)
     
     try:
-        browser.get(URL)
+        with get_rate_limiter().permit(URL):
+            browser.get(URL)
         time.sleep(10)  # Extended wait time
         
         # Try multiple strategies to find product elements
@@ -186,8 +189,8 @@ def scrape_amazon_reviews(product_link, driver_path):
     review_url = product_link.split('/dp/')[0] + '/product-reviews/' + product_link.split('/dp/')[1].split('/')[0]
     
     try:
-        browser.get(review_url)
-        time.sleep(random.uniform(3, 5))
+        with get_rate_limiter().permit(review_url):
+            browser.get(review_url)
         
         # Wait for reviews to load
         WebDriverWait(browser, 10).until(
@@ -260,8 +263,9 @@ def scrape_flipkart_reviews(product_link, driver_path):
     review_url = product_link + '/product-reviews'
     
     try:
-        browser.get(review_url)
-        time.sleep(random.uniform(3, 5))
+        with get_rate_limiter().permit(review_url):
+            browser.get(review_url)
+        wait_for_stable_count(browser, 'div._1AtVbE', timeout=5)
         
         html = browser.page_source
         soup = BeautifulSoup(html, 'lxml')
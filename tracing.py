@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "compareit_stage"
+# Histogram bucket upper bounds in seconds, from a regex pass to a full Chrome start
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RESERVOIR_SIZE = 1024     # Most recent durations kept per stage for the p50/p95 figures
+METRICS_PORT = 9108
+
+
+class StageHistogram:
+    """Cumulative bucket counts for one stage plus a window of recent durations for percentiles"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'errors', 'total', 'recent')
+
+    def __init__(self, buckets=BUCKETS, reservoir_size=RESERVOIR_SIZE):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, seconds, error=False):
+        index = bisect_left(self.buckets, seconds)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Nearest-rank quantile over the recent window; 0.0 before the first observation"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Tracer:
+    """
+    In-process stage timings for the scrape -> parse -> score -> predict pipeline
+
+    Each span adds its duration to the histogram for (stage, platform). Nothing is sent
+    anywhere: the numbers are read back with snapshot() for the UI or prometheus_text()
+    for a scraper.
+    """
+
+    def __init__(self, buckets=BUCKETS, reservoir_size=RESERVOIR_SIZE):
+        self.buckets = tuple(buckets)
+        self.reservoir_size = reservoir_size
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, platform="", error=False):
+        key = (stage, platform)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = StageHistogram(self.buckets, self.reservoir_size)
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def span(self, stage, platform=""):
+        """Time the enclosed block; an exception is still timed and counted as an error"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, platform, error)
+
+    def timed(self, stage, platform=""):
+        """Decorator form of span()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, platform):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Per-stage summaries (count, errors, total, mean, p50, p95, max), sorted by stage"""
+        with self._lock:
+            rows = []
+            for (stage, platform), histogram in sorted(self._histograms.items()):
+                rows.append({
+                    'stage': stage,
+                    'platform': platform,
+                    'count': histogram.count,
+                    'errors': histogram.errors,
+                    'total': histogram.total,
+                    'mean': histogram.total / histogram.count if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.50),
+                    'p95': histogram.quantile(0.95),
+                    'max': max(histogram.recent, default=0.0),
+                })
+            return rows
+
+    def prometheus_text(self):
+        """All histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_seconds Time spent in each pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_seconds histogram",
+        ]
+        errors = [
+            f"# HELP {METRIC_PREFIX}_errors_total Stage runs that raised an exception.",
+            f"# TYPE {METRIC_PREFIX}_errors_total counter",
+        ]
+        with self._lock:
+            for (stage, platform), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",platform="{platform}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_PREFIX}_seconds_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'{METRIC_PREFIX}_seconds_count{{{labels}}} {histogram.count}')
+                errors.append(f'{METRIC_PREFIX}_errors_total{{{labels}}} {histogram.errors}')
+        return "\n".join(lines + errors) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(stage, platform=""):
+    """Shorthand for get_tracer().span(...)"""
+    return get_tracer().span(stage, platform)
+
+
+def timed(stage, platform=""):
+    """Shorthand for get_tracer().timed(...)"""
+    return get_tracer().timed(stage, platform)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = get_tracer().prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """
+    Serve /metrics from a daemon thread; later calls return the running server
+
+    Streamlit reruns the script on every interaction, so this must be safe to call repeatedly.
+    Returns None when the port is taken (e.g. by another Streamlit process).
+    """
+    global _server
+    with _tracer_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            logger.info(f"Serving stage metrics on http://{host}:{_server.server_address[1]}/metrics")
+        return _server
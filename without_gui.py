@@ -6,6 +6,7 @@ import re
 from pathlib import Path
 from bs4 import BeautifulSoup
 from selenium import webdriver
+from http_fetcher import get_fetcher
 
 
 
@@ -50,11 +51,14 @@ def flipkart():
                 full = ("https://www.flipkart.com" + i)
                 link.append(full)
     
-    for j in range(5):
+    #THE FIRST FIVE PRODUCT PAGES ARE DOWNLOADED TOGETHER OVER ONE SHARED CONNECTION POOL.
+    pages=get_fetcher().fetch_many(link[:5])
+    for j in range(len(pages)):
         info=[]
+        if pages[j] is None:
+            continue
         
-        content=requests.get(link[j], headers=HEADERS)
-        newsoup=BeautifulSoup(content.content,'html.parser')
+        newsoup=BeautifulSoup(pages[j],'html.parser')
 
         for a in newsoup.select(".B_NuCI , ._16Jk6d  "):
             for i in a: